@@ -1,24 +1,13 @@
-import pygame
 import tkinter as tk
 from tkinter import ttk, scrolledtext
-import paho.mqtt.client as mqtt
-import json
 import math
+import os
 
-# --- Inicjalizacja pygame i joysticków ---
-pygame.init()
-pygame.joystick.init()
-joysticks = [pygame.joystick.Joystick(i) for i in range(pygame.joystick.get_count())]
-for joy in joysticks:
-    joy.init()
+# Joysticki, prędkości kół, blokada kół, pętla sterowania i MQTT; ten plik tylko je rysuje
+import podwozie
 
-# --- Stan blokady kół ---
-wheel_locked = [False, False, False, False]
-
-# --- Zmienne do sterowania awaryjnego z klawiatury ---
-manual_left = 0.0
-manual_right = 0.0
-manual_speed_factor = 0.5  # startowo 50%
+# --- Częstotliwość odświeżania GUI (można nadpisać zmienną środowiskową), niezależna od sterowania ---
+RENDER_FPS = float(os.environ.get("CHASSIS_RENDER_FPS", "30"))
 
 # --- Kolory ---
 BG_COLOR = "#1e1e1e"
@@ -45,23 +34,37 @@ right_frame = tk.Frame(main_frame, bg=BG_COLOR)
 right_frame.pack(side="left", fill="both", expand=True, padx=10, pady=10)
 
 # --- Joystick info ---
-axis_labels = []
-if joysticks:
-    for i, joystick in enumerate(joysticks):
-        frame = tk.LabelFrame(left_frame, text=f"Joystick {i}: {joystick.get_name()}",
-                              bg=BG_COLOR, fg=FG_COLOR, font=("Arial", 10, "bold"))
-        frame.pack(fill="x", padx=5, pady=5)
-        labels = []
-        for axis_index in range(joystick.get_numaxes()):
-            label = tk.Label(frame, text=f"Axis {axis_index}: 0.000",
-                             bg=BG_COLOR, fg=FG_COLOR, anchor="w")
-            label.pack(anchor="w")
-            labels.append(label)
-        axis_labels.append(labels)
-else:
-    info = tk.Label(left_frame, text="Brak joysticków\nUżyj klawiatury (W/S, I/K, +/-)",
-                    bg=BG_COLOR, fg=FG_COLOR, font=("Arial", 12), justify="left")
-    info.pack(pady=10)
+# Budowane od nowa, gdy zmieni się zestaw podłączonych joysticków
+axis_labels = {}  # instance_id → etykiety osi
+joystick_panel_devices = None  # urządzenia (instance_id, nazwa, liczba osi), dla których zbudowano panel
+rendered_axis_snapshot = None  # podwozie.axis_snapshot jest podmieniany tylko, gdy osie się ruszą
+
+def build_joystick_panel(axis_snapshot):
+    global joystick_panel_devices
+    for widget in left_frame.winfo_children():
+        widget.destroy()
+    for labels in axis_labels.values():
+        for label in labels:
+            label_texts.pop(label, None)
+    axis_labels.clear()
+
+    if axis_snapshot:
+        for i, (instance_id, (name, axes)) in enumerate(axis_snapshot.items()):
+            frame = tk.LabelFrame(left_frame, text=f"Joystick {i}: {name}",
+                                  bg=BG_COLOR, fg=FG_COLOR, font=("Arial", 10, "bold"))
+            frame.pack(fill="x", padx=5, pady=5)
+            labels = []
+            for axis_index in range(len(axes)):
+                label = tk.Label(frame, text=f"Axis {axis_index}: 0.000",
+                                 bg=BG_COLOR, fg=FG_COLOR, anchor="w")
+                label.pack(anchor="w")
+                labels.append(label)
+            axis_labels[instance_id] = labels
+    else:
+        info = tk.Label(left_frame, text="Brak joysticków\nUżyj klawiatury (W/S, I/K, +/-)",
+                        bg=BG_COLOR, fg=FG_COLOR, font=("Arial", 12), justify="left")
+        info.pack(pady=10)
+    joystick_panel_devices = [(instance_id, name, len(axes)) for instance_id, (name, axes) in axis_snapshot.items()]
 
 # --- Wheel labels and gauges ---
 wheel_names = ["Front Left", "Front Right", "Rear Left", "Rear Right"]
@@ -97,8 +100,7 @@ button_frame.pack()
 
 buttons = []
 def toggle_wheel_lock(index):
-    wheel_locked[index] = not wheel_locked[index]
-    if wheel_locked[index]:
+    if podwozie.toggle_wheel_lock(index):
         buttons[index].config(text=f"{wheel_names[index]} - LOCKED", bg="red", fg="white")
     else:
         buttons[index].config(text=f"{wheel_names[index]} - UNLOCK", bg="SystemButtonFace", fg="black")
@@ -116,11 +118,19 @@ buttons[3].grid(row=1, column=1, padx=10, pady=10)
 # --- MQTT Section (prawa strona) ---
 
 # Status komunikacji MQTT - Label na górze
-mqtt_status_var = tk.StringVar(value="Status: Nie połączono")
+mqtt_status_var = tk.StringVar(value=podwozie.mqtt_status_text)
 mqtt_status_label = tk.Label(right_frame, textvariable=mqtt_status_var,
                              bg=BG_COLOR, fg=FG_COLOR, font=("Arial", 12, "bold"), anchor="w")
 mqtt_status_label.pack(fill="x", padx=5, pady=(5, 5))
 
+# Wiadomości MQTT na sekundę, zamiast wypisywania każdej w konsoli
+mqtt_rate_label = tk.Label(right_frame, text="", bg=BG_COLOR, fg=FG_COLOR, font=("Arial", 10), anchor="w")
+mqtt_rate_label.pack(fill="x", padx=5, pady=(0, 5))
+
+# Częstotliwość i jitter pętli sterowania
+control_stats_label = tk.Label(right_frame, text="", bg=BG_COLOR, fg=FG_COLOR, font=("Arial", 10), anchor="w")
+control_stats_label.pack(fill="x", padx=5, pady=(0, 5))
+
 
 
 # Konsola komunikacji MQTT - scrolled text na dole
@@ -128,33 +138,60 @@ mqtt_console = scrolledtext.ScrolledText(right_frame, bg="#222222", fg="#00ff00"
                                          font=("Consolas", 10), height=10)
 mqtt_console.pack(fill="both", expand=True, padx=5, pady=(0,10))
 
-def mqtt_console_log(msg: str):
-    mqtt_console.insert(tk.END, msg + "\n")
+# Logi z wątków sterowania i MQTT czekają w buforze podwozie.console_queue, bo Tkinter wolno ruszać
+# tylko z wątku GUI. Trafiają do konsoli jednym insertem na klatkę, a konsola trzyma najwyżej
+# podwozie.CONSOLE_LINES linii, starsze są usuwane z początku.
+def flush_console():
+    lines = podwozie.drain_console()[-podwozie.CONSOLE_LINES:]
+    if not lines:
+        return
+    mqtt_console.insert(tk.END, "\n".join(lines) + "\n")
+    excess = int(mqtt_console.index("end-1c").split(".")[0]) - 1 - podwozie.CONSOLE_LINES
+    if excess > 0:
+        mqtt_console.delete("1.0", f"{excess + 1}.0")
     mqtt_console.see(tk.END)
 
 # --- Funkcje rysowania gauge ---
-def draw_gauge(canvas, value, dynamic_max):
-    canvas.delete("all")
-
-    center_x, center_y = 90, 110
-    radius = 70
-
-    full_range = 255  # stała skala
-    clamped = max(min(value, full_range), -full_range)
-
-    # Zakres kąta 180° → -90° do +90°
-    angle_range = 90  # dla jednej strony
-
-    if full_range == 0:
-        return
+# Elementy canvasów powstają raz, przy odświeżaniu zmieniają się tylko współrzędne, zakresy
+# i kolory, a widżet, którego stan się nie zmienił, nie jest w ogóle dotykany.
+GAUGE_CENTER_X, GAUGE_CENTER_Y = 90, 110
+GAUGE_RADIUS = 70
+GAUGE_FULL_RANGE = 255  # stała skala
+GAUGE_ANGLE_RANGE = 90  # zakres kąta 180° → -90° do +90°, dla jednej strony
+
+label_texts = {}  # ostatni tekst każdej etykiety, żeby nie wołać config() bez zmiany
+
+def set_label_text(label, text):
+    if label_texts.get(label) != text:
+        label_texts[label] = text
+        label.config(text=text)
+
+def create_gauge(canvas):
+    box = (GAUGE_CENTER_X - GAUGE_RADIUS, GAUGE_CENTER_Y - GAUGE_RADIUS,
+           GAUGE_CENTER_X + GAUGE_RADIUS, GAUGE_CENTER_Y + GAUGE_RADIUS)
+    gauge = {"canvas": canvas, "state": None}
+    # Tło łuku
+    canvas.create_arc(*box, start=0, extent=180, style="arc", outline=GAUGE_BG, width=12)
+    # Wskaźnik
+    gauge["arc"] = canvas.create_arc(*box, start=90, extent=0, style="arc", width=12, state="hidden")
+    # Linia środkowa (zero)
+    canvas.create_line(GAUGE_CENTER_X, GAUGE_CENTER_Y, GAUGE_CENTER_X, GAUGE_CENTER_Y - GAUGE_RADIUS,
+                       fill="#888888", width=4)
+    # Przerywane dynamiczne linie po łuku, lewa strona (ujemna wartość) i prawa (dodatnia)
+    gauge["markers"] = [canvas.create_line(GAUGE_CENTER_X, GAUGE_CENTER_Y, GAUGE_CENTER_X, GAUGE_CENTER_Y,
+                                           fill=color, width=2, dash=(4, 2), state="hidden")
+                        for color in ("#4444aa", "#aa4444")]
+    return gauge
 
-    extent = int(abs(clamped) / full_range * 90)
+def draw_gauge(gauge, value, dynamic_max):
+    clamped = max(min(value, GAUGE_FULL_RANGE), -GAUGE_FULL_RANGE)
+    extent = int(abs(clamped) / GAUGE_FULL_RANGE * 90)
 
     # Kolor wskaźnika
     if clamped > 0:
-        if clamped <= full_range * 0.4:
+        if clamped <= GAUGE_FULL_RANGE * 0.4:
             color = "#00ff00"
-        elif clamped <= full_range * 0.8:
+        elif clamped <= GAUGE_FULL_RANGE * 0.8:
             color = "#ffff00"
         else:
             color = "#ff3333"
@@ -163,105 +200,39 @@ def draw_gauge(canvas, value, dynamic_max):
     else:
         color = ""
 
-    # Tło łuku
-    canvas.create_arc(center_x - radius, center_y - radius,
-                      center_x + radius, center_y + radius,
-                      start=0, extent=180, style="arc",
-                      outline=GAUGE_BG, width=12)
-
-    # Wskaźnik
-    if clamped > 0:
-        canvas.create_arc(center_x - radius, center_y - radius,
-                          center_x + radius, center_y + radius,
-                          start=90, extent=extent,
-                          style="arc", outline=color, width=12)
-    elif clamped < 0:
-        canvas.create_arc(center_x - radius, center_y - radius,
-                          center_x + radius, center_y + radius,
-                          start=90 - extent, extent=extent,
-                          style="arc", outline=color, width=12)
-
-    # Linia środkowa (zero)
-    canvas.create_line(center_x, center_y,
-                       center_x, center_y - radius,
-                       fill="#888888", width=4)
-
-    # --- Przerywane dynamiczne linie po łuku
-
-    def draw_dynamic_line(angle_deg, label_text, color):
-        rad = math.radians(angle_deg)
-        x = center_x + radius * math.sin(rad)
-        y = center_y - radius * math.cos(rad)
-        canvas.create_line(center_x, center_y, x, y,
-                           fill=color, width=2, dash=(4, 2))
-        #canvas.create_text(x, y, text=label_text, fill="#888888", font=("Arial", 8))
-
-    if dynamic_max > 0:
-        angle_offset = (dynamic_max / full_range) * angle_range
-
-        # Lewa strona (ujemna wartość)
-        draw_dynamic_line( - angle_offset, f"-{dynamic_max}", "#4444aa")
-
-        # Prawa strona (dodatnia wartość)
-        draw_dynamic_line(+ angle_offset, f"+{dynamic_max}", "#aa4444")
-
-# --- Wyliczanie prędkości kół ---
-def calculate_wheel_speeds():
-    global manual_left, manual_right, manual_speed_factor
-
-    left_value = 0.0
-    right_value = 0.0
-    speed_factor = 0.5
-
-    if joysticks:
-        try:
-            tflight = None
-            logitech = None
-
-            # Przechodzimy przez wszystkie joysticki i identyfikujemy je po nazwie
-            for joystick in joysticks:
-                if "T.Flight Hotas X" in joystick.get_name():
-                    tflight = joystick
-                elif "Logitech Extreme 3D" in joystick.get_name():
-                    logitech = joystick
-
-            if tflight and tflight.get_numaxes() > 2:
-                right_value = -tflight.get_axis(1)  # Oś 1: sterowanie prawą stroną
-                speed_factor = (-tflight.get_axis(2) + 1) / 2  # Oś 2: suwak prędkości
-
-            if logitech and logitech.get_numaxes() > 1:
-                left_value = -logitech.get_axis(1)  # Oś 1: lewa strona
-
-        except Exception as e:
-            mqtt_console_log(f"❗ Błąd odczytu joysticków: {e}")
-    else:
-        left_value = manual_left
-        right_value = manual_right
-        speed_factor = manual_speed_factor
-
-    max_speed = 255
-    left_speed = int(left_value * speed_factor * max_speed)
-    right_speed = int(right_value * speed_factor * max_speed)
-
-    wheel_speeds = [
-        left_speed,   # Front Left
-        right_speed,  # Front Right
-        left_speed,   # Rear Left
-        right_speed   # Rear Right
-    ]
-
-    for i in range(4):
-        if wheel_locked[i]:
-            wheel_speeds[i] = 0
-
-    dynamic_max = int(speed_factor * max_speed)
-    return wheel_speeds, dynamic_max
+    state = (extent if clamped >= 0 else -extent, color, dynamic_max)
+    if state == gauge["state"]:
+        return
+    previous = gauge["state"]
+    gauge["state"] = state
+    canvas = gauge["canvas"]
 
+    if previous is None or state[:2] != previous[:2]:
+        if extent == 0:
+            canvas.itemconfigure(gauge["arc"], state="hidden")
+        else:
+            start = 90 if clamped > 0 else 90 - extent
+            canvas.itemconfigure(gauge["arc"], start=start, extent=extent, outline=color, state="normal")
+
+    if previous is None or dynamic_max != previous[2]:
+        if dynamic_max > 0:
+            angle_offset = (dynamic_max / GAUGE_FULL_RANGE) * GAUGE_ANGLE_RANGE
+            for marker, angle_deg in zip(gauge["markers"], (-angle_offset, angle_offset)):
+                rad = math.radians(angle_deg)
+                x = GAUGE_CENTER_X + GAUGE_RADIUS * math.sin(rad)
+                y = GAUGE_CENTER_Y - GAUGE_RADIUS * math.cos(rad)
+                canvas.coords(marker, GAUGE_CENTER_X, GAUGE_CENTER_Y, x, y)
+                canvas.itemconfigure(marker, state="normal")
+        else:
+            for marker in gauge["markers"]:
+                canvas.itemconfigure(marker, state="hidden")
 
+gauges = [create_gauge(canvas) for canvas in gauge_canvases]
 
 # --- Dodaj nowe zmienne do wskaźnika mocy ---
 power_indicator_canvas = None
 power_indicator_line = None
+power_indicator_state = None  # (pozycja, kolor) ostatnio narysowanego wskaźnika
 
 def create_power_indicator():
     global power_indicator_canvas, power_indicator_line
@@ -277,9 +248,11 @@ def create_power_indicator():
     power_indicator_canvas.create_line(0, 15, 400, 15, fill="#CFCFCF", width=2)
     # Dodaj białą linię w środku
     power_indicator_canvas.create_line(200, 5, 200, 25, fill="light gray", width=10)  # Pozycja środkowa
+    # Wskaźnik, przesuwany przez draw_power_indicator
+    power_indicator_line = power_indicator_canvas.create_line(200, 5, 200, 25, fill="light green", width=8)
 
 def draw_power_indicator(left_value, right_value):
-    global power_indicator_line
+    global power_indicator_state
 
     # Oblicz różnicę i przesuń wskaźnik
     total_width = 400
@@ -300,152 +273,82 @@ def draw_power_indicator(left_value, right_value):
     else:  # Duże wychylenie
         color = "red"
 
-    # Rysuj wskaźnik
-    if power_indicator_line:
-        power_indicator_canvas.delete(power_indicator_line)
-
-    power_indicator_line = power_indicator_canvas.create_line(indicator_position, 5, indicator_position, 25, fill=color, width=8)
-
-# --- Add this function to publish wheel speeds ---
-def publish_wheel_speeds(wheel_speeds):
-    payload = {
-        "eventType": "chassis",
-        "mode": "pwm",
-        "payload": {
-            "fl": wheel_speeds[0],  # Front Left
-            "fr": wheel_speeds[1],  # Front Right
-            "rl": wheel_speeds[2],  # Rear Left
-            "rr": wheel_speeds[3]   # Rear Right
-        }
-    }
-    try:
-        client.publish("orion/topic/chassis/controller/inbound", json.dumps(payload))
-        mqtt_console_log(f"📤 Wysłano: {payload}")
-    except Exception as e:
-        mqtt_console_log(f"❗ Błąd podczas wysyłania wiadomości: {e}")
-
-# --- Modify the update_axes function to call publish_wheel_speeds ---
-def update_axes():
-    pygame.event.pump()
-
-    if joysticks:
-        for i, joystick in enumerate(joysticks):
-            for j in range(joystick.get_numaxes()):
-                value = joystick.get_axis(j)
-                axis_labels[i][j].config(text=f"Axis {j}: {value:.3f}")
-
-    wheel_speeds, dynamic_max = calculate_wheel_speeds()
-    for i, speed in enumerate(wheel_speeds):
-        wheel_speed_labels[i].config(text=f"{speed}")
-        draw_gauge(gauge_canvases[i], speed, dynamic_max)
-
-    # Send the wheel speeds via MQTT
-    publish_wheel_speeds(wheel_speeds)
-
-    # Draw power indicator
-    left_value = wheel_speeds[0] / 255  # Rescale to range -1 to 1
-    right_value = wheel_speeds[1] / 255  # Rescale to range -1 to 1
-    draw_power_indicator(left_value, right_value)
-
-    root.after(50, update_axes)
+    # Przesuń wskaźnik, tylko jeśli zmienił się o co najmniej piksel albo zmienił kolor
+    state = (round(indicator_position), color)
+    if state == power_indicator_state:
+        return
+    power_indicator_state = state
+    power_indicator_canvas.coords(power_indicator_line, state[0], 5, state[0], 25)
+    power_indicator_canvas.itemconfigure(power_indicator_line, fill=color)
+
+# --- Rysowanie GUI, z własną częstotliwością RENDER_FPS ---
+def render():
+    global rendered_axis_snapshot
+    state = podwozie.latest_state
+    if state is not None:
+        wheel_speeds, dynamic_max, axis_snapshot = state
+        if axis_snapshot is not rendered_axis_snapshot:
+            rendered_axis_snapshot = axis_snapshot
+            devices = [(instance_id, name, len(axes)) for instance_id, (name, axes) in axis_snapshot.items()]
+            if devices != joystick_panel_devices:
+                build_joystick_panel(axis_snapshot)
+            for instance_id, (name, axes) in axis_snapshot.items():
+                for j, value in enumerate(axes):
+                    set_label_text(axis_labels[instance_id][j], f"Axis {j}: {value:.3f}")
+
+        for i, speed in enumerate(wheel_speeds):
+            set_label_text(wheel_speed_labels[i], f"{speed}")
+            draw_gauge(gauges[i], speed, dynamic_max)
+
+        # Draw power indicator
+        left_value = wheel_speeds[0] / 255  # Rescale to range -1 to 1
+        right_value = wheel_speeds[1] / 255  # Rescale to range -1 to 1
+        draw_power_indicator(left_value, right_value)
+
+    if mqtt_status_var.get() != podwozie.mqtt_status_text:
+        mqtt_status_var.set(podwozie.mqtt_status_text)
+    sent, received = podwozie.message_rates()
+    set_label_text(mqtt_rate_label, f"Wysłane: {sent:.1f}/s, odebrane: {received:.1f}/s")
+    set_label_text(control_stats_label, podwozie.control_stats_text())
+    flush_console()
+
+    root.after(max(1, int(1000 / RENDER_FPS)), render)
 
 # --- Wywołaj funkcję do utworzenia wskaźnika mocy ---
 create_power_indicator()
 # --- Obsługa klawiatury ---
 def on_key_press(event):
-    global manual_left, manual_right, manual_speed_factor
-
     key = event.keysym.lower()
     if key == 'w':
-        manual_left = 1.0
+        podwozie.manual_left = 1.0
     elif key == 's':
-        manual_left = -1.0
+        podwozie.manual_left = -1.0
     elif key == 'i':
-        manual_right = 1.0
+        podwozie.manual_right = 1.0
     elif key == 'k':
-        manual_right = -1.0
+        podwozie.manual_right = -1.0
     elif key == 'plus' or key == 'equal':
-        manual_speed_factor = min(1.0, manual_speed_factor + 0.1)
+        podwozie.manual_speed_factor = min(1.0, podwozie.manual_speed_factor + 0.1)
     elif key == 'minus':
-        manual_speed_factor = max(0.0, manual_speed_factor - 0.1)
+        podwozie.manual_speed_factor = max(0.0, podwozie.manual_speed_factor - 0.1)
 
 def on_key_release(event):
-    global manual_left, manual_right
-
     key = event.keysym.lower()
     if key in ['w', 's']:
-        manual_left = 0.0
+        podwozie.manual_left = 0.0
     elif key in ['i', 'k']:
-        manual_right = 0.0
+        podwozie.manual_right = 0.0
 
-# --- MQTT callbacks ---
-
-def on_connect(client, userdata, flags, rc):
-    if rc == 0:
-        msg = f"✅ Połączono z brokerem MQTT (kod: {rc})"
-        mqtt_status_var.set("Status: Połączono")
-        mqtt_console_log(msg)
-        # Subskrybuj temat
-        client.subscribe("orion/topic/chassis/controller/inbound")
-    else:
-        mqtt_status_var.set(f"Status: Błąd połączenia (kod: {rc})")
-        mqtt_console_log(f"❌ Nie udało się połączyć (kod: {rc})")
-
-def on_subscribe(client, userdata, mid, granted_qos):
-    mqtt_console_log(f"🔔 Subskrypcja potwierdzona (mid={mid})")
-
-def on_disconnect(client, userdata, rc):
-    if rc != 0:
-        mqtt_console_log("⚠️ Nieoczekiwane rozłączenie.")
-    mqtt_status_var.set("Status: Rozłączono")
-
-def on_message(client, userdata, msg):
-    try:
-        payload_str = msg.payload.decode()
-        message = json.loads(payload_str)
-
-        event_type = message.get("eventType", "Brak eventType")
-        payload = message.get("payload", {})
-
-        mqtt_console_log(f"\n📥 Wiadomość z tematu: {msg.topic}")
-        mqtt_console_log(f"  Typ zdarzenia: {event_type}")
-        mqtt_console_log(f"  Ładunek:")
-        for key, value in payload.items():
-            mqtt_console_log(f"    - {key}: {value}")
-
-    except json.JSONDecodeError:
-        mqtt_console_log(f"❗ Błąd dekodowania JSON w wiadomości z tematu {msg.topic}")
-        mqtt_console_log(f"  Treść wiadomości: {msg.payload.decode()}")
-    except Exception as e:
-        mqtt_console_log(f"❗ Błąd podczas przetwarzania wiadomości: {e}")
-
-# --- Konfiguracja klienta MQTT ---
-broker_address = "192.168.11.11"
-broker_port = 1883
-
-client = mqtt.Client()
-client.username_pw_set("user", "user")
-
-client.on_connect = on_connect
-client.on_message = on_message
-client.on_subscribe = on_subscribe
-client.on_disconnect = on_disconnect
-
-try:
-    client.connect(broker_address, broker_port)
-except Exception as e:
-    mqtt_status_var.set("Status: Błąd połączenia")
-    mqtt_console_log(f"❌ Nie udało się połączyć z brokerem MQTT: {e}")
-
-# --- Funkcja integrująca pętlę MQTT z Tkinter ---
-def mqtt_loop():
-    client.loop(timeout=0.1)
-    root.after(100, mqtt_loop)
+def on_close():
+    podwozie.stop()
+    root.destroy()
 
 # --- Bindy i start GUI ---
 root.bind("<KeyPress>", on_key_press)
 root.bind("<KeyRelease>", on_key_release)
+root.protocol("WM_DELETE_WINDOW", on_close)
 
-update_axes()
-mqtt_loop()
+podwozie.start_mqtt()
+podwozie.start_control()
+render()
 root.mainloop()
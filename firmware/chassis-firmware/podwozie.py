@@ -0,0 +1,422 @@
+# Sterowanie podwoziem bez GUI: joysticki (pygame), prędkości kół, blokada kół i publikowanie przez MQTT.
+# Korzysta z tego konsola podpodwoziemqtt.py (Tkinter), a uruchomione bezpośrednio działa bez ekranu,
+# np. na małym komputerze przy radiu, z linią statusu w terminalu:
+#
+#     python podwozie.py --broker 192.168.11.11 --control-hz 100
+#
+# Z wejścia standardowego: 1-4 albo FL/FR/RL/RR + Enter przełącza blokadę koła, q + Enter kończy.
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import pygame
+import paho.mqtt.client as mqtt
+
+# --- Konfiguracja (można nadpisać zmiennymi środowiskowymi) ---
+CONTROL_HZ = float(os.environ.get("CHASSIS_CONTROL_HZ", "50"))  # pętla sterowania: joysticki, prędkości kół, MQTT
+BROKER_ADDRESS = os.environ.get("CHASSIS_MQTT_BROKER", "192.168.11.11")
+BROKER_PORT = int(os.environ.get("CHASSIS_MQTT_PORT", "1883"))
+MQTT_USERNAME = "user"
+MQTT_PASSWORD = "user"
+CHASSIS_TOPIC = "orion/topic/chassis/controller/inbound"
+# Ramka idzie, gdy zmienią się prędkości kół, a bez zmian tylko co tyle sekund, żeby sterownik widział łącze
+HEARTBEAT_INTERVAL = float(os.environ.get("CHASSIS_HEARTBEAT_INTERVAL", "1.0"))
+CONSOLE_LINES = int(os.environ.get("CHASSIS_CONSOLE_LINES", "500"))  # pojemność logu, starsze linie wypadają
+
+WHEEL_CODES = ["FL", "FR", "RL", "RR"]  # kolejność jak w wheel_speeds
+
+# --- Joysticki ---
+# Stan osi przychodzi zdarzeniami pygame (JOYAXISMOTION), a urządzenia zdarzeniami JOYDEVICEADDED/REMOVED,
+# więc działa podłączanie w trakcie pracy. Rola urządzenia jest rozpoznawana po nazwie raz, przy pierwszym
+# podłączeniu, i zapamiętywana po GUID, żeby po ponownym podłączeniu wróciło do tej samej roli.
+# Zdarzenia są poprawne tylko wtedy, gdy SDL jest zainicjowane w wątku, który je odbiera (init_joysticks()
+# w control_loop()). Podłączanie w trakcie pracy sprawdzono tylko na Linuksie, na wirtualnych joystickach SDL;
+# na Windows, na którym działa konsola Tkinter, trzeba to jeszcze sprawdzić na prawdziwych urządzeniach.
+JOYSTICK_ROLES = {"tflight": "T.Flight Hotas X", "logitech": "Logitech Extreme 3D"}
+joysticks = {}  # instance_id → pygame.joystick.Joystick podłączonych urządzeń
+joystick_axes = {}  # instance_id → ostatnie wartości osi
+role_guids = {}  # rola → GUID urządzenia, zostaje po odłączeniu
+role_devices = {}  # rola → instance_id podłączonego urządzenia
+
+# --- Stan blokady kół ---
+wheel_locked = [False, False, False, False]
+
+# --- Zmienne do sterowania awaryjnego z klawiatury ---
+manual_left = 0.0
+manual_right = 0.0
+manual_speed_factor = 0.5  # startowo 50%
+
+# --- Log i status ---
+# Logi przychodzą z wątku sterowania i wątku MQTT, więc trafiają do bufora, który opróżnia wątek
+# interfejsu (GUI albo linia statusu). Bufor ma stałą pojemność, gdy interfejs nie nadąża, wypadają najstarsze
+console_queue = deque(maxlen=CONSOLE_LINES)
+mqtt_status_text = "Status: Nie połączono"
+# Ruch MQTT jest tylko liczony, a interfejs pokazuje wiadomości na sekundę
+published_count = 0
+received_count = 0
+rate_sample = (time.monotonic(), 0, 0)  # (czas, wysłane, odebrane) przy ostatnim przeliczeniu
+rates = (0.0, 0.0)  # wysłane/s, odebrane/s
+
+def mqtt_console_log(msg: str):
+    console_queue.append(msg)
+
+def set_mqtt_status(text: str):
+    global mqtt_status_text
+    mqtt_status_text = text
+
+def drain_console():
+    lines = []
+    while True:
+        try:
+            lines.append(console_queue.popleft())
+        except IndexError:
+            return lines
+
+def message_rates():
+    """(wysłane/s, odebrane/s), przeliczane najwyżej raz na sekundę; wołać z jednego wątku interfejsu."""
+    global rate_sample, rates
+    now = time.monotonic()
+    elapsed = now - rate_sample[0]
+    if elapsed >= 1:
+        rates = ((published_count - rate_sample[1]) / elapsed, (received_count - rate_sample[2]) / elapsed)
+        rate_sample = (now, published_count, received_count)
+    return rates
+
+def toggle_wheel_lock(index):
+    wheel_locked[index] = not wheel_locked[index]
+    return wheel_locked[index]
+
+# --- Inicjalizacja pygame i joysticków ---
+def init_joysticks():
+    # SDL obsługuje zdarzenia tylko w wątku, który je zainicjował (na Windows komunikaty o podłączeniu
+    # urządzeń trafiają do okna tego wątku), więc woła to control_loop() w wątku sterowania.
+    # Urządzenia podłączone już przy starcie też przychodzą jako JOYDEVICEADDED
+    pygame.init()
+    pygame.joystick.init()
+
+def bind_role(instance_id, joystick):
+    guid = joystick.get_guid()
+    for role, name in JOYSTICK_ROLES.items():
+        if role in role_devices:
+            continue
+        if role_guids.get(role) == guid or (role not in role_guids and name in joystick.get_name()):
+            role_guids[role] = guid
+            role_devices[role] = instance_id
+            return role
+    return None
+
+def handle_joystick_event(event):
+    """Aktualizuje stan joysticków, zwraca True, jeśli coś się zmieniło."""
+    if event.type == pygame.JOYAXISMOTION:
+        axes = joystick_axes.get(event.instance_id)
+        if axes is None or event.axis >= len(axes) or axes[event.axis] == event.value:
+            return False
+        axes[event.axis] = event.value
+        return True
+
+    if event.type == pygame.JOYDEVICEADDED:
+        joystick = pygame.joystick.Joystick(event.device_index)
+        instance_id = joystick.get_instance_id()
+        if instance_id in joysticks:
+            return False
+        joysticks[instance_id] = joystick
+        joystick_axes[instance_id] = [joystick.get_axis(j) for j in range(joystick.get_numaxes())]
+        role = bind_role(instance_id, joystick)
+        mqtt_console_log(f"🎮 Podłączono: {joystick.get_name()}" + (f" (rola: {role})" if role else ""))
+        return True
+
+    if event.type == pygame.JOYDEVICEREMOVED:
+        joystick = joysticks.pop(event.instance_id, None)
+        if joystick is None:
+            return False
+        del joystick_axes[event.instance_id]
+        for role, instance_id in list(role_devices.items()):
+            if instance_id == event.instance_id:
+                del role_devices[role]
+        mqtt_console_log(f"🎮 Odłączono: {joystick.get_name()}")
+        return True
+
+    return False
+
+# --- Wyliczanie prędkości kół ---
+def calculate_wheel_speeds():
+    global manual_left, manual_right, manual_speed_factor
+
+    left_value = 0.0
+    right_value = 0.0
+    speed_factor = 0.5
+
+    if joysticks:
+        # Osie urządzeń przypisanych do ról, odłączona rola daje zero
+        tflight = joystick_axes.get(role_devices.get("tflight"))
+        logitech = joystick_axes.get(role_devices.get("logitech"))
+
+        if tflight and len(tflight) > 2:
+            right_value = -tflight[1]  # Oś 1: sterowanie prawą stroną
+            speed_factor = (-tflight[2] + 1) / 2  # Oś 2: suwak prędkości
+
+        if logitech and len(logitech) > 1:
+            left_value = -logitech[1]  # Oś 1: lewa strona
+    else:
+        left_value = manual_left
+        right_value = manual_right
+        speed_factor = manual_speed_factor
+
+    max_speed = 255
+    left_speed = int(left_value * speed_factor * max_speed)
+    right_speed = int(right_value * speed_factor * max_speed)
+
+    wheel_speeds = [
+        left_speed,   # Front Left
+        right_speed,  # Front Right
+        left_speed,   # Rear Left
+        right_speed   # Rear Right
+    ]
+
+    for i in range(4):
+        if wheel_locked[i]:
+            wheel_speeds[i] = 0
+
+    dynamic_max = int(speed_factor * max_speed)
+    return wheel_speeds, dynamic_max
+
+# --- Add this function to publish wheel speeds ---
+last_published_speeds = None  # prędkości z ostatniej wysłanej ramki
+last_publish_time = 0.0
+
+def publish_wheel_speeds(wheel_speeds):
+    global published_count, last_published_speeds, last_publish_time
+    payload = {
+        "eventType": "chassis",
+        "mode": "pwm",
+        "payload": {
+            "fl": wheel_speeds[0],  # Front Left
+            "fr": wheel_speeds[1],  # Front Right
+            "rl": wheel_speeds[2],  # Rear Left
+            "rr": wheel_speeds[3]   # Rear Right
+        }
+    }
+    try:
+        # Bez połączenia ramka nie wychodzi i zostaje do wysłania w następnym ticku
+        if client.publish(CHASSIS_TOPIC, json.dumps(payload)).rc == mqtt.MQTT_ERR_SUCCESS:
+            published_count += 1
+            last_published_speeds = wheel_speeds
+            last_publish_time = time.monotonic()
+    except Exception as e:
+        mqtt_console_log(f"❗ Błąd podczas wysyłania wiadomości: {e}")
+
+# --- Pętla sterowania ---
+# Działa we własnym wątku ze stałym krokiem CONTROL_HZ: czyta joysticki, liczy prędkości kół
+# i publikuje je, a interfejs dostaje tylko ostatni stan. Wolne odświeżanie nie opóźnia więc komend.
+control_stop = threading.Event()
+control_thread = None
+latest_state = None  # (wheel_speeds, dynamic_max, axis_snapshot) z ostatniego ticku
+axis_snapshot = {}  # instance_id → (nazwa, osie), nowy słownik przy każdej zmianie, do odczytu z innych wątków
+control_jitter = deque(maxlen=1)  # spóźnienia startu ticków z ~10 s [s], rozmiar ustawia start_control()
+control_skipped = 0  # ticki pominięte, bo poprzednie trwały dłużej niż okres
+
+def control_step():
+    global latest_state, axis_snapshot
+    changed = False
+    for event in pygame.event.get():
+        changed = handle_joystick_event(event) or changed
+    if changed:
+        axis_snapshot = {instance_id: (joysticks[instance_id].get_name(), tuple(axes))
+                         for instance_id, axes in joystick_axes.items()}
+    wheel_speeds, dynamic_max = calculate_wheel_speeds()
+
+    # Send the wheel speeds via MQTT, po zmianie albo jako heartbeat (z tolerancją pół ticku, żeby nie spóźniał się o cały)
+    heartbeat_due = time.monotonic() - last_publish_time >= HEARTBEAT_INTERVAL - 0.5 / CONTROL_HZ
+    if wheel_speeds != last_published_speeds or heartbeat_due:
+        publish_wheel_speeds(wheel_speeds)
+
+    latest_state = (wheel_speeds, dynamic_max, axis_snapshot)
+
+def control_loop():
+    global control_skipped
+    init_joysticks()
+    period = 1 / CONTROL_HZ
+    next_tick = time.perf_counter()
+    while not control_stop.is_set():
+        now = time.perf_counter()
+        if now < next_tick:
+            control_stop.wait(next_tick - now)
+            continue
+        control_jitter.append(now - next_tick)
+        try:
+            control_step()
+        except Exception as e:
+            mqtt_console_log(f"❗ Błąd w pętli sterowania: {e}")
+        next_tick += period
+        # Po przestoju nie nadrabiamy zaległych ticków seriami, tylko je pomijamy
+        behind = time.perf_counter() - next_tick
+        if behind > period:
+            missed = int(behind / period)
+            control_skipped += missed
+            next_tick += missed * period
+
+def control_jitter_ms():
+    """(p50, p99, max) spóźnienia ticków w ms albo None przed pierwszym tickiem."""
+    samples = sorted(control_jitter.copy())
+    if not samples:
+        return None
+    p50 = samples[len(samples) // 2]
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return p50 * 1000, p99 * 1000, samples[-1] * 1000
+
+def control_stats_text():
+    jitter = control_jitter_ms()
+    if jitter is None:
+        return f"Sterowanie: {CONTROL_HZ:g} Hz"
+    return (f"Sterowanie: {CONTROL_HZ:g} Hz, jitter p50 {jitter[0]:.1f} ms, p99 {jitter[1]:.1f} ms, "
+            f"max {jitter[2]:.1f} ms, pominięte ticki: {control_skipped}")
+
+def start_control():
+    global control_thread, control_jitter
+    control_jitter = deque(maxlen=max(1, int(CONTROL_HZ * 10)))
+    control_stop.clear()
+    control_thread = threading.Thread(target=control_loop, name="chassis-control", daemon=True)
+    control_thread.start()
+
+# --- MQTT callbacks ---
+
+def on_connect(client, userdata, flags, rc, properties=None):
+    if rc == 0:
+        msg = f"✅ Połączono z brokerem MQTT (kod: {rc})"
+        set_mqtt_status("Status: Połączono")
+        mqtt_console_log(msg)
+        # Subskrybuj temat
+        client.subscribe(CHASSIS_TOPIC)
+    else:
+        set_mqtt_status(f"Status: Błąd połączenia (kod: {rc})")
+        mqtt_console_log(f"❌ Nie udało się połączyć (kod: {rc})")
+
+def on_connect_fail(client, userdata):
+    set_mqtt_status("Status: Błąd połączenia")
+    mqtt_console_log("❌ Nie udało się połączyć z brokerem MQTT, ponawiam")
+
+def on_subscribe(client, userdata, mid, granted_qos, properties=None):
+    mqtt_console_log(f"🔔 Subskrypcja potwierdzona (mid={mid})")
+
+def on_disconnect(client, userdata, rc, properties=None):
+    if rc != 0:
+        mqtt_console_log("⚠️ Nieoczekiwane rozłączenie.")
+    set_mqtt_status("Status: Rozłączono")
+
+def content_type_of(msg):
+    # Format payloadu z content type (MQTT v5). Bez niego to JSON, a binarne formaty aplikacji webowej
+    # (MessagePack/CBOR) konsola pomija, bo czyta tylko JSON
+    return getattr(getattr(msg, "properties", None), "ContentType", None)
+
+def on_message(client, userdata, msg):
+    global received_count
+    received_count += 1
+    if content_type_of(msg) not in (None, "application/json"):
+        return
+    try:
+        # W logu tylko błędne wiadomości
+        json.loads(msg.payload)
+    except ValueError as e:
+        mqtt_console_log(f"❗ Błąd dekodowania JSON w wiadomości z tematu {msg.topic}: {e}")
+        mqtt_console_log(f"  Treść wiadomości: {msg.payload.decode(errors='replace')}")
+
+# --- Konfiguracja klienta MQTT ---
+client = mqtt.Client(protocol=mqtt.MQTTv5) # v5, żeby widzieć content type wiadomości
+client.username_pw_set(MQTT_USERNAME, MQTT_PASSWORD)
+
+client.on_connect = on_connect
+client.on_message = on_message
+client.on_subscribe = on_subscribe
+client.on_disconnect = on_disconnect
+client.on_connect_fail = on_connect_fail
+
+def start_mqtt(broker_address=BROKER_ADDRESS, broker_port=BROKER_PORT):
+    # Sieć MQTT działa w tle (wątek paho), łączy się i ponawia połączenie bez blokowania interfejsu
+    client.connect_async(broker_address, broker_port)
+    client.loop_start()
+
+def stop():
+    control_stop.set()
+    if control_thread is not None:
+        control_thread.join(timeout=1)
+    client.disconnect()
+    client.loop_stop()
+
+# --- Tryb bez GUI ---
+def status_line():
+    state = latest_state
+    speeds = " ".join(f"{code} {speed:4d}" for code, speed in zip(WHEEL_CODES, state[0])) if state else "brak danych"
+    locks = ",".join(code for code, locked in zip(WHEEL_CODES, wheel_locked) if locked) or "brak"
+    roles = ",".join(role_devices) or "brak ról"
+    sent, received = message_rates()
+    jitter = control_jitter_ms()
+    control = f"{CONTROL_HZ:g} Hz, p99 {jitter[1]:.1f} ms, pominięte {control_skipped}" if jitter else f"{CONTROL_HZ:g} Hz"
+    return (f"{mqtt_status_text} | {speeds} | blokada {locks} | joysticki {len(joysticks)} ({roles}) | "
+            f"MQTT {sent:.1f}/s wysł., {received:.1f}/s odebr. | {control}")
+
+def read_commands():
+    # Komendy z wejścia standardowego, czytane liniami, żeby działało w każdym terminalu
+    for line in sys.stdin:
+        command = line.strip().upper()
+        if command == "Q":
+            control_stop.set()
+            return
+        if command in ("1", "2", "3", "4"):
+            index = int(command) - 1
+        elif command in WHEEL_CODES:
+            index = WHEEL_CODES.index(command)
+        else:
+            if command:
+                mqtt_console_log(f"Nieznana komenda: {command} (1-4 albo FL/FR/RL/RR przełącza blokadę, q kończy)")
+            continue
+        locked = toggle_wheel_lock(index)
+        mqtt_console_log(f"🔒 {WHEEL_CODES[index]} zablokowane" if locked else f"🔓 {WHEEL_CODES[index]} odblokowane")
+
+def main(argv=None):
+    global CONTROL_HZ
+    parser = argparse.ArgumentParser(description="Sterowanie podwoziem z joysticków przez MQTT, bez GUI")
+    parser.add_argument("--broker", default=BROKER_ADDRESS, help="adres brokera MQTT")
+    parser.add_argument("--port", type=int, default=BROKER_PORT, help="port brokera MQTT")
+    parser.add_argument("--control-hz", type=float, default=CONTROL_HZ, help="częstotliwość pętli sterowania")
+    parser.add_argument("--status-hz", type=float, default=5, help="odświeżanie linii statusu")
+    parser.add_argument("--lock", default="", help="koła zablokowane na starcie, np. FL,RR")
+    parser.add_argument("--duration", type=float, help="zakończ po tylu sekundach, do testów i pomiarów")
+    args = parser.parse_args(argv)
+    if args.control_hz <= 0 or args.status_hz <= 0:
+        parser.error("częstotliwości muszą być dodatnie")
+    for code in filter(None, (code.strip().upper() for code in args.lock.split(","))):
+        if code not in WHEEL_CODES:
+            parser.error(f"nieznane koło {code}, dostępne: {','.join(WHEEL_CODES)}")
+        wheel_locked[WHEEL_CODES.index(code)] = True
+
+    CONTROL_HZ = args.control_hz
+    # Bez ekranu SDL potrzebuje atrapy sterownika wideo, inaczej pygame.event.pump() nie działa
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    start_mqtt(args.broker, args.port)
+    start_control()
+    threading.Thread(target=read_commands, name="chassis-commands", daemon=True).start()
+
+    deadline = time.monotonic() + args.duration if args.duration else None
+    width = 0
+    try:
+        while not control_stop.is_set() and (deadline is None or time.monotonic() < deadline):
+            for line in drain_console():
+                print("\r" + line.ljust(width))
+            line = status_line()
+            width = max(width, len(line))
+            sys.stdout.write("\r" + line.ljust(width))
+            sys.stdout.flush()
+            control_stop.wait(1 / args.status_hz)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop()
+        print()
+        print(control_stats_text())
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ import csv
 from tkinter import ttk, scrolledtext, messagebox, filedialog
 import paho.mqtt.client as mqtt
 import json
+import os
 import queue
 from datetime import datetime
 import io
@@ -67,17 +68,25 @@ def is_sample_message(payload_obj):
 # -------------------------
 # MQTT callbacks
 # -------------------------
-def on_connect(client, userdata, flags, rc):
+def on_connect(client, userdata, flags, rc, properties=None):
     print("✅ Połączono z brokerem MQTT (kod:", rc, ")")
     client.subscribe(topic_outbound)
     client.subscribe(topic_inbound)
     print("Subskrypcje: ", topic_outbound, topic_inbound)
 
-def on_subscribe(client, userdata, mid, granted_qos):
+def on_subscribe(client, userdata, mid, granted_qos, properties=None):
     print("Subscribed:", mid, granted_qos)
 
+def content_type_of(msg):
+    # Format payloadu z content type (MQTT v5). Bez niego to JSON, a binarne formaty aplikacji webowej
+    # (MessagePack/CBOR) konsola pomija, bo czyta tylko JSON
+    return getattr(getattr(msg, "properties", None), "ContentType", None)
+
 def on_message(client, userdata, msg):
     try:
+        content_type = content_type_of(msg)
+        if content_type not in (None, "application/json"):
+            raise ValueError(f"format {content_type}")
         payload_str = msg.payload.decode()
         parsed = json.loads(payload_str)
         entry = {
@@ -97,7 +106,7 @@ def on_message(client, userdata, msg):
                 msg_queue.put_nowait(entry)
             except queue.Full:
                 pass
-    except json.JSONDecodeError:
+    except ValueError: # też JSONDecodeError i UnicodeDecodeError
         entry = {
             "topic": msg.topic,
             "payload_raw": msg.payload.decode(errors="replace"),
@@ -111,14 +120,92 @@ def on_message(client, userdata, msg):
     except Exception as e:
         print("Błąd w on_message:", e)
 
+# -------------------------
+# Outbox komend res_seq / reset
+# -------------------------
+# Start sekwencji i reset karuzeli nie mogą zginąć: idą z QoS 1 i czekają w dzienniku na dysku,
+# aż broker potwierdzi je PUBACKiem. Po zerwaniu połączenia paho wysyła je ponownie sam, a komendy
+# niepotwierdzone przed zamknięciem aplikacji można wysłać ponownie po starcie.
+outbox_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "science_outbox.json")
+outbox_pending = {} # id komendy -> payload, to samo co w dzienniku
+outbox_inflight = {} # mid z paho -> id komendy
+outbox_acks = queue.Queue() # mid potwierdzonych wiadomości, z wątku sieciowego paho
+outbox_next_id = 1
+
+def save_outbox():
+    # Zapis przez plik tymczasowy, żeby awaria w trakcie nie zostawiła uciętego dziennika
+    tmp_path = outbox_path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(outbox_pending, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, outbox_path)
+    except OSError as e:
+        print("❗ Nie udało się zapisać dziennika outboxa:", e)
+
+def load_outbox():
+    try:
+        with open(outbox_path, encoding="utf-8") as f:
+            return {int(command_id): payload for command_id, payload in json.load(f).items()}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print("❗ Nie udało się odczytać dziennika outboxa:", e)
+        return {}
+
+def send_durable(command_id, payload):
+    # Bez połączenia paho trzyma wiadomość QoS 1 u siebie i wysyła ją po połączeniu
+    outbox_inflight[client.publish(topic_inbound, payload, qos=1).mid] = command_id
+
+def publish_durable(payload):
+    global outbox_next_id
+    command_id = outbox_next_id
+    outbox_next_id += 1
+    outbox_pending[command_id] = payload
+    save_outbox()
+    send_durable(command_id, payload)
+
+def on_publish(client, userdata, mid):
+    # Paho woła to z własną blokadą, więc tylko przekazujemy mid do pętli Tk
+    outbox_acks.put(mid)
+
+def check_outbox():
+    # Działa w pętli Tk, tak jak wysyłanie komend, więc outbox nie potrzebuje blokad
+    acked = False
+    while not outbox_acks.empty():
+        command_id = outbox_inflight.pop(outbox_acks.get_nowait(), None)
+        if command_id is not None: # QoS 0 też wywołuje on_publish
+            print("[MQTT ACK]", topic_inbound, outbox_pending.pop(command_id))
+            acked = True
+    if acked:
+        save_outbox()
+    root.after(500, check_outbox)
+
+def recover_outbox():
+    global outbox_next_id
+    recovered = load_outbox()
+    if not recovered:
+        return
+    commands = "\n".join(recovered.values())
+    if messagebox.askyesno("Niepotwierdzone komendy",
+                           f"Broker nie potwierdził tych komend przed zamknięciem aplikacji:\n{commands}\n\nWysłać je ponownie?"):
+        outbox_pending.update(recovered)
+        outbox_next_id = max(recovered) + 1
+        for command_id, payload in recovered.items():
+            send_durable(command_id, payload)
+    else:
+        save_outbox()
+
 # -------------------------
 # Inicjalizacja klienta MQTT
 # -------------------------
-client = mqtt.Client()
+client = mqtt.Client(protocol=mqtt.MQTTv5) # v5, żeby widzieć content type wiadomości
 client.username_pw_set(username, password)
 client.on_connect = on_connect
 client.on_message = on_message
 client.on_subscribe = on_subscribe
+client.on_publish = on_publish
 
 client.connect(broker_address, broker_port, keepalive=60)
 client.loop_start()
@@ -139,7 +226,10 @@ def publish_science_command(drill=0, elev=0, conv=0, res_seq=0, rotate = 0, rese
         }
     }
     payload = compact_json(cmd)
-    client.publish(topic_inbound, payload)
+    if res_seq or reset:
+        publish_durable(payload)
+    else:
+        client.publish(topic_inbound, payload)
     print("[MQTT PUB]", topic_inbound, payload)
 
 # -------------------------
@@ -163,6 +253,8 @@ style.configure("TLabelframe.Label", background="#2a2a2a", foreground="white")
 # ---------- Zamknięcie i cleanup ----------
 def on_close():
     print("Zamykanie aplikacji... rozłączanie MQTT")
+    if outbox_pending:
+        print(f"Niepotwierdzone komendy ({len(outbox_pending)}) zostają w dzienniku:", outbox_path)
     try:
         client.loop_stop()
         client.disconnect()
@@ -688,6 +780,8 @@ def gui_update_from_queue():
 
     root.after(1000, gui_update_from_queue)
 root.after(1000, gui_update_from_queue)
+recover_outbox()
+root.after(500, check_outbox)
 
 
 
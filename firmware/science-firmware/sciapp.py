@@ -2,7 +2,7 @@ import paho.mqtt.client as mqtt
 import json
 
 # Funkcja wywoływana po połączeniu z brokerem
-def on_connect(client, userdata, flags, rc):
+def on_connect(client, userdata, flags, rc, properties=None):
     print("✅ Połączono z brokerem MQTT (kod:", rc, ")")
     # Subskrybujemy oba tematy
     print(client.is_connected())
@@ -12,16 +12,24 @@ def on_connect(client, userdata, flags, rc):
     #client.subscribe("chassis_output")  # Upewnij się, że to poprawny temat
 
 # Funkcja wywoływana przy każdej odebranej wiadomości
-def on_subscribe(client, userdata, mid, reason_code_list):
+def on_subscribe(client, userdata, mid, reason_code_list, properties=None):
     # Since we subscribed only for a single channel, reason_code_list contains
     # a single entry
     print(f"Broker state subscription: {reason_code_list}")
    
         
+def content_type_of(msg):
+    # Format payloadu z content type (MQTT v5). Bez niego to JSON, a binarne formaty aplikacji webowej
+    # (MessagePack/CBOR) konsola pomija, bo czyta tylko JSON
+    return getattr(getattr(msg, "properties", None), "ContentType", None)
+
 def on_message(client, userdata, msg):
+    content_type = content_type_of(msg)
+    if content_type not in (None, "application/json"):
+        print(f"\n Pominięto wiadomość z tematu {msg.topic} w formacie {content_type}")
+        return
     try:
-        payload_str = msg.payload.decode()
-        message = json.loads(payload_str)
+        message = json.loads(msg.payload)
 
         event_type = message.get("eventType", "Brak eventType")
         payload = message.get("payload", {})
@@ -33,9 +41,9 @@ def on_message(client, userdata, msg):
         for key, value in payload.items():
             print(f"  - {key}: {value}")
     
-    except json.JSONDecodeError:
-        print(f" Błąd dekodowania JSON w wiadomości z tematu {msg.topic}")
-        print("Treść wiadomości:", msg.payload.decode())
+    except ValueError as e:
+        print(f" Błąd dekodowania JSON w wiadomości z tematu {msg.topic}: {e}")
+        print("Treść wiadomości:", msg.payload.decode(errors="replace"))
     except Exception as e:
         print(f" Wystąpił błąd podczas przetwarzania wiadomości: {e}")
 
@@ -43,7 +51,7 @@ def on_message(client, userdata, msg):
 broker_address = "192.168.11.11"
 broker_port = 1883
 
-client = mqtt.Client()
+client = mqtt.Client(protocol=mqtt.MQTTv5) # v5, żeby widzieć content type wiadomości
 client.on_connect = on_connect
 client.on_message = on_message
 client.on_subscribe = on_subscribe
@@ -17,12 +17,61 @@ def setup_logging():
 
 # MQTT Configuration
 MQTT_BROKER_URL = os.environ.get("MQTT_BROKER_URL", "localhost")
-MQTT_BROKER_PORT = int(os.environ.get("MQTT_BROKER_PORT", 9001))
+# "websockets" goes through the broker's WebSocket listener, "tcp" skips the framing when the broker is on the LAN
+MQTT_TRANSPORT = os.environ.get("MQTT_TRANSPORT", "websockets").lower()
+MQTT_BROKER_PORT = int(os.environ.get("MQTT_BROKER_PORT", 1883 if MQTT_TRANSPORT == "tcp" else 9001))
+# Hot-standby brokers as a comma separated host[:port] list in order of preference, the port defaults to
+# MQTT_BROKER_PORT. Every broker gets its own connection, so losing the active one only means switching over.
+MQTT_BROKERS = [(host, int(port) if port else MQTT_BROKER_PORT) for host, _, port in
+                (entry.strip().partition(':') for entry in os.environ.get("MQTT_BROKERS", MQTT_BROKER_URL).split(',') if entry.strip())]
+# A broker that stops answering is given up after 1.5 keepalive intervals, a crashed one is noticed right away
+MQTT_KEEPALIVE = int(os.environ.get("MQTT_KEEPALIVE", 60)) # seconds
+# "thread" runs paho's network loop in its own thread, "asyncio" runs it on the NiceGUI event loop
+MQTT_BACKEND = os.environ.get("MQTT_BACKEND", "thread").lower()
 MQTT_PROTOCOL_VERSION = 5
 MQTT_RECONNECT_INTERVAL = 5 # seconds
 MQTT_CLIENT_ID_PREFIX = "ground-control-web-app-"
 MQTT_USERNAME = os.environ.get("MQTT_USERNAME", "user")
 MQTT_PASSWORD = os.environ.get("MQTT_PASSWORD", "user")
+MQTT_PUBLISH_RATE_HZ = int(os.environ.get("MQTT_PUBLISH_RATE_HZ", 50))
+# Encoding of published commands, "json" (what the rover services read), "msgpack" or "cbor". Binary payloads
+# carry an MQTT v5 content type, incoming messages are decoded by theirs.
+MQTT_PAYLOAD_FORMAT = os.environ.get("MQTT_PAYLOAD_FORMAT", "json").lower()
+MQTT_PAYLOAD_FORMATS = {} # topic filter to format for topics that differ from MQTT_PAYLOAD_FORMAT, the first match wins
+# Keep only the newest command per topic instead of queuing every single one
+MQTT_PUBLISH_COALESCE = os.environ.get("MQTT_PUBLISH_COALESCE", "true").lower() == "true"
+# Incoming telemetry is merged so each topic refreshes the UI at most once per frame
+UI_FRAME_RATE_HZ = int(os.environ.get("UI_FRAME_RATE_HZ", 30))
+# Pending messages per subscriber before its overflow policy kicks in
+SUBSCRIBER_QUEUE_SIZE = int(os.environ.get("SUBSCRIBER_QUEUE_SIZE", 100))
+
+# USB controllers are probed by the browser at this rate, changes are sent to the app as binary delta frames
+GAMEPAD_POLL_HZ = int(os.environ.get("GAMEPAD_POLL_HZ", 20))
+# Gamepad input shaping: axis values inside the deadband read as 0, the rest is rounded to the
+# quantization step, so analog noise doesn't turn an idle controller into a stream of "new" commands
+GAMEPAD_DEADBAND = float(os.environ.get("GAMEPAD_DEADBAND", 0.05))
+GAMEPAD_QUANTIZATION = float(os.environ.get("GAMEPAD_QUANTIZATION", 0.02))
+GAMEPAD_AXIS_SHAPING = { # state field: (deadband, quantization step)
+    'left_stick': (GAMEPAD_DEADBAND, GAMEPAD_QUANTIZATION),
+    'rotate': (0.1, GAMEPAD_QUANTIZATION), # twist axis of the Logitech Extreme 3D is noisier
+    'rotate_turret': (GAMEPAD_DEADBAND, GAMEPAD_QUANTIZATION),
+    'flex_forearm': (GAMEPAD_DEADBAND, GAMEPAD_QUANTIZATION),
+    'flex_arm': (GAMEPAD_DEADBAND, GAMEPAD_QUANTIZATION),
+    'flex_gripper': (GAMEPAD_DEADBAND, GAMEPAD_QUANTIZATION),
+    'rotate_gripper': (GAMEPAD_DEADBAND, GAMEPAD_QUANTIZATION),
+    'grip': (GAMEPAD_DEADBAND, GAMEPAD_QUANTIZATION)
+}
+# An unchanged gamepad payload is republished at this interval so the controller sees the link alive
+GAMEPAD_HEARTBEAT_INTERVAL = float(os.environ.get("GAMEPAD_HEARTBEAT_INTERVAL", 1.0)) # seconds
+
+# Stamp commands with seq/sent_at and measure the time until telemetry echoes the seq back
+LATENCY_TRACKING = os.environ.get("LATENCY_TRACKING", "false").lower() == "true"
+LATENCY_WINDOW = int(os.environ.get("LATENCY_WINDOW", 1000)) # samples kept for the rolling percentiles
+
+# Flight recorder: every message on FLIGHT_RECORDER_TOPIC is appended to a log under this directory, empty disables it
+FLIGHT_RECORDER_DIR = os.environ.get("FLIGHT_RECORDER_DIR", "")
+FLIGHT_RECORDER_TOPIC = os.environ.get("FLIGHT_RECORDER_TOPIC", "orion/#")
+FLIGHT_RECORDER_SEGMENT_MB = int(os.environ.get("FLIGHT_RECORDER_SEGMENT_MB", 64))
 
 MQTT_TOPICS = {
     'chassis_output': 'orion/topic/chassis/outbound',
@@ -30,3 +79,18 @@ MQTT_TOPICS = {
     'manipulator_output': 'orion/topic/manipulator/outbound',
     'manipulator_input': 'orion/topic/manipulator/controller/inbound'
 }
+
+# Outbox: what happens to commands while no broker is connected, the first matching topic filter wins.
+# "drop" discards them, "keep_latest" sends the newest one per topic on reconnect (the last one sent if none
+# was held), "durable" journals every command to OUTBOX_DIR until the broker acknowledged it, across reconnects
+# and restarts.
+OUTBOX_POLICIES = {
+    MQTT_TOPICS['chassis_input']: 'keep_latest', # no burst of stale motion, but a stop must not get lost
+    MQTT_TOPICS['manipulator_input']: 'keep_latest',
+    'orion/topic/science/inbound': 'durable' # res_seq and reset, sent by fronttest.py until the science pane does
+}
+OUTBOX_DEFAULT_POLICY = os.environ.get("OUTBOX_DEFAULT_POLICY", "keep_latest").lower()
+# Journal directory for durable commands, one per app instance. Empty keeps them in memory only
+OUTBOX_DIR = os.environ.get("OUTBOX_DIR", "")
+OUTBOX_MAX_PENDING = int(os.environ.get("OUTBOX_MAX_PENDING", 1000)) # unacknowledged durable commands
+OUTBOX_MAX_MB = int(os.environ.get("OUTBOX_MAX_MB", 16)) # journal size
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import socket
+
+import paho.mqtt.client as mqtt
+
+logger = logging.getLogger(__name__)
+
+class AsyncioNetworkLoop:
+    """Runs a paho client's network I/O on an asyncio event loop instead of its own thread.
+
+    The socket is registered with the event loop through paho's socket callbacks,
+    so incoming messages are handled right where the subscribers and the UI live,
+    with no thread switch. Outgoing packets queued during one loop iteration are
+    written together on the next one, and only a full socket buffer makes the loop
+    wait for the socket to become writable.
+
+    Connecting is blocking in paho (TCP connect, WebSocket handshake), so start()
+    does it in a worker thread and keeps reconnecting with a growing delay until
+    stop() is called. Clients that manage the connection themselves can call
+    paho's connect() on the loop instead and skip start().
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, client: mqtt.Client, send_buffer: int = 0):
+        self.loop = loop
+        self.client = client
+        self.send_buffer = send_buffer # SO_SNDBUF in bytes for TCP sockets, 0 keeps the OS default
+        self.fd = None
+        self.misc_task = None
+        self.connection_task = None
+        self.disconnected = asyncio.Event()
+        self._flush_scheduled = False
+        client.on_socket_open = self._on_socket_open
+        client.on_socket_close = self._on_socket_close
+        client.on_socket_register_write = self._on_socket_register_write
+        client.on_socket_unregister_write = self._on_socket_unregister_write
+
+    def _on_loop(self) -> bool:
+        # Socket callbacks run on the loop, except while start() connects in a worker thread
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def _call_soon(self, callback, *args):
+        if self._on_loop():
+            self.loop.call_soon(callback, *args)
+        else:
+            self.loop.call_soon_threadsafe(callback, *args)
+
+    def _on_socket_open(self, client, userdata, sock):
+        if self.send_buffer and isinstance(sock, socket.socket):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.send_buffer)
+        self._call_soon(self._attach, sock.fileno())
+
+    def _on_socket_close(self, client, userdata, sock):
+        if self._on_loop(): # right away, paho closes the socket when this returns
+            self._detach(sock.fileno())
+        else:
+            self.loop.call_soon_threadsafe(self._detach, sock.fileno())
+
+    def _on_socket_register_write(self, client, userdata, sock):
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self._call_soon(self._flush)
+
+    def _on_socket_unregister_write(self, client, userdata, sock):
+        if self._on_loop(): # right away, a deferred removal could cancel a writer added in between
+            self.loop.remove_writer(sock.fileno())
+        else:
+            self.loop.call_soon_threadsafe(self.loop.remove_writer, sock.fileno())
+
+    def _attach(self, fd: int):
+        self.fd = fd
+        self.loop.add_reader(fd, self._read)
+        if self.misc_task is None or self.misc_task.done():
+            self.misc_task = self.loop.create_task(self._misc_loop())
+        if self.client.want_write():
+            self._flush()
+
+    def _detach(self, fd: int):
+        self.loop.remove_reader(fd)
+        self.loop.remove_writer(fd)
+        if fd == self.fd:
+            self.fd = None
+            self.disconnected.set()
+
+    def _read(self):
+        self.client.loop_read()
+        # WebSocket and TLS wrappers may hold more than one packet after a read
+        sock = self.client.socket()
+        while sock is not None and hasattr(sock, 'pending') and sock.pending():
+            self.client.loop_read()
+            sock = self.client.socket()
+
+    def _flush(self):
+        self._flush_scheduled = False
+        if self.fd is None:
+            return # written once the socket is attached
+        self.client.loop_write()
+        if self.client.want_write():
+            self.loop.add_writer(self.fd, self.client.loop_write)
+
+    async def _misc_loop(self):
+        # Keepalive pings and retries, paho expects this about once a second
+        while self.client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
+            await asyncio.sleep(1)
+
+    def start(self, host: str, port: int, keepalive: int = 60, min_delay: float = 1, max_delay: float = 30):
+        """Connects in the background and reconnects whenever the connection drops."""
+        self.client.connect_async(host, port, keepalive)
+        self.connection_task = self.loop.create_task(self._connection_loop(min_delay, max_delay))
+
+    async def _connection_loop(self, min_delay: float, max_delay: float):
+        delay = min_delay
+        while True:
+            self.disconnected.clear()
+            try:
+                await asyncio.to_thread(self.client.reconnect)
+                delay = min_delay
+                await self.disconnected.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Could not connect to MQTT Broker: {e}. Retrying in {delay:.0f} s")
+                if self.client.on_connect_fail: # paho's own network thread reports failed attempts the same way
+                    self.client.on_connect_fail(self.client, self.client.user_data_get())
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+    def stop(self):
+        """Stops reconnecting and sends the DISCONNECT right away. Call from the event loop."""
+        if self.connection_task:
+            self.connection_task.cancel()
+            self.connection_task = None
+        self.client.disconnect()
+        if self.fd is not None:
+            self.client.loop_write() # paho closes the socket once the DISCONNECT is out
+        if self.misc_task:
+            self.misc_task.cancel()
@@ -0,0 +1,191 @@
+import bisect
+import collections
+import logging
+import os
+import struct
+import threading
+import time
+
+from app.logic.topic_trie import TopicTrie
+
+logger = logging.getLogger(__name__)
+
+# Segment layout: MAGIC, then records of RECORD_HEADER (wall clock ns, topic length, payload length,
+# content type length) followed by the topic, the MQTT v5 content type (empty when the message had
+# none) and the raw payload. The sidecar .idx file holds INDEX_ENTRY (wall clock ns, segment offset)
+# pairs for every INDEX_INTERVAL-th record, for seeking by time.
+MAGIC = b'OFR2'
+RECORD_HEADER = struct.Struct('<qHIH')
+# Segments written before the content type was recorded, read as messages without one
+MAGIC_V1 = b'OFR1'
+RECORD_HEADER_V1 = struct.Struct('<qHI')
+INDEX_ENTRY = struct.Struct('<qQ')
+INDEX_INTERVAL = 128
+
+def _segment_paths(directory: str, number: int) -> tuple:
+    base = os.path.join(directory, f"segment-{number:06d}")
+    return f"{base}.log", f"{base}.idx"
+
+
+class FlightRecorder:
+    """Append-only flight log of raw MQTT traffic, rotated into fixed size segments.
+
+    ``record`` is meant to be an MqttClient message tap: it runs on the network
+    thread and only timestamps the message and appends it to an in-memory buffer.
+    A writer thread drains the buffer to disk every ``flush_interval``. When the
+    buffer is full, new messages are dropped and counted instead of blocking.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024,
+                 flush_interval: float = 0.2, max_pending: int = 100_000):
+        self.directory = os.path.join(directory, time.strftime('%Y%m%d-%H%M%S'))
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._pending = collections.deque()
+        self._stop = threading.Event()
+        self._thread = None
+        self._segment = None
+        self._index = None
+        self._segment_number = 0
+        self._segment_records = 0
+
+        self.recorded_count = 0
+        self.dropped_count = 0
+        self.written_bytes = 0
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._writer, name='flight-recorder', daemon=True)
+        self._thread.start()
+        logger.info(f"Recording MQTT traffic to {self.directory}")
+
+    def stop(self):
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            logger.info(f"Flight recorder stopped: {self.recorded_count} messages, {self.dropped_count} dropped")
+
+    def record(self, topic: str, payload: bytes, content_type: str = None):
+        if len(self._pending) >= self.max_pending:
+            self.dropped_count += 1
+            return
+        self._pending.append((time.time_ns(), topic, payload, content_type)) # deque appends are thread-safe, no lock taken
+
+    def _open_segment(self):
+        self._close_segment()
+        self._segment_number += 1
+        segment_path, index_path = _segment_paths(self.directory, self._segment_number)
+        self._segment = open(segment_path, 'ab', buffering=1024 * 1024)
+        self._index = open(index_path, 'ab')
+        self._segment.write(MAGIC)
+        self._segment_records = 0
+
+    def _close_segment(self):
+        if self._segment:
+            self._segment.close()
+            self._index.close()
+            self._segment = self._index = None
+
+    def _write_pending(self):
+        while self._pending:
+            timestamp, topic, payload, content_type = self._pending.popleft()
+            if self._segment is None or self._segment.tell() >= self.segment_bytes:
+                self._open_segment()
+            encoded_topic = topic.encode()
+            encoded_content_type = content_type.encode() if content_type else b''
+            if self._segment_records % INDEX_INTERVAL == 0:
+                self._index.write(INDEX_ENTRY.pack(timestamp, self._segment.tell()))
+            self._segment.write(RECORD_HEADER.pack(timestamp, len(encoded_topic), len(payload), len(encoded_content_type)))
+            self._segment.write(encoded_topic)
+            self._segment.write(encoded_content_type)
+            self._segment.write(payload)
+            self._segment_records += 1
+            self.recorded_count += 1
+            self.written_bytes += RECORD_HEADER.size + len(encoded_topic) + len(encoded_content_type) + len(payload)
+        if self._segment:
+            self._segment.flush()
+            self._index.flush()
+
+    def _writer(self):
+        try:
+            while not self._stop.wait(self.flush_interval):
+                self._write_pending()
+            self._write_pending()
+        except OSError as e:
+            logger.error(f"Flight recorder stopped writing to {self.directory}: {e}")
+        finally:
+            self._close_segment()
+
+
+class FlightLog:
+    """Reads a directory written by FlightRecorder."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.segments = sorted(name for name in os.listdir(directory) if name.startswith('segment-') and name.endswith('.log'))
+        if not self.segments:
+            raise FileNotFoundError(f"No flight log segments in {directory}")
+
+    def _index(self, segment: str) -> list:
+        index_path = os.path.join(self.directory, segment[:-len('.log')] + '.idx')
+        if not os.path.exists(index_path):
+            return []
+        with open(index_path, 'rb') as f:
+            data = f.read()
+        usable = len(data) - len(data) % INDEX_ENTRY.size
+        return [entry for entry in INDEX_ENTRY.iter_unpack(data[:usable])]
+
+    def first_timestamp(self) -> int:
+        for _, _, timestamp, _ in self.records():
+            return timestamp
+        return None
+
+    def records(self, start_ns: int = None, end_ns: int = None, topic_filters: list = None):
+        """Yields (topic, payload, wall clock ns, content type or None) in recording order.
+
+        Segments that end before ``start_ns`` are skipped and the index is used to
+        seek close to it. A record cut short by a crash ends the log.
+        """
+        matcher = None
+        if topic_filters:
+            matcher = TopicTrie()
+            for topic_filter in topic_filters:
+                matcher.add(topic_filter, True)
+
+        for number, segment in enumerate(self.segments):
+            index = self._index(segment)
+            offset = len(MAGIC)
+            if start_ns is not None and index:
+                next_index = self._index(self.segments[number + 1]) if number + 1 < len(self.segments) else []
+                if next_index and next_index[0][0] <= start_ns:
+                    continue # The whole segment is older than the start
+                position = bisect.bisect_right([timestamp for timestamp, _ in index], start_ns) - 1
+                offset = index[position][1] if position >= 0 else offset
+
+            with open(os.path.join(self.directory, segment), 'rb') as f:
+                magic = f.read(len(MAGIC))
+                if magic not in (MAGIC, MAGIC_V1):
+                    raise ValueError(f"{segment} is not a flight log segment")
+                record_header = RECORD_HEADER if magic == MAGIC else RECORD_HEADER_V1
+                f.seek(offset)
+                while header := f.read(record_header.size):
+                    if len(header) < record_header.size:
+                        return
+                    timestamp, topic_length, payload_length, *content_type_length = record_header.unpack(header)
+                    content_type_length = content_type_length[0] if content_type_length else 0
+                    body = f.read(topic_length + content_type_length + payload_length)
+                    if len(body) < topic_length + content_type_length + payload_length:
+                        return
+                    if end_ns is not None and timestamp > end_ns:
+                        return
+                    if start_ns is not None and timestamp < start_ns:
+                        continue
+                    topic = body[:topic_length].decode()
+                    if matcher and not matcher.match(topic):
+                        continue
+                    content_type = body[topic_length:topic_length + content_type_length].decode() or None
+                    yield topic, body[topic_length + content_type_length:], timestamp, content_type
@@ -1,59 +1,89 @@
 import logging
+import time
 from app.state import ChassisState, ManipulatorState
 from app.logic.mqtt_client import MqttClient
-from app.config import MQTT_TOPICS
+from app.logic.gamepad_codec import GamepadDecoder, GamepadDecodeError
+from app.config import (
+    MQTT_TOPICS,
+    GAMEPAD_DEADBAND,
+    GAMEPAD_QUANTIZATION,
+    GAMEPAD_AXIS_SHAPING,
+    GAMEPAD_HEARTBEAT_INTERVAL
+)
 
 logger = logging.getLogger(__name__)
 
+def shape_axis(value, field: str) -> float:
+    """Applies the field's deadband and quantization to a raw axis value."""
+    deadband, step = GAMEPAD_AXIS_SHAPING.get(field, (GAMEPAD_DEADBAND, GAMEPAD_QUANTIZATION))
+    value = float(value)
+    if abs(value) < deadband:
+        return 0.0
+    return round(round(value / step) * step, 4) + 0.0 # + 0.0 turns -0.0 into 0.0
+
+def publish_if_changed(state, topic: str, mqtt_client: MqttClient, priority: bool = False):
+    """Publishes the state only when its payload changed or the heartbeat interval elapsed."""
+    payload = state.get_payload()
+    now = time.monotonic()
+    if payload == state.last_gamepad_payload and now - state.last_gamepad_publish < GAMEPAD_HEARTBEAT_INTERVAL:
+        return
+    state.last_gamepad_payload = payload
+    state.last_gamepad_publish = now
+    mqtt_client.publish(topic, payload, priority=priority)
+
 def process_chassis_gamepad(gamepad, state: ChassisState, mqtt_client: MqttClient):
     """Processes gamepad data for the chassis."""
-    state.left_stick = [float(gamepad['axes'][0]), float(gamepad['axes'][1])]
-    state.rotate = float(gamepad['axes'][2])
+    was_moving = any(state.left_stick) or state.rotate != 0
+    state.left_stick = [shape_axis(gamepad['axes'][0], 'left_stick'), shape_axis(gamepad['axes'][1], 'left_stick')]
+    state.rotate = shape_axis(gamepad['axes'][2], 'rotate')
     state.button_x = gamepad['buttons'][0]
     state.button_y = gamepad['buttons'][1]
     state.button_a = gamepad['buttons'][2]
     state.button_b = gamepad['buttons'][3]
 
-    mqtt_client.publish(MQTT_TOPICS['chassis_input'], state.get_payload())
+    # Returning the stick to zero is a stop command and must not wait behind motion
+    stopped = was_moving and not any(state.left_stick) and state.rotate == 0
+    publish_if_changed(state, MQTT_TOPICS['chassis_input'], mqtt_client, priority=stopped)
 
 def process_manipulator_gamepad(gamepad, state: ManipulatorState, mqtt_client: MqttClient):
     """Processes gamepad data for the manipulator."""
-    state.rotate_gripper = float(gamepad['axes'][0])
-    state.flex_gripper = float(gamepad['axes'][1])
-    state.rotate_turret = -float(gamepad['values'][6]) if not gamepad['buttons'][7] else float(gamepad['values'][7])
-    state.flex_arm = float(gamepad['axes'][2])
-    state.flex_forearm = float(gamepad['axes'][3])
-    state.grip = -float(gamepad['values'][4]) if gamepad['buttons'][4] else float(gamepad['values'][5])
+    state.rotate_gripper = shape_axis(gamepad['axes'][0], 'rotate_gripper')
+    state.flex_gripper = shape_axis(gamepad['axes'][1], 'flex_gripper')
+    state.rotate_turret = -shape_axis(gamepad['values'][6], 'rotate_turret') if not gamepad['buttons'][7] else shape_axis(gamepad['values'][7], 'rotate_turret')
+    state.flex_arm = shape_axis(gamepad['axes'][2], 'flex_arm')
+    state.flex_forearm = shape_axis(gamepad['axes'][3], 'flex_forearm')
+    state.grip = -shape_axis(gamepad['values'][4], 'grip') if gamepad['buttons'][4] else shape_axis(gamepad['values'][5], 'grip')
     state.button_x = gamepad['buttons'][2]
     state.button_y = gamepad['buttons'][3]
     state.button_a = gamepad['buttons'][0]
     state.button_b = gamepad['buttons'][1]
 
-    mqtt_client.publish(MQTT_TOPICS['manipulator_input'], state.get_payload())
-
-def process_gamepad_data(event, chassis_state: ChassisState, manipulator_state: ManipulatorState, mqtt_client: MqttClient):
-    try:
-        gamepad_data_js = event.args
-
-        if not gamepad_data_js:
-            chassis_state.gamepad_active = False
-            manipulator_state.gamepad_active = False
-            return
+    publish_if_changed(state, MQTT_TOPICS['manipulator_input'], mqtt_client)
 
-        chassis_state.gamepad_active = False
-        manipulator_state.gamepad_active = False
+def process_gamepads(gamepads: list, chassis_state: ChassisState, manipulator_state: ManipulatorState, mqtt_client: MqttClient):
+    """Routes every connected gamepad to the chassis or the manipulator."""
+    chassis_state.gamepad_active = False
+    manipulator_state.gamepad_active = False
 
-        for gamepad in gamepad_data_js:
-            gamepad_id = gamepad.get('id', '').lower()
-            if 'logitech extreme 3d' in gamepad_id:
-                chassis_state.gamepad_active = True
-                process_chassis_gamepad(gamepad, chassis_state, mqtt_client)
-            elif 'xbox' in gamepad_id or 'microsoft' in gamepad_id or 'rumblepad':
-                manipulator_state.gamepad_active = True
-                process_manipulator_gamepad(gamepad, manipulator_state, mqtt_client)
+    for gamepad in gamepads:
+        gamepad_id = gamepad.get('id', '').lower()
+        if 'logitech extreme 3d' in gamepad_id:
+            chassis_state.gamepad_active = True
+            process_chassis_gamepad(gamepad, chassis_state, mqtt_client)
+        elif 'xbox' in gamepad_id or 'microsoft' in gamepad_id or 'rumblepad':
+            manipulator_state.gamepad_active = True
+            process_manipulator_gamepad(gamepad, manipulator_state, mqtt_client)
 
+def process_gamepad_frames(event, decoder: GamepadDecoder, chassis_state: ChassisState, manipulator_state: ManipulatorState, mqtt_client: MqttClient):
+    """Handles a batch of binary gamepad frames sent by static/gamepad_logic.js."""
+    try:
+        gamepads = decoder.decode(event.args)
+        process_gamepads(gamepads, chassis_state, manipulator_state, mqtt_client)
+    except GamepadDecodeError as e:
+        # The browser re-sends full frames periodically, the state resynchronizes on its own
+        logger.warning(f"Dropping gamepad frames: {e}")
     except Exception as e:
-        logger.error(f"Error in process_gamepad_data: {e}", exc_info=True)
+        logger.error(f"Error in process_gamepad_frames: {e}", exc_info=True)
 
 def setup_gamepad_listener(chassis_state: ChassisState, manipulator_state: ManipulatorState, mqtt_client: MqttClient):
     pass
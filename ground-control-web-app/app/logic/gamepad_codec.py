@@ -0,0 +1,109 @@
+import base64
+import struct
+
+# Binary gamepad frames sent by static/gamepad_logic.js, all little-endian:
+#
+#   u8 version, u8 flags, u8 index, u8 axis count, u8 button count
+#   [FULL only] u8 id length, id as UTF-8
+#   u32 pressed buttons bitmask
+#   u32 changed axes bitmask,   f32 per changed axis
+#   u32 changed values bitmask, f32 per changed button value
+#
+# A FULL frame carries every axis and value, delta frames only what changed since
+# the previous frame. A REMOVED frame ends after the header.
+FRAME_VERSION = 1
+FLAG_FULL = 0x01
+FLAG_REMOVED = 0x02
+
+_HEADER = struct.Struct('<BBBBB')
+_MASK = struct.Struct('<I')
+
+
+class GamepadDecodeError(ValueError):
+    pass
+
+
+def _read_masked_floats(frame: bytes, offset: int, target: list):
+    (mask,), offset = _MASK.unpack_from(frame, offset), offset + _MASK.size
+    indices = [bit for bit in range(32) if mask >> bit & 1]
+    values = struct.unpack_from(f'<{len(indices)}f', frame, offset)
+    for bit, value in zip(indices, values):
+        if bit < len(target):
+            target[bit] = value
+    return offset + 4 * len(indices)
+
+
+class GamepadDecoder:
+    """Rebuilds the state of every connected gamepad from binary delta frames.
+
+    One decoder belongs to one browser session. The decoded gamepads have the same
+    shape as the former JSON event (id, index, axes, buttons, values), with floats
+    and booleans instead of strings.
+    """
+
+    def __init__(self):
+        self.gamepads = {}
+
+    def decode(self, data: str) -> list:
+        """Applies a base64 encoded batch of frames and returns all known gamepads."""
+        try:
+            self._apply(base64.b64decode(data))
+        except (struct.error, IndexError, UnicodeDecodeError, ValueError) as e:
+            raise GamepadDecodeError(f"Malformed gamepad frame: {e}") from e
+        return list(self.gamepads.values())
+
+    def _apply(self, frames: bytes):
+        offset = 0
+        while offset < len(frames):
+            version, flags, index, axis_count, button_count = _HEADER.unpack_from(frames, offset)
+            offset += _HEADER.size
+            if version != FRAME_VERSION:
+                raise GamepadDecodeError(f"Unsupported gamepad frame version {version}")
+
+            if flags & FLAG_REMOVED:
+                self.gamepads.pop(index, None)
+                continue
+
+            gamepad = self.gamepads.get(index)
+            if flags & FLAG_FULL:
+                id_length = frames[offset]
+                gamepad_id = frames[offset + 1:offset + 1 + id_length].decode()
+                offset += 1 + id_length
+                gamepad = self.gamepads[index] = {
+                    'id': gamepad_id,
+                    'index': index,
+                    'axes': [0.0] * axis_count,
+                    'buttons': [False] * button_count,
+                    'values': [0.0] * button_count
+                }
+            elif gamepad is None:
+                raise GamepadDecodeError(f"Delta frame for unknown gamepad {index}")
+
+            (pressed,), offset = _MASK.unpack_from(frames, offset), offset + _MASK.size
+            gamepad['buttons'] = [bool(pressed >> bit & 1) for bit in range(button_count)]
+            offset = _read_masked_floats(frames, offset, gamepad['axes'])
+            offset = _read_masked_floats(frames, offset, gamepad['values'])
+
+
+def encode_frame(gamepad: dict, previous: dict = None) -> bytes:
+    """Encodes a gamepad like the browser does, as a delta against previous if given.
+
+    Used by benchmarks and simulators that need to produce browser frames.
+    """
+    axes, values = gamepad['axes'], gamepad['values']
+    flags = 0 if previous else FLAG_FULL
+    frame = bytearray(_HEADER.pack(FRAME_VERSION, flags, gamepad['index'], len(axes), len(values)))
+    if not previous:
+        gamepad_id = gamepad['id'].encode()[:255]
+        frame += bytes([len(gamepad_id)]) + gamepad_id
+    pressed = sum(1 << bit for bit, button in enumerate(gamepad['buttons']) if button)
+    frame += _MASK.pack(pressed)
+    for current, last in ((axes, previous and previous['axes']), (values, previous and previous['values'])):
+        changed = [bit for bit, value in enumerate(current) if not last or abs(value - last[bit]) > 1e-4]
+        frame += _MASK.pack(sum(1 << bit for bit in changed))
+        frame += struct.pack(f'<{len(changed)}f', *(current[bit] for bit in changed))
+    return bytes(frame)
+
+
+def encode_batch(frames: list) -> str:
+    return base64.b64encode(b''.join(frames)).decode()
@@ -0,0 +1,98 @@
+import collections
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 20, 50, 100, 200, 500, 1000, 2000, float('inf'))
+
+class LatencyTracker:
+    """Measures command-to-telemetry latency with sequence numbers.
+
+    ``topics`` maps each command topic to the telemetry topic that echoes it.
+    Commands on those topics are stamped with ``seq`` and ``sent_at`` (milliseconds
+    since the epoch) as they go on the wire. Telemetry that echoes the ``seq`` back,
+    at the top level or inside its payload, closes the measurement. The latest
+    ``window`` samples are kept for rolling percentiles and a histogram.
+    """
+
+    def __init__(self, topics: dict, window: int = 1000, max_pending: int = 1000):
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+        self._echoes = {telemetry_topic: command_topic for command_topic, telemetry_topic in topics.items()}
+        self._pending = {command_topic: collections.OrderedDict() for command_topic in topics} # seq to monotonic send time
+        self.max_pending = max_pending
+        self.samples = collections.deque(maxlen=window)
+        self.matched_count = 0
+        self.unmatched_count = 0
+
+    def stamp(self, topic: str, command: dict) -> dict:
+        """Returns a stamped copy of a command about to be sent, or the command itself on other topics."""
+        pending = self._pending.get(topic)
+        if pending is None:
+            return command
+        seq = next(self._seq)
+        command = {**command, 'seq': seq, 'sent_at': int(time.time() * 1000)}
+        with self._lock:
+            pending[seq] = time.monotonic()
+            if len(pending) > self.max_pending:
+                pending.popitem(last=False)
+        return command
+
+    def observe(self, topic: str, telemetry: dict):
+        """Subscriber callback for the telemetry topics."""
+        seq = telemetry.get('seq')
+        if seq is None and isinstance(telemetry.get('payload'), dict):
+            seq = telemetry['payload'].get('seq')
+        pending = self._pending.get(self._echoes.get(topic))
+        if seq is None or pending is None:
+            return
+
+        with self._lock:
+            sent = pending.pop(seq, None)
+            if sent is None:
+                self.unmatched_count += 1
+                return
+            # Older commands on the same topic were superseded and will never be echoed
+            while pending and next(iter(pending)) < seq:
+                pending.popitem(last=False)
+            self.samples.append((time.monotonic() - sent) * 1000)
+            self.matched_count += 1
+
+    def percentiles(self) -> dict:
+        with self._lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return {}
+        pick = lambda fraction: ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+        return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99)}
+
+    def histogram(self) -> list:
+        with self._lock:
+            samples = list(self.samples)
+        counts = [0] * len(LATENCY_BUCKETS_MS)
+        for sample in samples:
+            counts[next(i for i, bound in enumerate(LATENCY_BUCKETS_MS) if sample <= bound)] += 1
+        return [{"le_ms": bound, "count": count} for bound, count in zip(LATENCY_BUCKETS_MS, counts)]
+
+    def export(self) -> dict:
+        """Machine-readable snapshot of the rolling window."""
+        histogram = self.histogram()
+        histogram[-1]["le_ms"] = "inf" # JSON has no infinity
+        return {
+            "window": len(self.samples),
+            "matched": self.matched_count,
+            "unmatched": self.unmatched_count,
+            "percentiles_ms": self.percentiles(),
+            "histogram": histogram
+        }
+
+    def summary(self) -> str:
+        percentiles = self.percentiles()
+        if not percentiles:
+            return "Latency: no echoed telemetry yet"
+        return (f"Latency p50 {percentiles['p50']:.1f} ms, p95 {percentiles['p95']:.1f} ms, "
+                f"p99 {percentiles['p99']:.1f} ms ({len(self.samples)} samples)")
@@ -0,0 +1,137 @@
+import bisect
+import threading
+
+# Prometheus text exposition format, see https://prometheus.io/docs/instrumenting/exposition_formats/
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Default histogram buckets in seconds, fine grained at the low end where the hot path lives
+DEFAULT_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter. Increments are a lock-free add, cheap enough for the hot path."""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+
+    def inc(self, *labelvalues, amount: float = 1):
+        # Racing increments from the paho thread and the event loop may lose a count, never crash
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def collect(self) -> list:
+        return [(self.name, dict(zip(self.labelnames, labelvalues)), value)
+                for labelvalues, value in list(self._values.items())]
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets."""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {} # label values to [bucket counts..., sum]
+
+    def observe(self, value: float, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def collect(self) -> list:
+        with self._lock:
+            snapshot = {labelvalues: list(series) for labelvalues, series in self._series.items()}
+        samples = []
+        for labelvalues, series in snapshot.items():
+            labels = dict(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                samples.append((f'{self.name}_bucket', {**labels, 'le': _format_value(float(bound))}, cumulative))
+            samples.append((f'{self.name}_sum', labels, series[-1]))
+            samples.append((f'{self.name}_count', labels, cumulative))
+        return samples
+
+
+class Gauge:
+    """Value read from a callback at scrape time, so it costs nothing in between.
+
+    The callback returns a number, or a list of (label values, number) pairs
+    when the gauge has labels.
+    """
+
+    def __init__(self, name: str, documentation: str, callback, labelnames: tuple = (), metric_type: str = 'gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labelnames = labelnames
+        self.metric_type = metric_type
+
+    def collect(self) -> list:
+        value = self.callback()
+        if not self.labelnames:
+            return [(self.name, {}, value)]
+        return [(self.name, dict(zip(self.labelnames, labelvalues)), sample) for labelvalues, sample in value]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, callback, labelnames: tuple = (), metric_type: str = 'gauge') -> Gauge:
+        return self.register(Gauge(name, documentation, callback, labelnames, metric_type))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            metric_type = getattr(metric, 'metric_type', type(metric).__name__.lower())
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric_type}')
+            for name, labels, value in metric.collect():
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry served by the /metrics route
+REGISTRY = Registry()
+
+MQTT_PUBLISHED = REGISTRY.counter('ground_control_mqtt_published_total', 'Commands put on the wire.', ('lane',))
+MQTT_RECEIVED = REGISTRY.counter('ground_control_mqtt_received_total', 'Messages received from the broker that matched a subscription.')
+MQTT_CONNECTS = REGISTRY.counter('ground_control_mqtt_connects_total', 'Successful (re)connections to the broker.')
+MQTT_DISCONNECTS = REGISTRY.counter('ground_control_mqtt_disconnects_total', 'Connections to the broker that were lost.')
+MQTT_FAILOVERS = REGISTRY.counter('ground_control_mqtt_failovers_total', 'Switches from a lost broker to a standby one.')
+MQTT_FAILOVER = REGISTRY.histogram('ground_control_mqtt_failover_seconds', 'Time from losing the active broker until the standby is subscribed.',
+                                   buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+MQTT_PUBLISHER_SLEEP = REGISTRY.histogram('ground_control_mqtt_publisher_sleep_seconds', 'Time the publisher task slept to honour the publish rate.')
+MQTT_ENCODE = REGISTRY.histogram('ground_control_mqtt_payload_encode_seconds', 'Payload encoding time of outgoing commands.')
+MQTT_DECODE = REGISTRY.histogram('ground_control_mqtt_payload_decode_seconds', 'Payload decoding time of incoming messages.')
+MQTT_CALLBACK = REGISTRY.histogram('ground_control_mqtt_callback_seconds', 'Time spent in subscriber callbacks.', ('topic_filter',))
@@ -1,92 +1,369 @@
 import paho.mqtt.client as mqtt
-import json
 import time
 import logging
 import asyncio
-from urllib.parse import urlparse
+import threading
 
 from app.config import (
-    MQTT_BROKER_URL,
-    MQTT_BROKER_PORT,
-    MQTT_PROTOCOL_VERSION,
+    MQTT_BROKERS,
+    MQTT_KEEPALIVE,
+    MQTT_TRANSPORT,
+    MQTT_BACKEND,
     MQTT_RECONNECT_INTERVAL,
     MQTT_CLIENT_ID_PREFIX,
     MQTT_USERNAME,
     MQTT_PASSWORD,
-    MQTT_TOPICS
+    MQTT_PUBLISH_RATE_HZ,
+    MQTT_PUBLISH_COALESCE,
+    MQTT_PAYLOAD_FORMAT,
+    MQTT_PAYLOAD_FORMATS,
+    UI_FRAME_RATE_HZ,
+    SUBSCRIBER_QUEUE_SIZE,
+    OUTBOX_POLICIES,
+    OUTBOX_DEFAULT_POLICY,
+    OUTBOX_DIR,
+    OUTBOX_MAX_PENDING,
+    OUTBOX_MAX_MB
+)
+from app.logic import payload_codec
+from app.logic.asyncio_mqtt import AsyncioNetworkLoop
+from app.logic.outbox import Outbox
+from app.logic.subscriber import Subscriber
+from app.logic.topic_trie import TopicTrie
+from app.logic.metrics import (
+    MQTT_PUBLISHED,
+    MQTT_RECEIVED,
+    MQTT_CONNECTS,
+    MQTT_DISCONNECTS,
+    MQTT_FAILOVERS,
+    MQTT_FAILOVER,
+    MQTT_PUBLISHER_SLEEP,
+    MQTT_ENCODE,
+    MQTT_DECODE
 )
 
 logger = logging.getLogger(__name__)
 
 class MqttClient:
-    _QUALITY_OF_SERVICE = 1 # At least once
+    _QUALITY_OF_SERVICE = 1 # At least once, for subscriptions and durable commands
+    # Commands on drop and keep_latest topics: the outbox owns them across disconnects, so paho must not
+    # keep them for a lost connection and replay seconds of stale motion on reconnect
+    _COMMAND_QUALITY_OF_SERVICE = 0
+    BACKENDS = ('thread', 'asyncio')
+    TRANSPORTS = ('websockets', 'tcp')
     
-    def __init__(self):
+    def __init__(self, backend: str = MQTT_BACKEND, transport: str = MQTT_TRANSPORT, brokers: list = MQTT_BROKERS,
+                 outbox: Outbox = None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown MQTT backend '{backend}', expected one of {self.BACKENDS}")
+        if transport not in self.TRANSPORTS:
+            raise ValueError(f"Unknown MQTT transport '{transport}', expected one of {self.TRANSPORTS}")
+        if not brokers:
+            raise ValueError("At least one MQTT broker is needed")
+        self.backend = backend
+        self.transport = transport
+        self.network_loops = [] # AsyncioNetworkLoop per connection with the asyncio backend, created with the event loop
         self.client_id = f"{MQTT_CLIENT_ID_PREFIX}{int(time.time())}"
-        self.client = mqtt.Client(client_id=self.client_id, protocol=mqtt.MQTTv5, transport='websockets')
-        self.client.username_pw_set(MQTT_USERNAME, MQTT_PASSWORD)
-        self.client.on_connect = self._on_connect
-        self.client.on_disconnect = self._on_disconnect
-        self.client.on_message = self._on_message
-        self.client.reconnect_delay_set(min_delay=1, max_delay=MQTT_RECONNECT_INTERVAL)
-        self.message_callbacks = {}
+
+        # Hot standby: one connection per broker, only the active one (self.client) is subscribed
+        # and publishes. The others stay connected so a failover needs no reconnect.
+        self.brokers = list(brokers) # (host, port), in order of preference
+        self.connections = [self._create_connection(index) for index in range(len(self.brokers))]
+        self.client = self.connections[0]
+        self._failover_lock = threading.Lock()
+        self._failover_pending = None # (SUBSCRIBE mid, lost_at, from broker, to broker) until the SUBACK arrives
+        self.lost_at = None # monotonic time the active connection was lost without a standby to take over
+        self.failover_count = 0
+        self.last_failover = None
+        self.closing = False # set by disconnect(), nothing fails over on the way out
+
+        self.message_callbacks = TopicTrie() # Topic filters (wildcards included) to Subscriber objects
+        self.subscribers = {} # (topic filter, callback) to Subscriber
+        self.message_taps = TopicTrie() # Topic filters to raw taps called on the network thread
 
         self.publish_queue = asyncio.Queue()
         self.publish_task = None
         self.last_publish_time = 0.0
-        self.publish_interval = 1/50 # 50Hz
+        self.publish_interval = 1/MQTT_PUBLISH_RATE_HZ
         self.loop = None # To store the NiceGUI event loop
 
+        # Coalescing mode: only the newest payload per topic waits for the publisher
+        self.coalesce = MQTT_PUBLISH_COALESCE
+        self.pending_payloads = {}
+        self.pending_event = asyncio.Event()
+        self.superseded_count = 0
+        self.priority_count = 0
+
+        # Content type per published topic, see payload_codec
+        self.payload_format = payload_codec.normalize(MQTT_PAYLOAD_FORMAT)
+        self.payload_formats = {topic_filter: payload_codec.normalize(name) for topic_filter, name in MQTT_PAYLOAD_FORMATS.items()}
+        for content_type in (self.payload_format, *self.payload_formats.values()):
+            if content_type not in payload_codec.FORMATS.values():
+                raise ValueError(f"Unknown payload format '{content_type}', expected one of {tuple(payload_codec.FORMATS)}")
+            if not payload_codec.available(content_type):
+                raise ValueError(f"Payload format {content_type} is not available, install msgpack or cbor2")
+        self._publish_properties = {} # topic to (content type, PUBLISH properties)
+
+        # Commands that can't go out while no broker is connected, see Outbox for the per-topic policies
+        self.outbox = outbox or Outbox(OUTBOX_POLICIES, OUTBOX_DEFAULT_POLICY, OUTBOX_DIR,
+                                       max_pending=OUTBOX_MAX_PENDING, max_bytes=OUTBOX_MAX_MB * 1024 * 1024)
+        self._durable_inflight = {} # (connection, mid) to outbox entry id until the PUBACK, used on the event loop only
+        self.latency_tracker = None # Set to stamp commands with seq/sent_at as they go on the wire
+
+    def _create_connection(self, index: int) -> mqtt.Client:
+        client_id = self.client_id if index == 0 else f"{self.client_id}-{index}"
+        client = mqtt.Client(client_id=client_id, protocol=mqtt.MQTTv5, transport=self.transport)
+        client.username_pw_set(MQTT_USERNAME, MQTT_PASSWORD)
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.on_message = self._on_message
+        client.on_subscribe = self._on_subscribe
+        client.on_publish = self._on_publish
+        client.on_connect_fail = self._on_connect_fail
+        client.reconnect_delay_set(min_delay=1, max_delay=MQTT_RECONNECT_INTERVAL)
+        return client
+
+    def _broker_name(self, client) -> str:
+        if client not in self.connections:
+            return 'local'
+        host, port = self.brokers[self.connections.index(client)]
+        return f"{host}:{port}"
+
     def set_event_loop(self, loop):
         self.loop = loop
+        if self.backend == 'asyncio' and not self.network_loops:
+            self.network_loops = [AsyncioNetworkLoop(loop, client) for client in self.connections]
+        for subscriber in self.subscribers.values():
+            subscriber.start(loop)
+
+    def _topic_filters(self) -> set:
+        return set(self.message_callbacks.filters()) | set(self.message_taps.filters())
 
     def _on_connect(self, client, userdata, flags, rc, properties=None):
         if rc == 0:
+            MQTT_CONNECTS.inc()
+            with self._failover_lock:
+                if client is not self.client:
+                    if self.lost_at is None or self.client.is_connected():
+                        logger.info(f"Standby connection to {self._broker_name(client)} is ready")
+                        return
+                    # The active broker is down and this one came up first
+                    self._fail_over(client, self.lost_at)
+                    return
             logger.info("Connected to MQTT Broker!")
             # Re-subscribe to topics after successful reconnection
-            for topic in self.message_callbacks.keys():
-                # Only subscribe if there are active callbacks for the topic
-                if self.message_callbacks[topic]:
-                    self.client.subscribe(topic)
-            if not self.publish_task or self.publish_task.done():
-                if self.loop:
-                    self.publish_task = self.loop.call_soon_threadsafe(asyncio.create_task, self._publisher_task())
-                else:
-                    logger.error("Event loop not set for MQTT client. Cannot start publisher task.")
+            for topic_filter in self._topic_filters():
+                self.client.subscribe(topic_filter, options=mqtt.SubscribeOptions(qos=self._QUALITY_OF_SERVICE))
+            self.lost_at = None
+            if self.loop:
+                self.loop.call_soon_threadsafe(self._start_publisher)
+                self.loop.call_soon_threadsafe(self._flush_outbox)
+            else:
+                logger.error("Event loop not set for MQTT client. Cannot start publisher task.")
         else:
-            logger.error(f"Failed to connect, return code {rc}")
+            logger.error(f"Failed to connect to {self._broker_name(client)}, return code {rc}")
 
     def _on_disconnect(self, client, userdata, rc, properties=None):
+        MQTT_DISCONNECTS.inc()
+        lost_at = time.monotonic()
+        with self._failover_lock:
+            if self.closing:
+                return
+            if client is not self.client:
+                logger.warning(f"Lost standby connection to {self._broker_name(client)} with code {rc}")
+                return
+            standby = self._connected_standby()
+            if standby is not None:
+                self._fail_over(standby, lost_at)
+                return
+            self.lost_at = lost_at
         if rc != 0:
             logger.warning(f"Disconnected from MQTT Broker with code {rc}. Attempting to reconnect...")
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._go_offline)
+
+    def _connected_standby(self):
+        return next((client for client in self.connections if client is not self.client and client.is_connected()), None)
+
+    def _on_connect_fail(self, client, userdata):
+        # Only matters before the first connection, later losses go through _on_disconnect
+        with self._failover_lock:
+            if client is not self.client or self.lost_at is not None:
+                return
+            self.lost_at = time.monotonic()
+            standby = self._connected_standby()
+            if standby is not None:
+                self._fail_over(standby, self.lost_at)
+
+    def _fail_over(self, standby, lost_at: float):
+        """Makes the standby connection the active one. Called with the failover lock held."""
+        previous, self.client = self.client, standby
+        self.lost_at = None
+        self.failover_count += 1
+        MQTT_FAILOVERS.inc()
+        from_broker, to_broker = self._broker_name(previous), self._broker_name(standby)
+        logger.warning(f"Failing over from {from_broker} to {to_broker}")
+        # One SUBSCRIBE for all filters, the switchover is complete with its SUBACK
+        topic_filters = self._topic_filters()
+        if topic_filters:
+            options = mqtt.SubscribeOptions(qos=self._QUALITY_OF_SERVICE)
+            _, mid = standby.subscribe([(topic_filter, options) for topic_filter in topic_filters])
+            self._failover_pending = (mid, lost_at, from_broker, to_broker)
+        else:
+            self._record_failover(lost_at, from_broker, to_broker)
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._start_publisher)
+            self.loop.call_soon_threadsafe(self._flush_outbox)
+
+    def _on_subscribe(self, client, userdata, mid, reason_codes, properties=None):
+        with self._failover_lock:
+            if self._failover_pending is None or self._failover_pending[0] != mid or client is not self.client:
+                return
+            _, lost_at, from_broker, to_broker = self._failover_pending
+            self._failover_pending = None
+        self._record_failover(lost_at, from_broker, to_broker)
+
+    def _record_failover(self, lost_at: float, from_broker: str, to_broker: str):
+        duration = time.monotonic() - lost_at
+        MQTT_FAILOVER.observe(duration)
+        self.last_failover = {"from": from_broker, "to": to_broker, "duration_ms": round(duration * 1000, 3),
+                              "lost_at": lost_at} # time.monotonic()
+        logger.info(f"Failed over from {from_broker} to {to_broker} in {duration * 1000:.1f} ms")
+
+    def _start_publisher(self):
+        # Runs on the event loop, paho callbacks hand over with call_soon_threadsafe
+        if not self.publish_task or self.publish_task.done():
+            self.publish_task = asyncio.create_task(self._publisher_task())
+
+    def _stop_publisher(self):
         if self.publish_task:
             self.publish_task.cancel()
             self.publish_task = None
 
+    def _go_offline(self):
+        # Commands still waiting for the publisher are handed to the outbox, so the
+        # reconnect doesn't replay them as a burst
+        self._stop_publisher()
+        if self.client.is_connected():
+            return # reconnected or failed over in the meantime
+        for topic, payload in self.pending_payloads.items():
+            self.outbox.hold(topic, payload)
+        self.pending_payloads.clear()
+        while not self.publish_queue.empty():
+            self.outbox.hold(*self.publish_queue.get_nowait())
+            self.publish_queue.task_done()
+
+    def _flush_outbox(self):
+        """Sends what the outbox kept while offline. Runs on the event loop once a broker is active."""
+        if not self.client.is_connected():
+            return
+        for topic, payload in self.outbox.take_held().items():
+            self.publish(topic, payload)
+        # paho resends what is in flight on a reconnected session itself
+        pending = self.outbox.pending()
+        pending_ids = {entry_id for entry_id, _, _ in pending}
+        # Forget sends of entries that another connection got acknowledged already
+        self._durable_inflight = {key: entry_id for key, entry_id in self._durable_inflight.items()
+                                  if entry_id in pending_ids}
+        inflight = {entry_id for (client, _), entry_id in self._durable_inflight.items() if client is self.client}
+        pending = [entry for entry in pending if entry[0] not in inflight]
+        for entry_id, topic, payload in pending:
+            self._send_durable(entry_id, topic, payload)
+        if pending:
+            logger.info(f"Resent {len(pending)} unacknowledged durable command(s)")
+
+    def _send_durable(self, entry_id: int, topic: str, payload: dict):
+        # QoS 1 even if the client subscribes with less, the PUBACK is what removes the command from the outbox
+        info = self._send(topic, payload, max(self._QUALITY_OF_SERVICE, 1))
+        self._durable_inflight[(self.client, info.mid)] = entry_id
+        MQTT_PUBLISHED.inc('durable')
+
+    def _on_publish(self, client, userdata, mid, *args):
+        # paho calls this with its message lock held, which publish() takes too, so taking a
+        # lock of ours here could deadlock against a send. The event loop does the bookkeeping,
+        # by then _send_durable has recorded the mid.
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._ack_durable, client, mid)
+        else:
+            self._ack_durable(client, mid)
+
+    def _ack_durable(self, client, mid: int):
+        entry_id = self._durable_inflight.pop((client, mid), None)
+        if entry_id is not None:
+            self.outbox.ack(entry_id)
+
     def _on_message(self, client, userdata, msg):
+        # Runs on the paho network thread (or the event loop with the asyncio backend),
+        # it only hands messages over to the subscriber queues
         try:
-            payload = json.loads(msg.payload.decode())
             topic = msg.topic
-            if topic in self.message_callbacks:
-                for callback in self.message_callbacks[topic]:
-                    callback(topic, payload)
-        except json.JSONDecodeError:
-            logger.error(f"Failed to decode JSON from message on topic {msg.topic}: {msg.payload}")
+            content_type = payload_codec.content_type_of(msg)
+            for tap in self.message_taps.match(topic):
+                tap(topic, msg.payload, content_type)
+            subscribers = self.message_callbacks.match(topic)
+            if subscribers:
+                started = time.perf_counter()
+                payload = payload_codec.decode(msg.payload, content_type)
+                MQTT_DECODE.observe(time.perf_counter() - started)
+                MQTT_RECEIVED.inc()
+                for subscriber in subscribers:
+                    subscriber.put(topic, payload)
+        except payload_codec.PayloadDecodeError as e:
+            logger.error(f"Failed to decode message on topic {msg.topic}: {e}")
         except Exception as e:
             logger.error(f"Error processing MQTT message on topic {msg.topic}: {e}")
 
+    def _content_type(self, topic: str) -> tuple:
+        cached = self._publish_properties.get(topic)
+        if cached is None:
+            content_type = next((content_type for topic_filter, content_type in self.payload_formats.items()
+                                 if mqtt.topic_matches_sub(topic_filter, topic)), self.payload_format)
+            cached = self._publish_properties[topic] = (content_type, payload_codec.publish_properties(content_type))
+        return cached
+
+    def _send(self, topic: str, payload: dict, qos: int):
+        # Stamped here, so superseded, deduplicated and logged commands don't use up seqs
+        if self.latency_tracker:
+            payload = self.latency_tracker.stamp(topic, payload)
+        content_type, properties = self._content_type(topic)
+        started = time.perf_counter()
+        encoded = payload_codec.encode(payload, content_type)
+        MQTT_ENCODE.observe(time.perf_counter() - started)
+        return self.client.publish(topic, encoded, qos=qos, properties=properties)
+
+    async def _next_message(self):
+        """Waits for the next (topic, payload) pair to publish.
+
+        Rate limiting happens before a message is taken, so whatever comes out
+        of here is the freshest command available and is published right away.
+        """
+        if not self.coalesce:
+            topic, payload = await self.publish_queue.get()
+            self.publish_queue.task_done()
+            return topic, payload
+
+        while not self.pending_payloads:
+            self.pending_event.clear()
+            await self.pending_event.wait()
+        topic = next(iter(self.pending_payloads))
+        payload = self.pending_payloads.pop(topic)
+        if not self.pending_payloads:
+            self.pending_event.clear()
+        return topic, payload
+
     async def _publisher_task(self):
         while True:
             try:
-                topic, payload = await self.publish_queue.get()
-                current_time = time.time()
-                time_to_wait = self.publish_interval - (current_time - self.last_publish_time)
+                time_to_wait = self.publish_interval - (time.time() - self.last_publish_time)
                 if time_to_wait > 0:
                     await asyncio.sleep(time_to_wait)
+                    MQTT_PUBLISHER_SLEEP.observe(time_to_wait)
 
-                self.client.publish(topic, json.dumps(payload), qos=self._QUALITY_OF_SERVICE)
+                topic, payload = await self._next_message()
+                self._send(topic, payload, self._COMMAND_QUALITY_OF_SERVICE)
+                self.outbox.sent(topic, payload)
                 self.last_publish_time = time.time()
-                self.publish_queue.task_done()
+                MQTT_PUBLISHED.inc('regular')
             except asyncio.CancelledError:
                 logger.info("MQTT publisher task cancelled.")
                 break
@@ -94,42 +371,190 @@ class MqttClient:
                 logger.error(f"Error in MQTT publisher task: {e}")
 
     def connect(self):
-        try:
-            broker_host = MQTT_BROKER_URL
-            broker_port = MQTT_BROKER_PORT
-
-            logger.info(f"Attempting to connect to MQTT Broker at {broker_host}:{broker_port} via websockets")
-            self.client.connect(broker_host, broker_port, 60)
-            self.client.loop_start() # Starts a new thread for network loop
+        for index, (client, (broker_host, broker_port)) in enumerate(zip(self.connections, self.brokers)):
+            try:
+                role = "MQTT Broker" if index == 0 else "standby MQTT Broker"
+                logger.info(f"Attempting to connect to {role} at {broker_host}:{broker_port} via {self.transport}")
+                if self.backend == 'asyncio':
+                    if not self.network_loops:
+                        raise RuntimeError("Event loop not set for the asyncio MQTT backend")
+                    # Connects in the background and reconnects on its own, all I/O stays on the event loop
+                    self.network_loops[index].start(broker_host, broker_port, MQTT_KEEPALIVE, max_delay=MQTT_RECONNECT_INTERVAL)
+                elif index == 0:
+                    client.connect(broker_host, broker_port, MQTT_KEEPALIVE)
+                    client.loop_start() # Starts a new thread for network loop
+                else:
+                    # A standby that is down must not hold up startup, its network thread keeps trying
+                    client.connect_async(broker_host, broker_port, MQTT_KEEPALIVE)
+                    client.loop_start()
 
-        except Exception as e:
-            logger.error(f"Could not connect to MQTT Broker: {e}")
+            except Exception as e:
+                logger.error(f"Could not connect to MQTT Broker at {broker_host}:{broker_port}: {e}")
+                self._on_connect_fail(client, None)
+                if self.backend == 'thread':
+                    # Keep trying in the background, so the broker comes back at least as a standby
+                    client.connect_async(broker_host, broker_port, MQTT_KEEPALIVE)
+                    client.loop_start()
 
     def disconnect(self):
         logger.info("Disconnecting from MQTT Broker.")
-        if self.publish_task:
-            self.publish_task.cancel()
-            self.publish_task = None
-        self.client.disconnect()
-        self.client.loop_stop()
+        self.closing = True
+        self._stop_publisher()
+        for subscriber in self.subscribers.values():
+            subscriber.stop()
+        for network_loop in self.network_loops:
+            network_loop.stop()
+        if not self.network_loops:
+            for client in self.connections:
+                client.disconnect()
+                client.loop_stop()
+        self.outbox.close()
+
+    def subscribe(self, topic: str, callback, policy: str = Subscriber.KEEP_LATEST,
+                  maxsize: int = SUBSCRIBER_QUEUE_SIZE, min_interval: float = 1/UI_FRAME_RATE_HZ,
+                  run_in_thread: bool = False):
+        """Registers a callback for the topic, which may contain `+` and `#` wildcards.
 
-    def subscribe(self, topic: str, callback):
-        if topic not in self.message_callbacks:
-            self.message_callbacks[topic] = []
-        self.message_callbacks[topic].append(callback)
-        self.client.subscribe(topic, options=mqtt.SubscribeOptions(qos=self._QUALITY_OF_SERVICE))
-        logger.info(f"Subscribed to topic: {topic}")
+        The client is shared by all browser sessions: the broker subscription is made
+        once per topic, and every message is decoded once and fanned out to all callbacks.
+        Each callback gets its own bounded queue and worker, see Subscriber for the
+        overflow policies. The defaults suit UI callbacks: the newest message per topic,
+        at most once per frame.
+        """
+        if (topic, callback) in self.subscribers:
+            logger.warning(f"Callback already subscribed to topic: {topic}")
+            return
+        subscriber = Subscriber(topic, callback, policy=policy, maxsize=maxsize,
+                                min_interval=min_interval, run_in_thread=run_in_thread)
+        self.subscribers[(topic, callback)] = subscriber
+        if self.loop:
+            subscriber.start(self.loop)
+        if self.message_callbacks.add(topic, subscriber) and not self.message_taps.callbacks(topic):
+            self.client.subscribe(topic, options=mqtt.SubscribeOptions(qos=self._QUALITY_OF_SERVICE))
+            logger.info(f"Subscribed to topic: {topic}")
+        logger.debug(f"Topic {topic} has {len(self.message_callbacks.callbacks(topic))} subscriber(s)")
 
     def unsubscribe(self, topic: str, callback):
-        if topic in self.message_callbacks:
-            if callback in self.message_callbacks[topic]:
-                self.message_callbacks[topic].remove(callback)
-            if not self.message_callbacks[topic]: # If no more callbacks for this topic
-                self.client.unsubscribe(topic)
-                del self.message_callbacks[topic]
-                logger.info(f"Unsubscribed from topic: {topic}")
-
-    def publish(self, topic: str, payload: dict):
+        subscriber = self.subscribers.pop((topic, callback), None)
+        if subscriber is None:
+            return
+        subscriber.stop()
+        # If no more callbacks for this topic
+        if self.message_callbacks.remove(topic, subscriber) and not self.message_taps.callbacks(topic):
+            self.client.unsubscribe(topic)
+            logger.info(f"Unsubscribed from topic: {topic}")
+
+    def add_message_tap(self, topic: str, tap):
+        """Registers tap(topic, payload bytes, content type or None) for every message on the topic, before any decoding.
+
+        Taps run on the paho network thread (the event loop with the asyncio backend) and
+        see messages nobody else subscribed to, which suits recorders and bridges. They
+        must only hand the message over and return, anything slow belongs on a thread
+        of its own.
+        """
+        if self.message_taps.add(topic, tap) and not self.message_callbacks.callbacks(topic):
+            self.client.subscribe(topic, options=mqtt.SubscribeOptions(qos=self._QUALITY_OF_SERVICE))
+            logger.info(f"Subscribed to topic: {topic}")
+
+    def remove_message_tap(self, topic: str, tap):
+        if self.message_taps.remove(topic, tap) and not self.message_callbacks.callbacks(topic):
+            self.client.unsubscribe(topic)
+            logger.info(f"Unsubscribed from topic: {topic}")
+
+    def subscriber_stats(self) -> list:
+        """Queue depth, drop counters and lag of every subscriber."""
+        return [subscriber.stats() for subscriber in list(self.subscribers.values())]
+
+    def register_metrics(self, registry):
+        """Adds the client's queue and subscriber state to the registry, read only when scraped."""
+        registry.gauge('ground_control_mqtt_connected', 'Whether the client is connected to the broker.',
+                       lambda: int(self.client.is_connected()))
+        registry.gauge('ground_control_mqtt_broker_connected', 'Whether the connection to each configured broker is up.',
+                       lambda: [((self._broker_name(client),), int(client.is_connected())) for client in self.connections],
+                       labelnames=('broker',))
+        registry.gauge('ground_control_mqtt_broker_active', 'Which broker the client publishes to and is subscribed at.',
+                       lambda: [((self._broker_name(client),), int(client is self.client)) for client in self.connections],
+                       labelnames=('broker',))
+        registry.gauge('ground_control_mqtt_publish_queue_depth', 'Commands waiting for the publisher task.',
+                       lambda: self.publish_queue.qsize() + len(self.pending_payloads))
+        registry.gauge('ground_control_mqtt_publish_rate_limit_hz', 'Configured maximum publish rate.',
+                       lambda: 1 / self.publish_interval)
+        registry.gauge('ground_control_mqtt_superseded_total', 'Pending commands replaced by a newer one before publishing.',
+                       lambda: self.superseded_count, metric_type='counter')
+        registry.gauge('ground_control_mqtt_outbox_held', 'Commands kept by the outbox until a broker is connected.',
+                       lambda: len(self.outbox.held))
+        registry.gauge('ground_control_mqtt_outbox_durable_pending', 'Durable commands not yet acknowledged by the broker.',
+                       lambda: self.outbox.pending_count)
+        registry.gauge('ground_control_mqtt_outbox_dropped_total', 'Commands discarded by the outbox while offline.',
+                       lambda: self.outbox.dropped_count, metric_type='counter')
+        registry.gauge('ground_control_mqtt_outbox_refused_total', 'Durable commands refused because the outbox was full.',
+                       lambda: self.outbox.refused_count, metric_type='counter')
+        registry.gauge('ground_control_mqtt_subscriber_queue_depth', 'Messages waiting for a subscriber callback.',
+                       lambda: [((stats['topic_filter'], stats['policy']), stats['depth']) for stats in self.subscriber_stats()],
+                       labelnames=('topic_filter', 'policy'))
+        registry.gauge('ground_control_mqtt_subscriber_dropped', 'Messages dropped by a subscriber queue since it was created.',
+                       lambda: [((stats['topic_filter'], stats['policy']), stats['dropped']) for stats in self.subscriber_stats()],
+                       labelnames=('topic_filter', 'policy'))
+        registry.gauge('ground_control_mqtt_subscriber_max_lag_seconds', 'Longest time a message waited in a subscriber queue.',
+                       lambda: [((stats['topic_filter'], stats['policy']), stats['max_lag_ms'] / 1000) for stats in self.subscriber_stats()],
+                       labelnames=('topic_filter', 'policy'))
+
+    def _drop_queued(self, topic: str):
+        """Removes every command for the topic that still waits for the publisher."""
+        dropped = 1 if self.pending_payloads.pop(topic, None) is not None else 0
+        kept = []
+        while not self.publish_queue.empty():
+            queued = self.publish_queue.get_nowait()
+            self.publish_queue.task_done()
+            if queued[0] == topic:
+                dropped += 1
+            else:
+                kept.append(queued)
+        for queued in kept:
+            self.publish_queue.put_nowait(queued)
+        return dropped
+
+    def _publish_now(self, topic: str, payload: dict):
+        # Priority lane: skips the rate limiter and anything still queued for this topic
+        dropped = self._drop_queued(topic)
+        self._send(topic, payload, self._COMMAND_QUALITY_OF_SERVICE)
+        self.outbox.sent(topic, payload)
+        self.priority_count += 1
+        MQTT_PUBLISHED.inc('priority')
+        logger.debug(f"Priority command sent on {topic}, dropped {dropped} queued command(s)")
+
+    def publish(self, topic: str, payload: dict, priority: bool = False):
+        """Publishes a command on the topic.
+
+        Regular commands are rate limited by the publisher task. Safety-critical
+        ones (stop, zero stick) should pass priority=True: they go on the wire
+        immediately and discard queued motion commands for the same topic.
+        Commands on durable topics are journaled and sent right away, and while
+        no broker is connected the outbox decides what happens to the rest.
+        """
+        policy = self.outbox.policy(topic)
+        if policy == Outbox.DURABLE:
+            entry_id = self.outbox.persist(topic, payload)
+            if entry_id is not None and self.client.is_connected():
+                self._send_durable(entry_id, topic, payload)
+            return
+        if not self.client.is_connected():
+            self.outbox.hold(topic, payload)
+            return
+
+        if priority:
+            self._publish_now(topic, payload)
+            return
+
+        if self.coalesce:
+            # Only the latest command per topic matters, older ones are superseded
+            if topic in self.pending_payloads:
+                self.superseded_count += 1
+                logger.debug(f"Superseded pending command on {topic} (total: {self.superseded_count})")
+            self.pending_payloads[topic] = payload
+            self.pending_event.set()
+            return
+
         # Put the message into the queue, the publisher task will handle rate limiting
         try:
             self.publish_queue.put_nowait((topic, payload))
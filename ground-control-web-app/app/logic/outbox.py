@@ -0,0 +1,180 @@
+import collections
+import json
+import logging
+import os
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+logger = logging.getLogger(__name__)
+
+class Outbox:
+    """Decides what happens to commands that can't go to the broker right now.
+
+    Every topic gets a policy from the first matching topic filter:
+
+    * ``drop``: commands published while offline are discarded
+    * ``keep_latest``: only the newest command per topic is sent once on reconnect, e.g.
+      joystick motion, where a burst of stale commands is dangerous but the last one, often
+      a stop, must arrive. That is the newest one held while offline, or else the last one
+      that went out, since it may have been written to a link that was already dead.
+    * ``durable``: every command is journaled to disk before it is sent and stays there
+      until the broker acknowledges it (QoS 1), so it survives disconnects and crashes.
+      Delivery is at least once, a command may arrive twice after a reconnect.
+
+    Memory stays bounded: one payload per ``keep_latest`` topic, and at most
+    ``max_pending`` durable commands or ``max_bytes`` of journal. A durable command
+    that doesn't fit is refused rather than pushing an older one out.
+    """
+
+    DROP = 'drop'
+    KEEP_LATEST = 'keep_latest'
+    DURABLE = 'durable'
+    POLICIES = (DROP, KEEP_LATEST, DURABLE)
+    JOURNAL_NAME = 'outbox.jsonl'
+
+    def __init__(self, policies: dict, default_policy: str = KEEP_LATEST, directory: str = '',
+                 max_pending: int = 1000, max_bytes: int = 16 * 1024 * 1024):
+        for policy in (*policies.values(), default_policy):
+            if policy not in self.POLICIES:
+                raise ValueError(f"Unknown outbox policy '{policy}', expected one of {self.POLICIES}")
+        self.policies = dict(policies) # topic filter to policy, the first match wins
+        self.default_policy = default_policy
+        self._policy_cache = {}
+        self.max_pending = max_pending
+        self.max_bytes = max_bytes
+
+        self.held = {} # keep_latest topic to the newest payload published while offline
+        self.latest = {} # keep_latest topic to the last payload handed to the broker
+        self.dropped_count = 0
+        self.superseded_count = 0
+        self.refused_count = 0
+
+        # Durable commands, entry id to (topic, payload), in publish order. The lock lets
+        # acknowledgements come from another thread than the one persisting commands.
+        self._lock = threading.Lock()
+        self._pending = collections.OrderedDict()
+        self._next_id = 1
+        self._journal = None
+        self.journal_path = os.path.join(directory, self.JOURNAL_NAME) if directory else None
+        if self.journal_path:
+            os.makedirs(directory, exist_ok=True)
+            self._recover()
+        else:
+            logger.info("OUTBOX_DIR is not set, durable commands survive a reconnect but not a restart")
+
+    def policy(self, topic: str) -> str:
+        policy = self._policy_cache.get(topic)
+        if policy is None:
+            policy = next((policy for topic_filter, policy in self.policies.items()
+                           if mqtt.topic_matches_sub(topic_filter, topic)), self.default_policy)
+            self._policy_cache[topic] = policy
+        return policy
+
+    def hold(self, topic: str, payload: dict):
+        """Keeps or discards a drop/keep_latest command that can't be sent now."""
+        if self.policy(topic) == self.DROP:
+            self.dropped_count += 1
+            return
+        if topic in self.held:
+            self.superseded_count += 1
+        self.held[topic] = payload
+
+    def sent(self, topic: str, payload: dict):
+        """Remembers the last keep_latest command that went out, to send it again after a reconnect."""
+        if self.policy(topic) == self.KEEP_LATEST:
+            self.latest[topic] = payload
+
+    def take_held(self) -> dict:
+        """Returns the newest command per keep_latest topic and forgets the held ones, for sending
+        once the broker is back."""
+        held, self.held = {**self.latest, **self.held}, {}
+        return held
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def pending(self) -> list:
+        """Durable commands not yet acknowledged, oldest first, as (entry id, topic, payload)."""
+        with self._lock:
+            return [(entry_id, topic, payload) for entry_id, (topic, payload) in self._pending.items()]
+
+    def persist(self, topic: str, payload: dict):
+        """Journals a durable command and returns its entry id, or None if the outbox is full."""
+        with self._lock:
+            if len(self._pending) >= self.max_pending or self._journal_size() >= self.max_bytes:
+                self._compact()
+                if len(self._pending) >= self.max_pending or self._journal_size() >= self.max_bytes:
+                    self.refused_count += 1
+                    logger.error(f"Outbox full ({len(self._pending)} pending), refused durable command on {topic}")
+                    return None
+            entry_id = self._next_id
+            self._next_id += 1
+            self._pending[entry_id] = (topic, payload)
+            if self._journal:
+                self._append({"id": entry_id, "topic": topic, "payload": payload, "queued_at": time.time()}, sync=True)
+            return entry_id
+
+    def ack(self, entry_id: int):
+        """Forgets a durable command once the broker acknowledged it."""
+        with self._lock:
+            if self._pending.pop(entry_id, None) is None:
+                return
+            if self._journal:
+                if self._pending:
+                    self._append({"ack": entry_id}, sync=False) # losing it only means sending the command again
+                else:
+                    # Nothing left, the journal starts over. Append mode leaves the position where it
+                    # was, and _journal_size() goes by tell()
+                    self._journal.seek(0)
+                    self._journal.truncate()
+
+    def _journal_size(self) -> int:
+        return self._journal.tell() if self._journal else 0
+
+    def _append(self, record: dict, sync: bool):
+        self._journal.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._journal.flush()
+        if sync:
+            os.fsync(self._journal.fileno())
+
+    def _recover(self):
+        """Loads unacknowledged commands from the journal, a torn last line from a crash is skipped."""
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if 'ack' in record:
+                        self._pending.pop(record['ack'], None)
+                    else:
+                        self._pending[record['id']] = (record['topic'], record['payload'])
+                        self._next_id = max(self._next_id, record['id'] + 1)
+        if self._pending:
+            logger.info(f"Recovered {len(self._pending)} unacknowledged durable command(s) from {self.journal_path}")
+        self._compact()
+
+    def _compact(self):
+        """Rewrites the journal with only the pending commands."""
+        if not self.journal_path:
+            return
+        if self._journal:
+            self._journal.close()
+        temporary_path = self.journal_path + '.tmp'
+        with open(temporary_path, 'w') as f:
+            for entry_id, (topic, payload) in self._pending.items():
+                f.write(json.dumps({"id": entry_id, "topic": topic, "payload": payload}, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, self.journal_path)
+        self._journal = open(self.journal_path, 'a')
+
+    def close(self):
+        with self._lock:
+            if self._journal:
+                self._journal.close()
+                self._journal = None
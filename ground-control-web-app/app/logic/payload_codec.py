@@ -0,0 +1,96 @@
+"""Payload encoding of the web app's MQTT traffic.
+
+JSON is the default and what the rover services expect. It goes through orjson
+when it is installed, otherwise through the standard library. MessagePack and
+CBOR are opt-in for consumers that understand them. A binary payload is marked
+with the MQTT v5 content type property, so a receiver picks the decoder from
+the message itself, and messages without one are JSON.
+
+The console scripts in firmware/ don't import this module. They stay on the
+standard library json and skip messages whose content type isn't JSON.
+"""
+import json
+
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+JSON = 'application/json'
+MSGPACK = 'application/msgpack'
+CBOR = 'application/cbor'
+FORMATS = {'json': JSON, 'msgpack': MSGPACK, 'cbor': CBOR} # configuration names to content types
+_ALIASES = {'application/x-msgpack': MSGPACK, 'application/vnd.msgpack': MSGPACK}
+
+
+class PayloadDecodeError(ValueError):
+    pass
+
+
+def normalize(content_type: str) -> str:
+    """Maps a content type (or a FORMATS name) to one of JSON, MSGPACK and CBOR, parameters are ignored."""
+    content_type = content_type.split(';', 1)[0].strip().lower()
+    content_type = FORMATS.get(content_type, content_type)
+    return _ALIASES.get(content_type, content_type)
+
+
+def available(content_type: str) -> bool:
+    content_type = normalize(content_type)
+    return content_type == JSON or (content_type == MSGPACK and msgpack is not None) or (content_type == CBOR and cbor2 is not None)
+
+
+def encode(payload, content_type: str = JSON, single_float: bool = False) -> bytes:
+    """Encodes a payload. single_float packs MessagePack floats in 4 instead of 8 bytes, which
+    suits sensor readings with a few decimals but not timestamps, and needs nothing from the decoder."""
+    content_type = normalize(content_type)
+    if content_type == JSON:
+        if orjson is not None:
+            return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(payload, separators=(',', ':')).encode()
+    if content_type == MSGPACK and msgpack is not None:
+        return msgpack.packb(payload, use_single_float=single_float)
+    if content_type == CBOR and cbor2 is not None:
+        return cbor2.dumps(payload)
+    raise ValueError(f"Can't encode {content_type}, install msgpack or cbor2 for the binary formats")
+
+
+def decode(data: bytes, content_type: str = None):
+    """Decodes a payload, JSON unless the content type says otherwise."""
+    content_type = normalize(content_type) if content_type else JSON
+    try:
+        if content_type == JSON:
+            return orjson.loads(data) if orjson is not None else json.loads(data)
+        if content_type == MSGPACK and msgpack is not None:
+            return msgpack.unpackb(data)
+        if content_type == CBOR and cbor2 is not None:
+            return cbor2.loads(data)
+    except Exception as e:
+        raise PayloadDecodeError(f"Invalid {content_type} payload: {e}") from e
+    raise PayloadDecodeError(f"Can't decode {content_type}, install msgpack or cbor2 for the binary formats")
+
+
+def content_type_of(message) -> str:
+    """Content type of a received paho message, None for MQTT 3.1.1 or when the publisher set none."""
+    properties = getattr(message, 'properties', None)
+    return getattr(properties, 'ContentType', None)
+
+
+def publish_properties(content_type: str):
+    """PUBLISH properties that mark the payload, None for JSON, which needs no marking."""
+    content_type = normalize(content_type)
+    if content_type == JSON:
+        return None
+    properties = Properties(PacketTypes.PUBLISH)
+    properties.ContentType = content_type
+    return properties
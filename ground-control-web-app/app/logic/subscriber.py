@@ -0,0 +1,177 @@
+import asyncio
+import collections
+import logging
+import threading
+import time
+
+from app.logic.metrics import MQTT_CALLBACK
+
+logger = logging.getLogger(__name__)
+
+class Subscriber:
+    """Delivers MQTT messages to one callback through its own bounded queue and worker.
+
+    The paho network thread only enqueues, so a slow callback delays nothing but its
+    own deliveries. What happens when the queue is full depends on the policy:
+
+    * ``keep_latest``: one pending message per topic, newer payloads replace older ones
+    * ``drop_oldest``: FIFO, the oldest pending message is dropped to make room
+    * ``block``: FIFO, the network thread waits up to ``block_timeout`` for room, then drops.
+      With the asyncio backend messages arrive on the event loop, which must not wait
+      for its own worker, so a full queue drops right away
+
+    The worker runs on the event loop, so callbacks may touch the UI. Callbacks that
+    don't, and may be slow, can set ``run_in_thread`` to keep the event loop free too.
+    With ``min_interval`` set, deliveries are spaced at least that far apart, which
+    together with ``keep_latest`` merges bursts into one UI refresh per frame.
+    """
+
+    KEEP_LATEST = 'keep_latest'
+    DROP_OLDEST = 'drop_oldest'
+    BLOCK = 'block'
+    POLICIES = (KEEP_LATEST, DROP_OLDEST, BLOCK)
+
+    def __init__(self, topic_filter: str, callback, policy: str = KEEP_LATEST, maxsize: int = 100,
+                 min_interval: float = 0.0, run_in_thread: bool = False, block_timeout: float = 0.5):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown overflow policy '{policy}', expected one of {self.POLICIES}")
+        self.topic_filter = topic_filter
+        self.callback = callback
+        self.policy = policy
+        self.maxsize = maxsize
+        self.min_interval = min_interval
+        self.run_in_thread = run_in_thread
+        self.block_timeout = block_timeout
+
+        self._condition = threading.Condition()
+        self._pending = {} if policy == self.KEEP_LATEST else collections.deque()
+        self._wake_pending = False
+        self._wake = None
+        self._worker_future = None
+        self._loop_thread = None # thread id of the event loop, put() from there skips the thread hand-over
+        self.loop = None
+
+        self.delivered_count = 0
+        self.merged_count = 0
+        self.dropped_count = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        """Starts the worker on the event loop. Safe to call from any thread."""
+        if self._worker_future is None:
+            self.loop = loop
+            self._worker_future = asyncio.run_coroutine_threadsafe(self._worker(), loop)
+
+    def stop(self):
+        if self._worker_future is not None:
+            self._worker_future.cancel()
+            self._worker_future = None
+
+    def put(self, topic: str, payload: dict):
+        """Enqueues a message according to the overflow policy. Called from the network thread or the event loop."""
+        if self.loop is None or self.loop.is_closed():
+            self.dropped_count += 1
+            return
+
+        entry = (payload, time.monotonic())
+        on_loop = threading.get_ident() == self._loop_thread
+        with self._condition:
+            if not self._enqueue(topic, entry, wait=not on_loop):
+                return
+            if self._wake_pending:
+                return
+            self._wake_pending = True
+
+        if on_loop:
+            self._set_wake()
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._set_wake)
+        except RuntimeError: # Event loop closed while shutting down
+            self.dropped_count += 1
+
+    def _enqueue(self, topic: str, entry: tuple, wait: bool = True) -> bool:
+        if self.policy == self.KEEP_LATEST:
+            if topic in self._pending:
+                self.merged_count += 1
+            elif len(self._pending) >= self.maxsize:
+                del self._pending[next(iter(self._pending))]
+                self.dropped_count += 1
+            self._pending[topic] = entry
+            return True
+
+        if self.policy == self.BLOCK:
+            if not self._condition.wait_for(lambda: len(self._pending) < self.maxsize,
+                                            timeout=self.block_timeout if wait else 0):
+                self.dropped_count += 1
+                return False
+        elif len(self._pending) >= self.maxsize:
+            self._pending.popleft()
+            self.dropped_count += 1
+        self._pending.append((topic, entry))
+        return True
+
+    def _take(self):
+        with self._condition:
+            if not self._pending:
+                self._wake_pending = False
+                return None
+            if self.policy == self.KEEP_LATEST:
+                topic = next(iter(self._pending))
+                entry = self._pending.pop(topic)
+            else:
+                topic, entry = self._pending.popleft()
+            self._condition.notify()
+            return topic, entry
+
+    def _set_wake(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _worker(self):
+        self._loop_thread = threading.get_ident()
+        self._wake = asyncio.Event()
+        if self._pending:
+            self._wake.set()
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            while (item := self._take()) is not None:
+                topic, (payload, enqueued_at) = item
+                self.last_lag = time.monotonic() - enqueued_at
+                self.max_lag = max(self.max_lag, self.last_lag)
+                await self._deliver(topic, payload)
+            if self.min_interval:
+                await asyncio.sleep(self.min_interval)
+
+    async def _deliver(self, topic: str, payload: dict):
+        started = time.perf_counter()
+        try:
+            if self.run_in_thread:
+                await asyncio.to_thread(self.callback, topic, payload)
+            else:
+                result = self.callback(topic, payload)
+                if asyncio.iscoroutine(result):
+                    await result
+            self.delivered_count += 1
+        except Exception as e:
+            logger.error(f"Error in MQTT callback for topic {topic}: {e}")
+        finally:
+            MQTT_CALLBACK.observe(time.perf_counter() - started, self.topic_filter)
+
+    def stats(self) -> dict:
+        return {
+            "topic_filter": self.topic_filter,
+            "policy": self.policy,
+            "depth": self.depth,
+            "delivered": self.delivered_count,
+            "merged": self.merged_count,
+            "dropped": self.dropped_count,
+            "last_lag_ms": self.last_lag * 1000,
+            "max_lag_ms": self.max_lag * 1000
+        }
@@ -0,0 +1,96 @@
+class _TopicNode:
+    __slots__ = ('children', 'callbacks')
+
+    def __init__(self):
+        self.children = {}
+        self.callbacks = []
+
+
+class TopicTrie:
+    """Subscription filters stored level by level, with MQTT `+` and `#` wildcard support.
+
+    Matching a topic walks at most one exact, one `+` and one `#` branch per level,
+    so the cost depends on the topic depth, not on the number of subscriptions.
+    """
+
+    def __init__(self):
+        self._root = _TopicNode()
+
+    def add(self, topic_filter: str, callback) -> bool:
+        """Registers a callback, returns True if the filter had no callbacks before."""
+        node = self._root
+        for level in topic_filter.split('/'):
+            node = node.children.setdefault(level, _TopicNode())
+        node.callbacks.append(callback)
+        return len(node.callbacks) == 1
+
+    def remove(self, topic_filter: str, callback) -> bool:
+        """Unregisters a callback, returns True if the filter has no callbacks left."""
+        path = [self._root]
+        levels = topic_filter.split('/')
+        for level in levels:
+            node = path[-1].children.get(level)
+            if node is None:
+                return False
+            path.append(node)
+
+        node = path[-1]
+        if callback not in node.callbacks:
+            return False
+        node.callbacks.remove(callback)
+        if node.callbacks:
+            return False
+
+        # Prune branches that no longer lead to any callback
+        for level, parent in zip(reversed(levels), reversed(path[:-1])):
+            child = parent.children[level]
+            if child.callbacks or child.children:
+                break
+            del parent.children[level]
+        return True
+
+    def callbacks(self, topic_filter: str) -> list:
+        node = self._root
+        for level in topic_filter.split('/'):
+            node = node.children.get(level)
+            if node is None:
+                return []
+        return list(node.callbacks)
+
+    def match(self, topic: str) -> list:
+        """Returns the callbacks of every filter matching the topic, each callback once."""
+        matched = []
+        levels = topic.split('/')
+        # Wildcards at the first level never match topics reserved by the broker, like $SYS
+        self._match(self._root, levels, 0, matched, allow_wildcards=not topic.startswith('$'))
+        return list(dict.fromkeys(matched))
+
+    def _match(self, node: _TopicNode, levels: list, depth: int, matched: list, allow_wildcards: bool = True):
+        if allow_wildcards:
+            multi_level = node.children.get('#')
+            if multi_level is not None: # '#' also matches the parent level itself
+                matched.extend(multi_level.callbacks)
+        if depth == len(levels):
+            matched.extend(node.callbacks)
+            return
+
+        exact = node.children.get(levels[depth])
+        if exact is not None:
+            self._match(exact, levels, depth + 1, matched)
+        if allow_wildcards:
+            single_level = node.children.get('+')
+            if single_level is not None:
+                self._match(single_level, levels, depth + 1, matched)
+
+    def filters(self) -> list:
+        """Returns all filters that have at least one callback."""
+        found = []
+        pending = [('', self._root)]
+        while pending:
+            prefix, node = pending.pop()
+            for level, child in list(node.children.items()):
+                topic_filter = f"{prefix}/{level}" if prefix or node is not self._root else level
+                if child.callbacks:
+                    found.append(topic_filter)
+                pending.append((topic_filter, child))
+        return found
@@ -0,0 +1,78 @@
+import logging
+from app.state import ChassisState, ManipulatorState
+from app.logic.mqtt_client import MqttClient
+from app.logic.gamepad_codec import GamepadDecoder
+from app.logic.latency import LatencyTracker
+from app.ui.chassis_pane import chassis_pane
+from app.ui.manipulator_pane import manipulator_pane
+from app.ui.science_pane import science_pane
+from app.config import MQTT_TOPICS
+
+logger = logging.getLogger(__name__)
+
+class Session:
+    """UI state of a single browser tab.
+
+    Every tab gets its own panes and control states, while MQTT traffic goes through
+    the one MqttClient shared by all sessions.
+    """
+
+    def __init__(self, mqtt_client: MqttClient, latency_tracker: LatencyTracker = None):
+        self.mqtt_client = mqtt_client
+        self.latency_tracker = latency_tracker
+        self.chassis_state = ChassisState()
+        self.manipulator_state = ManipulatorState()
+        self.gamepad_decoder = GamepadDecoder()
+        self.content_area = None
+        self.telemetry_pane = None
+        self.connected = True
+
+    def _telemetry_states(self):
+        return [state for state in (self.chassis_state, self.manipulator_state) if state.active_topic]
+
+    def _watch_telemetry(self, state, topic: str, mode: str):
+        state.active_topic = topic
+        state.telemetry_callback = lambda topic, payload: self.telemetry_pane.show(mode, payload)
+        self.mqtt_client.subscribe(state.active_topic, state.telemetry_callback)
+
+    def _unwatch_telemetry(self):
+        for state in self._telemetry_states():
+            self.mqtt_client.unsubscribe(state.active_topic, state.telemetry_callback)
+            state.active_topic = None
+            state.telemetry_callback = None
+
+    def switch_pane(self, pane_name: str):
+        """Clears the content area and loads the selected pane."""
+        with self.content_area:
+            self.content_area.clear()
+            self._unwatch_telemetry()
+
+            if pane_name == 'chassis':
+                chassis_pane(self.chassis_state, self.mqtt_client)
+                self._watch_telemetry(self.chassis_state, MQTT_TOPICS['chassis_output'], 'Chassis')
+            elif pane_name == 'manipulator':
+                manipulator_pane(self.manipulator_state, self.mqtt_client)
+                self._watch_telemetry(self.manipulator_state, MQTT_TOPICS['manipulator_output'], 'Manipulator')
+            elif pane_name == 'science':
+                science_pane()
+                self.telemetry_pane.show('Science')
+
+    def refresh_latency(self):
+        if self.latency_tracker and self.connected:
+            self.telemetry_pane.show_latency(self.latency_tracker.summary())
+
+    def suspend(self):
+        """Stops telemetry delivery while the browser is disconnected."""
+        if self.connected:
+            for state in self._telemetry_states():
+                self.mqtt_client.unsubscribe(state.active_topic, state.telemetry_callback)
+            self.connected = False
+            logger.debug("Session suspended")
+
+    def resume(self):
+        """Restores telemetry delivery once the browser reconnects."""
+        if not self.connected:
+            for state in self._telemetry_states():
+                self.mqtt_client.subscribe(state.active_topic, state.telemetry_callback)
+            self.connected = True
+            logger.debug("Session resumed")
@@ -9,6 +9,8 @@ class ChassisState:
         self.gamepad_active = False
         self.active_topic = None
         self.telemetry_callback = None
+        self.last_gamepad_payload = None
+        self.last_gamepad_publish = 0.0
 
     def get_payload(self):
         return {
@@ -39,6 +41,8 @@ class ManipulatorState:
         self.gamepad_active = False
         self.active_topic = None
         self.telemetry_callback = None
+        self.last_gamepad_payload = None
+        self.last_gamepad_publish = 0.0
 
     def get_payload(self):
         return {
@@ -36,7 +36,7 @@ def chassis_pane(chassis_state: ChassisState, mqtt_client: MqttClient):
                 ui.label('Movement').classes('text-lg')
                 joystick = ui.joystick(
                     on_move=send_joystick_data,
-                    on_end=lambda e: (setattr(chassis_state, 'left_stick', [0.0, 0.0]), logger.debug("Joystick reset"), mqtt_client.publish(MQTT_TOPICS['chassis_input'], chassis_state.get_payload()))
+                    on_end=lambda e: (setattr(chassis_state, 'left_stick', [0.0, 0.0]), logger.debug("Joystick reset"), mqtt_client.publish(MQTT_TOPICS['chassis_input'], chassis_state.get_payload(), priority=True))
                 ).classes('w-32 h-32 bg-[#f7a623] opacity-80 rounded-full border-2 border-black')
 
             # Action Buttons
@@ -77,7 +77,7 @@ def chassis_pane(chassis_state: ChassisState, mqtt_client: MqttClient):
                 if not chassis_state.gamepad_active:
                     chassis_state.rotate = 0
                     logger.info("Rotation joystick reset to 0")
-                    mqtt_client.publish(MQTT_TOPICS['chassis_input'], chassis_state.get_payload())
+                    mqtt_client.publish(MQTT_TOPICS['chassis_input'], chassis_state.get_payload(), priority=True)
 
             _rotation_slider.on_move(handle_rotation_joystick_move)
             _rotation_slider.on_end(handle_rotation_joystick_end)
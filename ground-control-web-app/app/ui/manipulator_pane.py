@@ -8,11 +8,11 @@ logger = logging.getLogger(__name__)
 
 def manipulator_pane(state: ManipulatorState, mqtt_client: MqttClient):
     
-    def send_manipulator_data():
+    def send_manipulator_data(priority: bool = False):
         """Send current manipulator state via MQTT."""
         if not state.gamepad_active:
             logger.info(f"Sending manipulator data: {state.get_payload()}")
-            mqtt_client.publish(MQTT_TOPICS['manipulator_input'], state.get_payload())
+            mqtt_client.publish(MQTT_TOPICS['manipulator_input'], state.get_payload(), priority=priority)
 
     def handle_gamepad_input(gamepad_data):
         """Handle manipulator control logic from gamepad data."""
@@ -49,7 +49,7 @@ def manipulator_pane(state: ManipulatorState, mqtt_client: MqttClient):
                     current_joint, _, _ = str(func_name).partition('(')
                     current_joint = current_joint.rstrip()
                     setattr(state, current_joint, 0.0)
-                    send_manipulator_data()
+                    send_manipulator_data(priority=True)
 
             ui.joystick(on_move=on_move, on_end=on_end).classes('w-32 h-32 bg-[#f7a623] opacity-80 rounded-full border-2 border-black')
 
@@ -0,0 +1,51 @@
+from nicegui import ui
+
+class TelemetryPane:
+    """Keyed telemetry view.
+
+    Creates one label per payload field the first time it shows up and afterwards
+    only touches labels whose text changed, so an incoming message sends just the
+    changed values to the browser instead of rebuilding the whole pane.
+    """
+
+    def __init__(self, mode: str):
+        self.mode = None
+        self.field_labels = {}
+        with ui.column().classes('gap-0'):
+            self.mode_label = ui.label().classes('text-lg font-semibold')
+            self.placeholder = ui.label().classes('text-md')
+            self.fields = ui.column().classes('gap-0')
+            self.latency_label = ui.label().classes('text-sm text-gray-500')
+            self.latency_label.visible = False
+        self.show(mode)
+
+    def _set_mode(self, mode: str):
+        self.mode = mode
+        self.mode_label.text = f"Mode: {mode}"
+        self.placeholder.text = f"{mode} functionality is not implemented yet"
+        self.fields.clear()
+        self.field_labels = {}
+
+    def show(self, mode: str, payload: dict = None):
+        if mode != self.mode:
+            self._set_mode(mode)
+        self.placeholder.visible = not payload
+        if not payload:
+            return
+
+        for key, value in payload.items():
+            text = f"{key}: {value}"
+            label = self.field_labels.get(key)
+            if label is None:
+                with self.fields:
+                    self.field_labels[key] = ui.label(text)
+            elif label.text != text:
+                label.text = text
+
+        for key in [key for key in self.field_labels if key not in payload]:
+            self.fields.remove(self.field_labels.pop(key))
+
+    def show_latency(self, text: str):
+        """Shows the command-to-telemetry latency summary below the fields."""
+        self.latency_label.visible = True
+        self.latency_label.text = text
@@ -0,0 +1,38 @@
+"""paho MQTT clients driven by an asyncio loop, shared by the scripts that talk to a real broker.
+
+paho normally runs a network thread per client. Here its socket is registered
+with the event loop instead (see app.logic.asyncio_mqtt), so hundreds of
+connections and thousands of messages per second run on one thread.
+"""
+import argparse
+import asyncio
+
+import paho.mqtt.client as mqtt
+
+from app.config import MQTT_USERNAME, MQTT_PASSWORD
+from app.logic.asyncio_mqtt import AsyncioNetworkLoop
+
+
+def add_connection_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=1883)
+    parser.add_argument('--protocol', choices=('5', '3.1.1'), default='5')
+    parser.add_argument('--username', default=MQTT_USERNAME)
+    parser.add_argument('--password', default=MQTT_PASSWORD)
+
+
+async def connect(args, client_id: str) -> mqtt.Client:
+    """Connects a client with the options of add_connection_arguments and waits for the CONNACK."""
+    loop = asyncio.get_running_loop()
+    protocol = mqtt.MQTTv311 if args.protocol == '3.1.1' else mqtt.MQTTv5
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id, protocol=protocol)
+    client.username_pw_set(args.username, args.password)
+    connected = loop.create_future()
+    client.on_connect = lambda client, userdata, flags, reason_code, properties: (
+        connected.done() or connected.set_result(reason_code))
+    AsyncioNetworkLoop(loop, client, send_buffer=2048 * 1024)
+    client.connect(args.host, args.port, keepalive=30)
+    reason_code = await asyncio.wait_for(connected, timeout=10)
+    if reason_code.is_failure:
+        raise ConnectionError(f"{client_id} was refused by the broker: {reason_code}")
+    return client
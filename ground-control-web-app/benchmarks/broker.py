@@ -0,0 +1,85 @@
+"""In-process stand-in for the MQTT broker, used by the benchmarks.
+
+``LocalBroker.attach`` swaps the paho client of an ``MqttClient`` for a
+connection to the stand-in. Published messages are routed to matching
+subscriptions on a dedicated thread, the way paho delivers them from its
+network thread, so ``MqttClient`` runs its real publish and subscribe code
+with no network or broker process involved.
+"""
+import queue
+import threading
+from types import SimpleNamespace
+
+from app.logic.mqtt_client import MqttClient
+from app.logic.topic_trie import TopicTrie
+
+
+class LocalConnection:
+    """Implements the part of the paho client API that MqttClient uses."""
+
+    def __init__(self, broker: 'LocalBroker', mqtt_client: MqttClient):
+        self.broker = broker
+        self.mqtt_client = mqtt_client
+        self.connected = False
+
+    def publish(self, topic: str, payload, qos: int = 0, properties=None):
+        if isinstance(payload, str):
+            payload = payload.encode()
+        self.broker.messages.put((topic, payload, properties))
+        self.broker.published_count += 1
+
+    def subscribe(self, topic: str, options=None):
+        if self not in self.broker.subscriptions.callbacks(topic): # Resubscribing replaces, as on a real broker
+            self.broker.subscriptions.add(topic, self)
+
+    def unsubscribe(self, topic: str):
+        self.broker.subscriptions.remove(topic, self)
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def disconnect(self):
+        self.connected = False
+        for topic_filter in list(self.broker.subscriptions.filters()):
+            self.broker.subscriptions.remove(topic_filter, self)
+
+    def loop_stop(self):
+        pass
+
+    def deliver(self, topic: str, payload: bytes, properties=None):
+        self.mqtt_client._on_message(self, None, SimpleNamespace(topic=topic, payload=payload, properties=properties))
+
+
+class LocalBroker:
+    def __init__(self):
+        self.subscriptions = TopicTrie() # Topic filters to LocalConnection objects
+        self.messages = queue.SimpleQueue()
+        self.published_count = 0
+        self.routed_count = 0
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._route, name='local-broker', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self.messages.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def attach(self, mqtt_client: MqttClient) -> LocalConnection:
+        """Connects the client to the stand-in, as if the broker accepted its CONNECT."""
+        connection = LocalConnection(self, mqtt_client)
+        mqtt_client.client = connection
+        mqtt_client.connections = [connection]
+        connection.connected = True
+        mqtt_client._on_connect(connection, None, None, 0) # Subscribes and starts the publisher
+        return connection
+
+    def _route(self):
+        while (message := self.messages.get()) is not None:
+            topic, payload, properties = message
+            for connection in self.subscriptions.match(topic):
+                connection.deliver(topic, payload, properties)
+                self.routed_count += 1
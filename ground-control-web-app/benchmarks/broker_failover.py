@@ -0,0 +1,160 @@
+"""Switchover time of the MqttClient hot-standby failover between two (or more) brokers.
+
+An ``MqttClient`` connects to all ``--brokers``, subscribes to a probe topic and
+publishes commands at ``--command-hz``. A helper connection per broker publishes
+the probe at ``--probe-hz`` and records where the commands arrive. After
+``--outage-after`` seconds the active broker is taken down with
+``--stop-command`` (or by hand when none is given) and the script reports:
+
+* detection: stop command to the client noticing the lost connection
+* failover: lost connection to the standby's SUBACK, as in the failover metrics
+* telemetry and command blackout: longest gap between probes reaching the client
+  and between commands reaching any broker
+
+Local test with the two brokers of the root docker-compose files on different
+ports, e.g. NanoMQ on 1883 and Mosquitto on 1884:
+
+    uv run python -m benchmarks.broker_failover --brokers localhost:1883 localhost:1884 \\
+        --stop-command "docker stop mqtt5" --output failover.json
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import time
+
+from app.config import MQTT_USERNAME, MQTT_PASSWORD, OUTBOX_POLICIES
+from app.logic.mqtt_client import MqttClient
+from app.logic.outbox import Outbox
+from app.logic.subscriber import Subscriber
+from benchmarks.asyncio_paho import connect
+
+PROBE_TOPIC = 'benchmark/ground-control/failover/probe'
+COMMAND_TOPIC = 'benchmark/ground-control/failover/command'
+
+
+def parse_broker(entry: str) -> tuple:
+    host, _, port = entry.partition(':')
+    return host, int(port or 1883)
+
+
+def largest_gap(times: list, after: float) -> float:
+    """Longest interval between consecutive arrivals around the outage, in milliseconds."""
+    times = sorted(times)
+    gaps = [later - earlier for earlier, later in zip(times, times[1:]) if later >= after]
+    return round(max(gaps) * 1000, 1) if gaps else None
+
+
+async def main(args) -> dict:
+    brokers = [parse_broker(entry) for entry in args.brokers]
+    MqttClient._QUALITY_OF_SERVICE = args.qos # subscriptions
+    MqttClient._COMMAND_QUALITY_OF_SERVICE = args.command_qos
+    mqtt_client = MqttClient(backend=args.backend, transport='tcp', brokers=brokers, outbox=Outbox(OUTBOX_POLICIES))
+    mqtt_client.publish_interval = 1 / args.command_hz
+    mqtt_client.set_event_loop(asyncio.get_running_loop())
+
+    probe_arrivals = {} # probe seq to first arrival at the client
+    command_arrivals = {} # command seq to first arrival at any broker
+
+    def on_probe(topic, payload):
+        probe_arrivals.setdefault(payload['seq'], time.monotonic())
+
+    def on_command(client, userdata, msg):
+        command_arrivals.setdefault(json.loads(msg.payload)['seq'], time.monotonic())
+
+    mqtt_client.subscribe(PROBE_TOPIC, on_probe, policy=Subscriber.DROP_OLDEST, maxsize=100_000, min_interval=0)
+    mqtt_client.connect()
+    helpers = []
+    for host, port in brokers:
+        helper_args = argparse.Namespace(host=host, port=port, protocol='5', username=args.username, password=args.password)
+        helper = await connect(helper_args, f"failover-helper-{port}-{int(time.time())}")
+        helper.on_message = on_command
+        helper.subscribe(COMMAND_TOPIC, qos=args.qos)
+        helpers.append(helper)
+    deadline = time.monotonic() + 10
+    while not all(client.is_connected() for client in mqtt_client.connections):
+        if time.monotonic() > deadline:
+            raise ConnectionError("Not every broker accepted the client")
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(0.5) # let the subscriptions settle
+    active = mqtt_client._broker_name(mqtt_client.client)
+    print(f"Connected to {len(brokers)} brokers, {active} is active")
+
+    async def probe():
+        seq = 0
+        while True:
+            seq += 1
+            for helper in helpers:
+                if helper.is_connected():
+                    helper.publish(PROBE_TOPIC, json.dumps({"seq": seq}), qos=args.qos)
+            await asyncio.sleep(1 / args.probe_hz)
+
+    async def command():
+        seq = 0
+        while True:
+            seq += 1
+            mqtt_client.publish(COMMAND_TOPIC, {"seq": seq})
+            await asyncio.sleep(1 / args.command_hz)
+
+    tasks = [asyncio.create_task(probe()), asyncio.create_task(command())]
+    await asyncio.sleep(args.outage_after)
+    stopped_at = time.monotonic()
+    if args.stop_command:
+        print(f"Stopping {active}: {args.stop_command}")
+        subprocess.Popen(args.stop_command, shell=True)
+    else:
+        print(f"Stop the broker at {active} now")
+    while mqtt_client.last_failover is None and time.monotonic() - stopped_at < args.timeout:
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(args.settle)
+    for task in tasks:
+        task.cancel()
+    mqtt_client.disconnect()
+    for helper in helpers:
+        helper.disconnect()
+    await asyncio.sleep(0.1)
+
+    failover = mqtt_client.last_failover
+    report = {
+        "benchmark": "broker_failover",
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "settings": {key: value for key, value in vars(args).items() if key not in ('password', 'output')},
+        "failover": failover,
+        "detection_ms": round((failover['lost_at'] - stopped_at) * 1000, 1) if failover else None,
+        "telemetry_blackout_ms": largest_gap(list(probe_arrivals.values()), stopped_at),
+        "command_blackout_ms": largest_gap(list(command_arrivals.values()), stopped_at),
+        "probes_received": len(probe_arrivals),
+        "commands_received": len(command_arrivals)
+    }
+    if failover:
+        print(f"Failed over from {failover['from']} to {failover['to']}: detection {report['detection_ms']} ms, "
+              f"switchover {failover['duration_ms']} ms")
+    else:
+        print(f"No failover within {args.timeout} s")
+    print(f"Telemetry blackout {report['telemetry_blackout_ms']} ms, command blackout {report['command_blackout_ms']} ms")
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--brokers', nargs='+', default=['localhost:1883', 'localhost:1884'], help="host:port, the first one is active")
+    parser.add_argument('--backend', choices=MqttClient.BACKENDS, default='thread')
+    parser.add_argument('--username', default=MQTT_USERNAME)
+    parser.add_argument('--password', default=MQTT_PASSWORD)
+    parser.add_argument('--qos', type=int, choices=(0, 1, 2), default=1, help="QoS of the app's subscriptions and of the helpers")
+    parser.add_argument('--command-qos', type=int, choices=(0, 1, 2), default=MqttClient._COMMAND_QUALITY_OF_SERVICE,
+                        help="QoS of the commands the app publishes, 0 like the app")
+    parser.add_argument('--probe-hz', type=float, default=200, help="telemetry probes per second on every broker")
+    parser.add_argument('--command-hz', type=float, default=50, help="commands per second from the client")
+    parser.add_argument('--outage-after', type=float, default=3.0, help="seconds before the active broker is stopped")
+    parser.add_argument('--stop-command', help="shell command that stops the active broker")
+    parser.add_argument('--timeout', type=float, default=30.0, help="seconds to wait for the failover")
+    parser.add_argument('--settle', type=float, default=1.0, help="seconds to keep measuring after the failover")
+    parser.add_argument('--output', help="write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,108 @@
+"""Republishes a flight log recorded by FlightRecorder to an MQTT broker.
+
+Messages keep their original spacing (``--speed 1``), are sped up N times
+(``--speed N``) or sent as fast as possible (``--fast``). Use ``--topic`` to
+replay only part of the traffic, e.g. the controller inbound topics to
+load-test the rover-controller-service offline.
+
+Run from the ground-control-web-app directory:
+
+    uv run python -m benchmarks.flight_replayer recordings/20260101-120000 --host localhost --speed 4
+"""
+import argparse
+import logging
+import time
+
+import paho.mqtt.client as mqtt
+
+from app.config import setup_logging, MQTT_USERNAME, MQTT_PASSWORD
+from app.logic import payload_codec
+from app.logic.flight_recorder import FlightLog
+
+logger = logging.getLogger(__name__)
+
+class FlightReplayer:
+    """Feeds recorded messages to ``publish(topic, payload, content_type)`` on the recorded schedule.
+
+    ``speed`` scales the time between messages, 0 disables waiting altogether.
+    The schedule is absolute, so slow publishes don't accumulate drift.
+    """
+
+    def __init__(self, publish, speed: float = 1.0):
+        self.publish = publish
+        self.speed = speed
+        self.replayed_count = 0
+        self.max_lag = 0.0
+
+    def replay(self, records) -> float:
+        """Replays the records and returns the elapsed wall time in seconds."""
+        started = time.monotonic()
+        first_timestamp = None
+        for topic, payload, timestamp, content_type in records:
+            if first_timestamp is None:
+                first_timestamp = timestamp
+            if self.speed:
+                due = started + (timestamp - first_timestamp) / 1e9 / self.speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    self.max_lag = max(self.max_lag, -delay)
+            self.publish(topic, payload, content_type)
+            self.replayed_count += 1
+        return time.monotonic() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory', help="session directory written by the flight recorder")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=1883)
+    parser.add_argument('--transport', choices=('tcp', 'websockets'), default='tcp')
+    parser.add_argument('--username', default=MQTT_USERNAME)
+    parser.add_argument('--password', default=MQTT_PASSWORD)
+    parser.add_argument('--qos', type=int, choices=(0, 1, 2), default=0)
+    parser.add_argument('--speed', type=float, default=1.0, help="1 replays in real time, N replays N times faster")
+    parser.add_argument('--fast', action='store_true', help="replay as fast as possible")
+    parser.add_argument('--topic', action='append', help="replay only topics matching this filter, may be repeated")
+    parser.add_argument('--start', type=float, default=0.0, help="seconds into the recording to start at")
+    parser.add_argument('--duration', type=float, help="seconds of the recording to replay")
+    args = parser.parse_args()
+
+    setup_logging()
+    flight_log = FlightLog(args.directory)
+    first_timestamp = flight_log.first_timestamp()
+    start_ns = first_timestamp + int(args.start * 1e9) if first_timestamp is not None else None
+    end_ns = start_ns + int(args.duration * 1e9) if args.duration and start_ns is not None else None
+
+    client = mqtt.Client(client_id=f"flight-replayer-{int(time.time())}", protocol=mqtt.MQTTv5, transport=args.transport)
+    client.username_pw_set(args.username, args.password)
+    client.connect(args.host, args.port, 60)
+    client.loop_start()
+    try:
+        deadline = time.monotonic() + 10
+        while not client.is_connected():
+            if time.monotonic() > deadline:
+                raise ConnectionError(f"Could not connect to MQTT Broker at {args.host}:{args.port}")
+            time.sleep(0.05)
+
+        last = None
+        def publish(topic, payload, content_type):
+            nonlocal last
+            # Binary payloads only decode with the content type they were recorded with
+            properties = payload_codec.publish_properties(content_type) if content_type else None
+            last = client.publish(topic, payload, qos=args.qos, properties=properties)
+
+        replayer = FlightReplayer(publish, speed=0 if args.fast else args.speed)
+        elapsed = replayer.replay(flight_log.records(start_ns, end_ns, args.topic))
+        if last is not None:
+            last.wait_for_publish(timeout=10)
+        logger.info(f"Replayed {replayer.replayed_count} messages in {elapsed:.2f} s "
+                    f"({replayer.replayed_count / max(elapsed, 1e-9):.0f} msg/s, max lag {replayer.max_lag * 1000:.1f} ms)")
+    finally:
+        client.loop_stop()
+        client.disconnect()
+
+
+if __name__ == '__main__':
+    main()
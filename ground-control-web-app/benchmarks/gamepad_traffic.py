@@ -0,0 +1,94 @@
+"""Broker traffic generated by gamepad polling, with and without input shaping.
+
+Feeds simulated gamepads at the browser poll rate (20 Hz) into
+``process_gamepads`` and counts the resulting publishes for an idle
+controller, a steadily held stick and a continuous sweep. Analog noise of
+the kind real sticks produce is added to every axis. The "raw" run disables
+deadband, quantization and deduplication to show the former behaviour.
+
+Run from the ground-control-web-app directory:
+
+    uv run python -m benchmarks.gamepad_traffic
+"""
+import argparse
+import math
+import random
+from unittest import mock
+
+from app.logic import gamepad as gamepad_logic
+from app.state import ChassisState, ManipulatorState
+
+POLL_HZ = 20
+
+
+class PublishCounter:
+    def __init__(self):
+        self.count = 0
+
+    def publish(self, topic, payload, priority=False):
+        self.count += 1
+
+
+def frame(axes: list, noise: float) -> list:
+    noisy = [axis + random.uniform(-noise, noise) for axis in axes]
+    logitech = {
+        'id': 'Logitech Extreme 3D pro (Vendor: 046d Product: c215)',
+        'axes': [f"{axis:.4f}" for axis in noisy[:4]],
+        'buttons': [False] * 12,
+        'values': ['0.0000'] * 12
+    }
+    xbox = {
+        'id': 'Xbox Wireless Controller (STANDARD GAMEPAD)',
+        'axes': [f"{axis:.4f}" for axis in noisy[:4]],
+        'buttons': [False] * 17,
+        'values': [f"{max(0.0, axis):.4f}" for axis in noisy[:4]] * 4 + ['0.0000']
+    }
+    return [logitech, xbox]
+
+
+def profile(name: str, tick: int) -> list:
+    if name == 'idle':
+        return [0.0, 0.0, 0.0, 0.0]
+    if name == 'held':
+        return [0.0, -0.6, 0.0, 0.3]
+    phase = tick / POLL_HZ
+    return [math.sin(phase), math.cos(phase), 0.0, 0.0]
+
+
+def run(name: str, seconds: float, noise: float, shaping: bool) -> int:
+    counter = PublishCounter()
+    chassis_state, manipulator_state = ChassisState(), ManipulatorState()
+    random.seed(0)
+    patches = [] if shaping else [
+        mock.patch.object(gamepad_logic, 'GAMEPAD_AXIS_SHAPING', {}),
+        mock.patch.object(gamepad_logic, 'GAMEPAD_DEADBAND', 0.0),
+        mock.patch.object(gamepad_logic, 'GAMEPAD_QUANTIZATION', 0.0001),
+        mock.patch.object(gamepad_logic, 'GAMEPAD_HEARTBEAT_INTERVAL', 0.0),
+    ]
+    for patch in patches:
+        patch.start()
+    try:
+        for tick in range(int(seconds * POLL_HZ)):
+            gamepads = frame(profile(name, tick), noise)
+            with mock.patch.object(gamepad_logic.time, 'monotonic', return_value=tick / POLL_HZ):
+                gamepad_logic.process_gamepads(gamepads, chassis_state, manipulator_state, counter)
+    finally:
+        for patch in patches:
+            patch.stop()
+    return counter.count
+
+
+def main(seconds: float, noise: float):
+    print(f"{seconds:.0f} s at {POLL_HZ} Hz, 2 controllers, axis noise +/-{noise}")
+    for name in ('idle', 'held', 'sweep'):
+        raw = run(name, seconds, noise, shaping=False)
+        shaped = run(name, seconds, noise, shaping=True)
+        print(f"{name:<6} raw={raw:5d} publishes  shaped={shaped:5d} publishes  reduction={raw / max(shaped, 1):5.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=60)
+    parser.add_argument('--noise', type=float, default=0.008)
+    args = parser.parse_args()
+    main(args.seconds, args.noise)
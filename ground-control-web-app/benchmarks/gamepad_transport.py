@@ -0,0 +1,90 @@
+"""Bytes and server decode time of gamepad events: former JSON strings vs binary delta frames.
+
+The JSON event is the one the browser used to emit on every poll (``toFixed(4)``
+strings, decoded back with ``float()``). The binary path encodes frames the same
+way ``static/gamepad_logic.js`` does and decodes them with ``GamepadDecoder``.
+Both carry an Xbox gamepad and a Logitech joystick held with one axis moving.
+
+Run from the ground-control-web-app directory:
+
+    uv run python -m benchmarks.gamepad_transport
+"""
+import argparse
+import json
+import math
+import time
+
+from app.logic.gamepad_codec import GamepadDecoder, encode_batch, encode_frame
+
+POLL_HZ = 20
+
+
+def gamepads_at(tick: int) -> list:
+    sweep = round(math.sin(tick / POLL_HZ), 4)
+    return [
+        {'id': 'Logitech Extreme 3D pro (Vendor: 046d Product: c215)', 'index': 0,
+         'axes': [0.0, sweep, 0.0, -1.0], 'buttons': [False] * 12, 'values': [0.0] * 12},
+        {'id': 'Xbox Wireless Controller (STANDARD GAMEPAD Vendor: 045e Product: 02fd)', 'index': 1,
+         'axes': [0.0, 0.0, 0.0, 0.0], 'buttons': [False] * 17, 'values': [0.0] * 17},
+    ]
+
+
+def legacy_event(gamepads: list) -> str:
+    return json.dumps([{
+        'id': gamepad['id'],
+        'index': gamepad['index'],
+        'axes': [f"{axis:.4f}" for axis in gamepad['axes']],
+        'buttons': gamepad['buttons'],
+        'values': [f"{value:.4f}" for value in gamepad['values']]
+    } for gamepad in gamepads])
+
+
+def legacy_decode(event: str) -> list:
+    gamepads = json.loads(event)
+    for gamepad in gamepads:
+        gamepad['axes'] = [float(axis) for axis in gamepad['axes']]
+        gamepad['values'] = [float(value) for value in gamepad['values']]
+    return gamepads
+
+
+def binary_events(seconds: float, keepalive: float) -> list:
+    """Batches the browser would emit: deltas on change only, full frames every keepalive."""
+    events, previous = [], {}
+    for tick in range(int(seconds * POLL_HZ)):
+        full = tick % max(1, int(keepalive * POLL_HZ)) == 0
+        frames = []
+        for gamepad in gamepads_at(tick):
+            last = None if full else previous.get(gamepad['index'])
+            frame = encode_frame(gamepad, last)
+            if last and frame == encode_frame(last, last):
+                continue # Nothing changed, the browser sends nothing for this gamepad
+            previous[gamepad['index']] = gamepad
+            frames.append(frame)
+        if frames:
+            events.append(encode_batch(frames))
+    return events
+
+
+def measure(name: str, events: list, decode, seconds: float):
+    started = time.perf_counter()
+    for event in events:
+        decode(event)
+    elapsed = time.perf_counter() - started
+    total_bytes = sum(len(event) for event in events)
+    print(f"{name:<8} events={len(events):5d}  bytes/s={total_bytes / seconds:9.1f}  "
+          f"decode={elapsed / max(len(events), 1) * 1e6:7.2f} us/event")
+
+
+def main(seconds: float, keepalive: float):
+    print(f"{seconds:.0f} s at {POLL_HZ} Hz, one axis moving, full binary frame every {keepalive} s")
+    legacy = [legacy_event(gamepads_at(tick)) for tick in range(int(seconds * POLL_HZ))]
+    measure('json', legacy, legacy_decode, seconds)
+    measure('binary', binary_events(seconds, keepalive), GamepadDecoder().decode, seconds)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=60)
+    parser.add_argument('--keepalive', type=float, default=0.5)
+    args = parser.parse_args()
+    main(args.seconds, args.keepalive)
@@ -0,0 +1,196 @@
+"""Synthetic multi-operator load on the chassis and manipulator control topics.
+
+Emulates N virtual operators, each with its own MQTT connection and gamepad,
+publishing the exact payloads of ``ChassisState.get_payload`` and
+``ManipulatorState.get_payload`` (stamped with ``seq``/``sent_at`` like the app
+does with LATENCY_TRACKING) at a configurable rate, jitter and motion profile.
+A monitor connection subscribes to the same topics and records the delivered
+rate and publish-to-delivery latency per operator. Topics passed with
+``--downstream`` are only counted, e.g. the rover-controller-service output,
+to see whether it keeps up.
+
+All connections are driven by one asyncio loop through paho's socket
+callbacks, so thousands of messages per second fit on one machine without a
+thread per client. A broker is needed, e.g. the nanomq one from the root
+docker-compose file:
+
+    uv run python -m benchmarks.load_generator --operators 20 --rate 50 --duration 30
+    uv run python -m benchmarks.load_generator --operators 4 --profile random_walk --jitter 0.3 \\
+        --downstream orion/topic/chassis/inbound --output load.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+
+import paho.mqtt.client as mqtt
+
+from app.config import MQTT_TOPICS
+from app.logic.gamepad import shape_axis
+from app.state import ChassisState, ManipulatorState
+from benchmarks.asyncio_paho import add_connection_arguments, connect
+
+MANIPULATOR_AXES = ('rotate_turret', 'flex_forearm', 'flex_arm', 'flex_gripper', 'rotate_gripper', 'grip')
+
+
+def motion(profile: str, t: float, phase: float, rng: random.Random, previous: list) -> list:
+    """Four stick axes in [-1, 1] at time t for the motion profile."""
+    if profile == 'idle':
+        return [0.0] * 4
+    if profile == 'sweep':
+        return [math.sin(t + phase), math.cos(t + phase), math.sin(t / 2 + phase), 0.0]
+    if profile == 'step': # full deflection and back to zero every second, like an operator tapping the stick
+        value = 1.0 if int(t + phase) % 2 == 0 else 0.0
+        return [0.0, value, 0.0, value]
+    # random_walk
+    return [max(-1.0, min(1.0, axis + rng.gauss(0, 0.05))) for axis in previous]
+
+
+class Ledger:
+    """Send times of stamped commands, shared by all operators and the monitor."""
+
+    def __init__(self):
+        self.next_seq = 1
+        self.pending = {} # seq to (operator id, perf_counter at publish)
+
+    def stamp(self, payload: dict, operator_id: int) -> dict:
+        payload['seq'] = self.next_seq
+        payload['sent_at'] = int(time.time() * 1000)
+        self.pending[self.next_seq] = (operator_id, time.perf_counter())
+        self.next_seq += 1
+        return payload
+
+
+class VirtualOperator:
+    def __init__(self, operator_id: int, kind: str, args, ledger: Ledger):
+        self.operator_id = operator_id
+        self.kind = kind
+        self.args = args
+        self.ledger = ledger
+        self.state = ChassisState() if kind == 'chassis' else ManipulatorState()
+        self.topic = MQTT_TOPICS[f'{kind}_input']
+        self.rng = random.Random(operator_id)
+        self.axes = [0.0] * 4
+        self.sent = 0
+        self.received = 0
+        self.latencies = []
+
+    def _apply(self, axes: list):
+        if self.kind == 'chassis':
+            self.state.left_stick = [shape_axis(axes[0], 'left_stick'), shape_axis(axes[1], 'left_stick')]
+            self.state.rotate = shape_axis(axes[2], 'rotate')
+        else:
+            for field, axis in zip(MANIPULATOR_AXES, axes + axes[:2]):
+                setattr(self.state, field, shape_axis(axis, field))
+
+    async def run(self, client: mqtt.Client, started: float, duration: float):
+        period = 1 / self.args.rate
+        phase = self.rng.uniform(0, math.tau)
+        due = started + self.rng.uniform(0, period) # spread operators over the first period
+        while due < started + duration:
+            jitter = self.rng.uniform(-self.args.jitter, self.args.jitter) * period
+            await asyncio.sleep(max(0.0, due + jitter - time.perf_counter()))
+            self.axes = motion(self.args.profile, time.perf_counter() - started, phase, self.rng, self.axes)
+            self._apply(self.axes)
+            payload = self.ledger.stamp(self.state.get_payload(), self.operator_id)
+            client.publish(self.topic, json.dumps(payload), qos=self.args.qos)
+            self.sent += 1
+            due += period
+
+    def report(self, duration: float) -> dict:
+        ordered = sorted(self.latencies)
+        pick = lambda fraction: round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000, 3) if ordered else None
+        return {
+            "operator": self.operator_id,
+            "kind": self.kind,
+            "sent": self.sent,
+            "received": self.received,
+            "lost": self.sent - self.received,
+            "offered_rate_hz": round(self.sent / duration, 1),
+            "delivered_rate_hz": round(self.received / duration, 1),
+            "latency_ms": {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99)}
+        }
+
+
+async def main(args) -> dict:
+    ledger = Ledger()
+    kinds = ['manipulator' if index < round(args.operators * args.manipulator_share) else 'chassis'
+             for index in range(args.operators)]
+    operators = {index + 1: VirtualOperator(index + 1, kind, args, ledger) for index, kind in enumerate(kinds)}
+    downstream_counts = dict.fromkeys(args.downstream, 0)
+
+    def on_monitor_message(client, userdata, msg):
+        if msg.topic in downstream_counts:
+            downstream_counts[msg.topic] += 1
+            return
+        received_at = time.perf_counter()
+        entry = ledger.pending.pop(json.loads(msg.payload).get('seq'), None)
+        if entry:
+            operator = operators[entry[0]]
+            operator.received += 1
+            operator.latencies.append(received_at - entry[1])
+
+    monitor = await connect(args, f"load-monitor-{int(time.time())}")
+    monitor.on_message = on_monitor_message
+    for topic in {MQTT_TOPICS['chassis_input'], MQTT_TOPICS['manipulator_input'], *args.downstream}:
+        monitor.subscribe(topic, qos=args.qos)
+    clients = await asyncio.gather(*(connect(args, f"load-operator-{operator_id}-{int(time.time())}") for operator_id in operators))
+    await asyncio.sleep(0.5) # let the subscriptions settle
+
+    print(f"{args.operators} operators ({kinds.count('chassis')} chassis, {kinds.count('manipulator')} manipulator) "
+          f"at {args.rate} Hz, jitter {args.jitter:.0%}, profile {args.profile}, {args.duration} s")
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    await asyncio.gather(*(operator.run(client, started, args.duration) for operator, client in zip(operators.values(), clients)))
+    await asyncio.sleep(args.drain)
+    cpu = time.process_time() - cpu_started
+
+    for client in [*clients, monitor]:
+        client.disconnect()
+    await asyncio.sleep(0.1)
+
+    reports = [operator.report(args.duration) for operator in operators.values()]
+    for report in reports:
+        latency = report['latency_ms']
+        print(f"operator {report['operator']:4d} {report['kind']:<11} sent={report['sent']:6d} recv={report['received']:6d} "
+              f"delivered={report['delivered_rate_hz']:7.1f}/s  p50={latency['p50']} ms  p95={latency['p95']} ms  p99={latency['p99']} ms")
+    sent, received = sum(r['sent'] for r in reports), sum(r['received'] for r in reports)
+    all_latencies = sorted(latency for operator in operators.values() for latency in operator.latencies)
+    p99 = round(all_latencies[min(len(all_latencies) - 1, int(len(all_latencies) * 0.99))] * 1000, 3) if all_latencies else None
+    print(f"total sent={sent} ({sent / args.duration:.0f}/s) received={received} ({received / args.duration:.0f}/s) "
+          f"lost={sent - received} p99={p99} ms, generator CPU {cpu / (args.duration + args.drain):.0%}")
+    for topic, count in downstream_counts.items():
+        print(f"downstream {topic}: {count} messages ({count / args.duration:.1f}/s)")
+
+    return {
+        "benchmark": "load_generator",
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "settings": {key: value for key, value in vars(args).items() if key not in ('password', 'output')},
+        "total": {"sent": sent, "received": received, "p99_ms": p99},
+        "downstream": downstream_counts,
+        "operators": reports
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_connection_arguments(parser)
+    parser.add_argument('--qos', type=int, choices=(0, 1, 2), default=1)
+    parser.add_argument('--operators', type=int, default=4)
+    parser.add_argument('--manipulator-share', type=float, default=0.5, help="fraction of operators driving the manipulator")
+    parser.add_argument('--rate', type=float, default=20, help="commands per second per operator")
+    parser.add_argument('--jitter', type=float, default=0.1, help="random offset of each command, as a fraction of the period")
+    parser.add_argument('--profile', choices=('sweep', 'random_walk', 'step', 'idle'), default='sweep')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--drain', type=float, default=1.0, help="seconds to wait for in-flight messages at the end")
+    parser.add_argument('--downstream', nargs='*', default=[], help="topics to count deliveries on, e.g. controller outputs")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,155 @@
+"""Per-message CPU and latency of the thread and asyncio MqttClient backends over TCP and WebSockets.
+
+Each scenario runs in a fresh process with MQTT_BACKEND and MQTT_TRANSPORT set,
+so CPU time and memory of one backend don't leak into the other. An
+``MqttClient`` publishes chassis commands to a benchmark topic it is subscribed
+to itself, which puts the whole round trip on the measured path: publisher task,
+encoding, paho, the broker, decoding, the subscriber queue and the hand-over to
+the event loop. The rate limiter is disabled so the offered rate is what goes
+on the wire. Needs a broker with a TCP and a WebSocket listener, e.g. the nanomq
+one from the root docker-compose file:
+
+    uv run python -m benchmarks.mqtt_backends --host localhost --rates 100 1000 --output backends.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+BENCHMARK_TOPIC = 'benchmark/ground-control/backends'
+
+
+async def run_scenario(args) -> dict:
+    # Imported here so the configuration is read after the parent set the environment
+    from app.config import OUTBOX_POLICIES
+    from app.logic.mqtt_client import MqttClient
+    from app.logic.outbox import Outbox
+    from app.logic.subscriber import Subscriber
+    from benchmarks.mqtt_client import chassis_payload, peak_rss_mib, percentile
+
+    MqttClient._QUALITY_OF_SERVICE = args.qos # subscriptions
+    MqttClient._COMMAND_QUALITY_OF_SERVICE = args.command_qos
+    mqtt_client = MqttClient(outbox=Outbox(OUTBOX_POLICIES))
+    mqtt_client.publish_interval = 0
+    mqtt_client.set_event_loop(asyncio.get_running_loop())
+    latencies = []
+
+    def on_message(topic, payload):
+        latencies.append(time.perf_counter() - payload['bench_sent'])
+
+    mqtt_client.subscribe(BENCHMARK_TOPIC, on_message, policy=Subscriber.DROP_OLDEST, maxsize=100_000, min_interval=0)
+    mqtt_client.connect()
+    deadline = time.monotonic() + 10
+    while not mqtt_client.client.is_connected():
+        if time.monotonic() > deadline:
+            raise ConnectionError(f"Could not connect to the broker via {mqtt_client.transport}")
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(0.5) # let the subscription settle
+
+    offered = 0
+    cpu_started, wall_started = time.process_time(), time.perf_counter()
+    while (elapsed := time.perf_counter() - wall_started) < args.duration:
+        payload = chassis_payload(offered)
+        payload['bench_sent'] = time.perf_counter()
+        mqtt_client.publish(BENCHMARK_TOPIC, payload)
+        offered += 1
+        await asyncio.sleep(max(0.0, offered / args.rate - elapsed))
+    await asyncio.sleep(args.drain)
+    wall = time.perf_counter() - wall_started
+    cpu = time.process_time() - cpu_started
+    mqtt_client.disconnect()
+    await asyncio.sleep(0.1)
+
+    ordered = sorted(latencies)
+    to_ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        "backend": mqtt_client.backend,
+        "transport": mqtt_client.transport,
+        "qos": args.qos,
+        "command_qos": args.command_qos,
+        "offered_rate_hz": args.rate,
+        "offered": offered,
+        "received": len(latencies),
+        "latency_ms": {
+            "p50": to_ms(percentile(ordered, 0.50)),
+            "p95": to_ms(percentile(ordered, 0.95)),
+            "p99": to_ms(percentile(ordered, 0.99)),
+            "max": to_ms(ordered[-1] if ordered else None)
+        },
+        "cpu_percent": round(cpu / wall * 100, 1),
+        # Both the publish and the receive side of every message run in this process
+        "cpu_us_per_message": round(cpu / max(len(latencies), 1) * 1e6, 1),
+        "peak_rss_mib": round(peak_rss_mib(), 1)
+    }
+
+
+def spawn_scenario(args, backend: str, transport: str, rate: float) -> dict:
+    env = dict(os.environ, MQTT_BACKEND=backend, MQTT_TRANSPORT=transport, MQTT_BROKER_URL=args.host,
+               MQTT_BROKER_PORT=str(args.tcp_port if transport == 'tcp' else args.ws_port), LOG_LEVEL='WARNING')
+    command = [sys.executable, '-m', 'benchmarks.mqtt_backends', '--scenario',
+               '--rate', str(rate), '--qos', str(args.qos), '--command-qos', str(args.command_qos),
+               '--duration', str(args.duration), '--drain', str(args.drain)]
+    completed = subprocess.run(command, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        print(completed.stderr, file=sys.stderr)
+        return None
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def print_result(result: dict):
+    latency = result['latency_ms']
+    print(f"{result['backend']:<8} {result['transport']:<11} {result['offered_rate_hz']:7.0f} Hz  "
+          f"recv={result['received']:6d}/{result['offered']:<6d} p50={latency['p50']} ms  p95={latency['p95']} ms  "
+          f"p99={latency['p99']} ms  cpu={result['cpu_percent']:5.1f}%  {result['cpu_us_per_message']} us/msg  "
+          f"rss={result['peak_rss_mib']} MiB")
+
+
+def main(args) -> dict:
+    print(f"{args.duration} s per scenario against {args.host} (tcp {args.tcp_port}, websockets {args.ws_port})")
+    results = []
+    for transport in args.transports:
+        for rate in args.rates:
+            for backend in args.backends:
+                result = spawn_scenario(args, backend, transport, rate)
+                if result:
+                    print_result(result)
+                    results.append(result)
+    return {
+        "benchmark": "mqtt_backends",
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--tcp-port', type=int, default=1883)
+    parser.add_argument('--ws-port', type=int, default=9001)
+    parser.add_argument('--backends', nargs='+', choices=('thread', 'asyncio'), default=['thread', 'asyncio'])
+    parser.add_argument('--transports', nargs='+', choices=('tcp', 'websockets'), default=['tcp', 'websockets'])
+    parser.add_argument('--rates', nargs='+', type=float, default=[100, 1000], help="offered publish rates in Hz")
+    parser.add_argument('--qos', type=int, choices=(0, 1, 2), default=1, help="QoS of the app's subscription")
+    parser.add_argument('--command-qos', type=int, choices=(0, 1, 2), default=0, help="QoS of the commands the app publishes, 0 like the app")
+    parser.add_argument('--rate', type=float, default=100, help=argparse.SUPPRESS)
+    parser.add_argument('--duration', type=float, default=5.0, help="seconds per scenario")
+    parser.add_argument('--drain', type=float, default=0.5, help="seconds to wait for in-flight messages at the end")
+    parser.add_argument('--scenario', action='store_true', help=argparse.SUPPRESS) # one run, configured by the environment
+    parser.add_argument('--output', help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.scenario:
+        print(json.dumps(asyncio.run(run_scenario(args))))
+        sys.exit(0)
+
+    report = main(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,201 @@
+"""Throughput and publish-to-receive latency of MqttClient against an in-process broker.
+
+A publishing and a subscribing ``MqttClient`` are attached to the
+``LocalBroker`` stand-in, so the real publisher task, rate limiter,
+coalescing, payload encoding, topic matching and subscriber queues are all on
+the measured path without any network. Every scenario offers one payload
+shape (chassis, manipulator or a science sample) at a fixed rate and reports
+throughput, latency percentiles, CPU and memory. Results are written as JSON
+and can be compared with an earlier run to spot regressions.
+
+Run from the ground-control-web-app directory:
+
+    uv run python -m benchmarks.mqtt_client --output results.json
+    uv run python -m benchmarks.mqtt_client --compare results.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+from app.config import MQTT_TOPICS, MQTT_PUBLISH_RATE_HZ, MQTT_PUBLISH_COALESCE, OUTBOX_POLICIES
+from app.logic.mqtt_client import MqttClient
+from app.logic.outbox import Outbox
+from app.logic.subscriber import Subscriber
+from app.state import ChassisState, ManipulatorState
+from benchmarks.broker import LocalBroker
+
+SCIENCE_TOPIC = 'orion/topic/science/outbound'
+SCIENCE_WAVELENGTHS = 18 # AS7265X channels, 410 nm to 940 nm
+SCIENCE_GASSES = 4 # MQ2, MQ4, MQ5 and MQ8 sensors
+
+
+def chassis_payload(tick: int) -> dict:
+    state = ChassisState()
+    state.left_stick = [round(random.uniform(-1, 1), 2), round(random.uniform(-1, 1), 2)]
+    state.rotate = round(random.uniform(-1, 1), 2)
+    return state.get_payload()
+
+
+def manipulator_payload(tick: int) -> dict:
+    state = ManipulatorState()
+    for field in ('rotate_turret', 'flex_forearm', 'flex_arm', 'flex_gripper', 'rotate_gripper', 'grip'):
+        setattr(state, field, round(random.uniform(-1, 1), 2))
+    return state.get_payload()
+
+
+def science_payload(tick: int) -> dict:
+    return {
+        "eventType": "science",
+        "payload": {
+            "number": tick % 6 + 1,
+            "mass": round(random.uniform(1, 50), 2),
+            "temp": round(random.uniform(-60, 20), 2),
+            "gasses": [round(random.uniform(0, 5), 3) for _ in range(SCIENCE_GASSES)],
+            "lights": [round(random.uniform(0, 4000), 1) for _ in range(SCIENCE_WAVELENGTHS)]
+        }
+    }
+
+
+SHAPES = {
+    'chassis': (MQTT_TOPICS['chassis_input'], chassis_payload),
+    'manipulator': (MQTT_TOPICS['manipulator_input'], manipulator_payload),
+    'science': (SCIENCE_TOPIC, science_payload),
+}
+
+
+def percentile(ordered: list, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else None
+
+
+def peak_rss_mib() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024 # bytes on macOS, KiB elsewhere
+
+
+async def run_scenario(shape: str, rate_hz: int, duration: float, publish_rate_hz: int, coalesce: bool) -> dict:
+    topic, make_payload = SHAPES[shape]
+    loop = asyncio.get_running_loop()
+    broker = LocalBroker()
+    broker.start()
+
+    publisher, receiver = MqttClient(outbox=Outbox(OUTBOX_POLICIES)), MqttClient(outbox=Outbox(OUTBOX_POLICIES))
+    publisher.coalesce = coalesce
+    publisher.publish_interval = 1 / publish_rate_hz
+    latencies = []
+
+    def on_message(topic, payload):
+        latencies.append(time.perf_counter() - payload['bench_sent'])
+
+    for mqtt_client in (publisher, receiver):
+        mqtt_client.set_event_loop(loop)
+    # Every message counts, nothing is merged or rate limited on the receiving side
+    receiver.subscribe(topic, on_message, policy=Subscriber.DROP_OLDEST, maxsize=100_000, min_interval=0)
+    broker.attach(receiver)
+    broker.attach(publisher)
+    await asyncio.sleep(0) # let the publisher task start
+
+    random.seed(0)
+    offered = 0
+    cpu_started, wall_started = time.process_time(), time.perf_counter()
+    while (elapsed := time.perf_counter() - wall_started) < duration:
+        payload = make_payload(offered)
+        payload['bench_sent'] = time.perf_counter()
+        publisher.publish(topic, payload)
+        offered += 1
+        # Absolute schedule, so slow iterations don't lower the offered rate
+        await asyncio.sleep(max(0.0, offered / rate_hz - elapsed))
+    await asyncio.sleep(max(0.2, 2 / publish_rate_hz)) # drain what is still in flight
+    wall = time.perf_counter() - wall_started
+    cpu = time.process_time() - cpu_started
+
+    publisher.disconnect()
+    receiver.disconnect()
+    broker.stop()
+
+    ordered = sorted(latencies)
+    to_ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        "shape": shape,
+        "offered_rate_hz": rate_hz,
+        "publish_rate_hz": publish_rate_hz,
+        "coalesce": coalesce,
+        "duration_s": round(duration, 3),
+        "offered": offered,
+        "received": len(latencies),
+        "superseded": publisher.superseded_count,
+        "throughput_msg_s": round(len(latencies) / duration, 1),
+        "latency_ms": {
+            "p50": to_ms(percentile(ordered, 0.50)),
+            "p95": to_ms(percentile(ordered, 0.95)),
+            "p99": to_ms(percentile(ordered, 0.99)),
+            "max": to_ms(ordered[-1] if ordered else None)
+        },
+        "cpu_percent": round(cpu / wall * 100, 1),
+        "peak_rss_mib": round(peak_rss_mib(), 1)
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_result(result: dict, baseline: dict = None):
+    latency = result['latency_ms']
+    line = (f"{result['shape']:<12} {result['offered_rate_hz']:5d} Hz  recv={result['received']:6d}  "
+            f"thr={result['throughput_msg_s']:8.1f}/s  p50={latency['p50']} ms  p95={latency['p95']} ms  "
+            f"p99={latency['p99']} ms  cpu={result['cpu_percent']:5.1f}%  rss={result['peak_rss_mib']} MiB")
+    if baseline and baseline['latency_ms']['p99'] and latency['p99']:
+        line += (f"  [thr {result['throughput_msg_s'] - baseline['throughput_msg_s']:+.1f}/s, "
+                 f"p99 {latency['p99'] - baseline['latency_ms']['p99']:+.3f} ms vs baseline]")
+    print(line)
+
+
+async def main(args) -> dict:
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {(r['shape'], r['offered_rate_hz']): r for r in json.load(f)['results']}
+
+    print(f"Publish rate limit {args.publish_rate_hz} Hz, coalesce={args.coalesce}, {args.duration} s per scenario")
+    results = []
+    for shape in args.shapes:
+        for rate_hz in args.rates:
+            result = await run_scenario(shape, rate_hz, args.duration, args.publish_rate_hz, args.coalesce)
+            print_result(result, baseline.get((shape, rate_hz)))
+            results.append(result)
+
+    return {
+        "benchmark": "mqtt_client",
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--shapes', nargs='+', choices=list(SHAPES), default=list(SHAPES))
+    parser.add_argument('--rates', nargs='+', type=int, default=[10, 50, 200], help="offered publish rates in Hz")
+    parser.add_argument('--duration', type=float, default=3.0, help="seconds per scenario")
+    parser.add_argument('--publish-rate-hz', type=int, default=MQTT_PUBLISH_RATE_HZ)
+    parser.add_argument('--coalesce', action=argparse.BooleanOptionalAction, default=MQTT_PUBLISH_COALESCE)
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,157 @@
+"""Commands that reach the broker after an outage, per outbox policy, and the cost of durable commands.
+
+An ``MqttClient`` publishes on a ``drop`` topic, chassis commands (``keep_latest``)
+and science commands (``durable``) at ``--command-hz``. After ``--outage-after``
+seconds the broker is stopped with ``--stop-command``, commands keep coming for
+``--outage`` seconds, then ``--start-command`` brings the broker back. A helper
+connection records everything that arrives after the outage and the script reports:
+
+* per topic: commands published while the client was disconnected and how many of
+  them the reconnect delivered, i.e. the burst it caused
+* durable commands still unacknowledged at the end, which should be none
+* time to journal a durable command (fsync included), which is paid on the event loop
+
+Local test with a broker that listens on TCP, e.g. the nanomq one from the root
+docker-compose file:
+
+    uv run python -m benchmarks.outbox_reconnect --stop-command "docker stop nanomq" \\
+        --start-command "docker start nanomq" --output outbox.json
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import tempfile
+import time
+
+from app.config import MQTT_USERNAME, MQTT_PASSWORD, MQTT_TOPICS, OUTBOX_POLICIES
+from app.logic.mqtt_client import MqttClient
+from app.logic.outbox import Outbox
+from benchmarks.asyncio_paho import connect
+from benchmarks.mqtt_client import percentile
+
+DROP_TOPIC = 'benchmark/ground-control/outbox/drop'
+SCIENCE_TOPIC = 'orion/topic/science/inbound'
+
+
+async def wait_for(condition, timeout: float, message: str):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError(message)
+        await asyncio.sleep(0.05)
+
+
+async def main(args) -> dict:
+    topics = {DROP_TOPIC: 'drop', MQTT_TOPICS['chassis_input']: 'chassis', SCIENCE_TOPIC: 'science'}
+    outbox = Outbox({DROP_TOPIC: Outbox.DROP, **OUTBOX_POLICIES}, directory=args.outbox_dir or tempfile.mkdtemp(prefix='outbox-benchmark-'))
+    mqtt_client = MqttClient(backend=args.backend, transport='tcp', brokers=[(args.host, args.port)], outbox=outbox)
+    mqtt_client.set_event_loop(asyncio.get_running_loop())
+    mqtt_client.connect()
+    await wait_for(mqtt_client.client.is_connected, 10, "Could not connect to the broker")
+
+    arrivals = {topic: set() for topic in topics} # seqs that reached the helper
+    helper_args = argparse.Namespace(host=args.host, port=args.port, protocol='5', username=args.username, password=args.password)
+
+    async def start_helper():
+        helper = await connect(helper_args, f"outbox-helper-{int(time.time() * 1000)}")
+        helper.on_message = lambda client, userdata, msg: arrivals[msg.topic].add(json.loads(msg.payload)['seq'])
+        for topic in topics:
+            helper.subscribe(topic, qos=1)
+        return helper
+
+    helper = await start_helper()
+    await asyncio.sleep(0.5) # let the subscriptions settle
+
+    offline = {topic: set() for topic in topics} # seqs published while the client was disconnected
+    persist_times = []
+
+    async def command():
+        seq = 0
+        while True:
+            seq += 1
+            for topic in topics:
+                if topic == SCIENCE_TOPIC and seq % args.science_every:
+                    continue
+                if not mqtt_client.client.is_connected():
+                    offline[topic].add(seq)
+                started = time.perf_counter()
+                mqtt_client.publish(topic, {"seq": seq})
+                if topic == SCIENCE_TOPIC:
+                    persist_times.append(time.perf_counter() - started)
+            await asyncio.sleep(1 / args.command_hz)
+
+    task = asyncio.create_task(command())
+    await asyncio.sleep(args.outage_after)
+    print(f"Stopping the broker: {args.stop_command}")
+    subprocess.run(args.stop_command, shell=True)
+    await wait_for(lambda: not mqtt_client.client.is_connected(), args.timeout, "The client didn't notice the outage")
+    await asyncio.sleep(args.outage)
+    print(f"Starting the broker: {args.start_command}")
+    subprocess.Popen(args.start_command, shell=True)
+    # The helper has to be subscribed before the client is back, or it misses the replay
+    deadline = time.monotonic() + args.timeout
+    while True:
+        try:
+            helper = await start_helper()
+            break
+        except (ConnectionError, OSError):
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+    await wait_for(mqtt_client.client.is_connected, args.timeout, "The client didn't reconnect")
+    await asyncio.sleep(args.settle)
+    task.cancel()
+    pending = mqtt_client.outbox.pending_count
+    mqtt_client.disconnect()
+    helper.disconnect()
+    await asyncio.sleep(0.1)
+
+    by_topic = {}
+    for topic, name in topics.items():
+        by_topic[name] = {"policy": mqtt_client.outbox.policy(topic), "published_offline": len(offline[topic]),
+                          "delivered_after_reconnect": len(offline[topic] & arrivals[topic])}
+    ordered = sorted(persist_times)
+    report = {
+        "benchmark": "outbox_reconnect",
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "settings": {key: value for key, value in vars(args).items() if key not in ('password', 'output')},
+        "topics": by_topic,
+        "durable_pending_at_end": pending,
+        "durable_persist_ms": {
+            "p50": round(percentile(ordered, 0.50) * 1000, 3) if ordered else None,
+            "p99": round(percentile(ordered, 0.99) * 1000, 3) if ordered else None
+        }
+    }
+    for name, stats in by_topic.items():
+        print(f"{name:<12} {stats['policy']:<12} published offline={stats['published_offline']:5d}  "
+              f"delivered after reconnect={stats['delivered_after_reconnect']:5d}")
+    print(f"Durable commands unacknowledged at the end: {pending}, journaling p50={report['durable_persist_ms']['p50']} ms "
+          f"p99={report['durable_persist_ms']['p99']} ms")
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=1883)
+    parser.add_argument('--backend', choices=MqttClient.BACKENDS, default='thread')
+    parser.add_argument('--username', default=MQTT_USERNAME)
+    parser.add_argument('--password', default=MQTT_PASSWORD)
+    parser.add_argument('--command-hz', type=float, default=50, help="commands per second on every topic")
+    parser.add_argument('--science-every', type=int, default=10, help="publish a science command every n-th tick")
+    parser.add_argument('--outage-after', type=float, default=2.0, help="seconds before the broker is stopped")
+    parser.add_argument('--outage', type=float, default=5.0, help="seconds the broker stays down")
+    parser.add_argument('--stop-command', required=True, help="shell command that stops the broker")
+    parser.add_argument('--start-command', required=True, help="shell command that starts it again")
+    parser.add_argument('--timeout', type=float, default=30.0, help="seconds to wait for the disconnect and reconnect")
+    parser.add_argument('--settle', type=float, default=2.0, help="seconds to keep publishing after the reconnect")
+    parser.add_argument('--outbox-dir', help="journal directory, a fresh temporary one by default")
+    parser.add_argument('--output', help="write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,125 @@
+"""Encode and decode time and bytes on the wire of every payload type the Python clients publish.
+
+Compares the standard library JSON the clients used before with the encodings
+of ``app/logic/payload_codec.py``: JSON through orjson (when installed),
+MessagePack, also with single precision floats, and CBOR (when msgpack and
+cbor2 are installed). The payloads are built the way their publishers build
+them: commands of the app, of the chassis console and of the science console,
+and the telemetry of the rover simulator. Times are the best of ``--repeat``
+runs of ``--number`` calls.
+
+    uv run python -m benchmarks.payload_codec --output codec.json
+"""
+import argparse
+import json
+import platform
+import time
+import timeit
+
+from app.logic import payload_codec
+from app.state import ChassisState, ManipulatorState
+from benchmarks.rover_simulator import RoverSimulator, chassis_pwm
+
+
+def payloads() -> dict:
+    chassis = ChassisState()
+    chassis.left_stick, chassis.rotate = [0.42, -0.66], 0.18
+    manipulator = ManipulatorState()
+    for field, value in zip(('rotate_turret', 'flex_forearm', 'flex_arm', 'flex_gripper', 'rotate_gripper', 'grip'),
+                            (0.1, -0.34, 0.5, 0.0, -0.92, 1.0)):
+        setattr(manipulator, field, value)
+    wheels = chassis_pwm([0.42, -0.66], 0.0)
+    simulator = RoverSimulator('controller', seed=1)
+    simulator.wheel_pwm = wheels
+    return {
+        # ground-control-web-app
+        'chassis_command': chassis.get_payload(),
+        'manipulator_command': manipulator.get_payload(),
+        # firmware/chassis-firmware/podpodwoziemqtt.py
+        'wheel_pwm_command': {"eventType": "chassis", "mode": "pwm", "payload": dict(zip(('fl', 'fr', 'rl', 'rr'), wheels))},
+        # firmware/science-firmware/fronttest.py
+        'science_command': {"eventType": "science", "payload": {"drill": 120, "elev": -80, "conv": 0, "res_seq": 0, "rotate": 0, "reset": 0}},
+        # rover telemetry, as the simulator publishes it
+        'chassis_telemetry': simulator._chassis_telemetry(0.05),
+        'manipulator_telemetry': simulator._manipulator_telemetry(0.05),
+        'science_feedback': simulator._science_feedback(),
+        'science_sample': simulator._science_sample()
+    }
+
+
+def codecs() -> dict:
+    """Name to (encode, decode), the first one is the baseline."""
+    result = {'json (stdlib)': (lambda payload: json.dumps(payload).encode(), json.loads)}
+    json_name = 'json (orjson)' if payload_codec.orjson is not None else 'json (codec)'
+    result[json_name] = (payload_codec.encode, payload_codec.decode)
+    for name, content_type in (('msgpack', payload_codec.MSGPACK), ('cbor', payload_codec.CBOR)):
+        if payload_codec.available(content_type):
+            result[name] = (lambda payload, content_type=content_type: payload_codec.encode(payload, content_type),
+                            lambda data, content_type=content_type: payload_codec.decode(data, content_type))
+    if 'msgpack' in result:
+        result['msgpack (f32)'] = (lambda payload: payload_codec.encode(payload, payload_codec.MSGPACK, single_float=True),
+                                   result['msgpack'][1])
+    return result
+
+
+def round_trips(decoded, payload) -> bool:
+    # Single precision floats come back within float32 resolution
+    if isinstance(payload, dict):
+        return isinstance(decoded, dict) and decoded.keys() == payload.keys() and all(
+            round_trips(decoded[key], value) for key, value in payload.items())
+    if isinstance(payload, (list, tuple)):
+        return len(decoded) == len(payload) and all(round_trips(a, b) for a, b in zip(decoded, payload))
+    if isinstance(payload, float):
+        return abs(decoded - payload) <= abs(payload) * 1e-6
+    return decoded == payload
+
+
+def best_us(callable_, number: int, repeat: int) -> float:
+    return round(min(timeit.repeat(callable_, number=number, repeat=repeat)) / number * 1e6, 3)
+
+
+def main(args) -> dict:
+    available = codecs()
+    skipped = [name for name in ('msgpack', 'cbor') if name not in available]
+    if skipped:
+        print(f"Skipping {', '.join(skipped)}, install msgpack and cbor2 to include them")
+    results = []
+    for payload_name, payload in payloads().items():
+        baseline = None
+        for codec_name, (encode, decode) in available.items():
+            encoded = encode(payload)
+            if not round_trips(decode(encoded), payload):
+                raise AssertionError(f"{codec_name} doesn't round-trip {payload_name}")
+            result = {
+                "payload": payload_name,
+                "codec": codec_name,
+                "bytes": len(encoded),
+                "encode_us": best_us(lambda: encode(payload), args.number, args.repeat),
+                "decode_us": best_us(lambda: decode(encoded), args.number, args.repeat)
+            }
+            baseline = baseline or result
+            result["bytes_vs_baseline"] = round(result["bytes"] / baseline["bytes"], 3)
+            results.append(result)
+            print(f"{payload_name:<22} {codec_name:<14} {result['bytes']:5d} B ({result['bytes_vs_baseline']:5.2f}x)  "
+                  f"encode {result['encode_us']:7.3f} us  decode {result['decode_us']:7.3f} us")
+    return {
+        "benchmark": "payload_codec",
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=20_000, help="calls per timing run")
+    parser.add_argument('--repeat', type=int, default=5, help="timing runs, the best one counts")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    report = main(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,123 @@
+"""Stop-to-wire latency of the MqttClient priority lane.
+
+Saturates the regular (rate limited) lane with motion commands and measures
+how long a stop command takes from ``MqttClient.publish`` until it is handed
+to the network client, both through the priority lane and through the
+regular lane for comparison. No broker is needed: the paho client is
+swapped for a recorder that timestamps every publish.
+
+Run from the ground-control-web-app directory:
+
+    uv run python -m benchmarks.priority_latency
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+from app.config import MQTT_TOPICS, OUTBOX_POLICIES
+from app.logic.mqtt_client import MqttClient
+from app.logic.outbox import Outbox
+from app.state import ChassisState
+
+STOP_LATENCY_LIMIT_MS = 5.0
+
+
+class WireRecorder:
+    """Stands in for the paho client and records when messages hit the wire."""
+
+    def __init__(self):
+        self.sent = []
+
+    def publish(self, topic, payload, qos=0, properties=None):
+        self.sent.append((time.perf_counter(), topic, json.loads(payload)))
+
+    def is_connected(self):
+        return True
+
+
+async def saturate(mqtt_client: MqttClient, state: ChassisState, rate_hz: int, stop: asyncio.Event):
+    topic = MQTT_TOPICS['chassis_input']
+    while not stop.is_set():
+        state.left_stick = [0.5, 0.5]
+        mqtt_client.publish(topic, state.get_payload())
+        await asyncio.sleep(1 / rate_hz)
+
+
+async def measure_stop(mqtt_client: MqttClient, recorder: WireRecorder, priority: bool, timeout: float):
+    state = ChassisState()
+    payload = state.get_payload()
+    payload['payload']['stop_marker'] = time.perf_counter_ns()
+    started = time.perf_counter()
+    mqtt_client.publish(MQTT_TOPICS['chassis_input'], payload, priority=priority)
+    while time.perf_counter() - started < timeout:
+        for sent_at, _, sent in reversed(recorder.sent):
+            if sent['payload'].get('stop_marker') == payload['payload']['stop_marker']:
+                return (sent_at - started) * 1000
+        await asyncio.sleep(0.001)
+    return None
+
+
+async def run_lane(coalesce: bool, priority: bool, samples: int, load_hz: int):
+    mqtt_client = MqttClient(outbox=Outbox(OUTBOX_POLICIES))
+    recorder = WireRecorder()
+    mqtt_client.client = recorder
+    mqtt_client.coalesce = coalesce
+    mqtt_client._start_publisher()
+
+    stop = asyncio.Event()
+    load = asyncio.create_task(saturate(mqtt_client, ChassisState(), load_hz, stop))
+    await asyncio.sleep(0.5) # let the regular lane build up its backlog
+
+    latencies = []
+    for _ in range(samples):
+        latency = await measure_stop(mqtt_client, recorder, priority, timeout=2.0)
+        latencies.append(latency)
+        await asyncio.sleep(0.02)
+
+    stop.set()
+    await load
+    mqtt_client._stop_publisher()
+    return latencies
+
+
+def summarize(name: str, latencies: list):
+    # Stops that never reached the wire were either stuck in the backlog past the
+    # timeout or superseded by a later motion command
+    ordered = sorted(latency for latency in latencies if latency is not None)
+    missed = len(latencies) - len(ordered)
+    if not ordered:
+        print(f"{name:<28} no stop command reached the wire ({missed} missed)")
+        return float('inf')
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{name:<28} p50={statistics.median(ordered):9.3f} ms  p99={p99:9.3f} ms  "
+          f"max={ordered[-1]:9.3f} ms  missed={missed}")
+    return p99 if not missed else float('inf')
+
+
+async def main(samples: int, load_hz: int):
+    print(f"Regular lane saturated with {load_hz} commands/s, {samples} stop commands per scenario")
+    worst_priority_p99 = 0.0
+    for coalesce in (False, True):
+        mode = 'coalesce' if coalesce else 'fifo'
+        for priority in (True, False):
+            latencies = await run_lane(coalesce, priority, samples, load_hz)
+            p99 = summarize(f"{mode} / {'priority' if priority else 'regular'} lane", latencies)
+            if priority:
+                worst_priority_p99 = max(worst_priority_p99, p99)
+
+    if worst_priority_p99 > STOP_LATENCY_LIMIT_MS:
+        print(f"FAIL: priority stop-to-wire p99 {worst_priority_p99:.3f} ms exceeds {STOP_LATENCY_LIMIT_MS} ms")
+        return 1
+    print(f"OK: priority stop-to-wire p99 {worst_priority_p99:.3f} ms is under {STOP_LATENCY_LIMIT_MS} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=50)
+    parser.add_argument('--load-hz', type=int, default=1000)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.samples, args.load_hz)))
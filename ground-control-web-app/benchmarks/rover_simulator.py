@@ -0,0 +1,305 @@
+"""Headless rover that answers the control topics with plausible telemetry.
+
+Stands in for the firmware and the uart-mqtt-gateway in end-to-end tests.
+By default it consumes the controller inbound topics the app publishes to,
+applying the rover-controller-service PWM mapping itself. With ``--input
+firmware`` it sits behind the service and consumes its PWM commands. Science
+commands (drill, elevator, conveyor, research sequence) are read from
+``orion/topic/science/inbound`` either way.
+
+On every tick of a fixed rate update loop it publishes chassis telemetry
+(wheel PWM echo, angular velocities, heading), manipulator currents and
+angles, and drill/elevator current feedback. A research sequence ends with a
+science sample of 4 gas readings and 18 light channels. Telemetry echoes the
+``seq`` of the last command applied, so the app's LATENCY_TRACKING gets
+samples. ``--payload-format msgpack`` or ``cbor`` publishes the telemetry in a
+binary encoding marked with its MQTT v5 content type, ``--single-float`` packs
+MessagePack floats in single precision. The simulator periodically reports its
+own message handling time, tick duration and command-to-telemetry delay.
+
+    uv run python -m benchmarks.rover_simulator --host localhost --tick-hz 50
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+
+from app.config import MQTT_TOPICS
+from app.logic import payload_codec
+from benchmarks.asyncio_paho import add_connection_arguments, connect
+
+FIRMWARE_TOPICS = {
+    'chassis_input': 'orion/topic/chassis/inbound',
+    'manipulator_input': 'orion/topic/manipulator/inbound',
+    'science_input': 'orion/topic/science/inbound',
+    'chassis_output': MQTT_TOPICS['chassis_output'],
+    'manipulator_output': MQTT_TOPICS['manipulator_output'],
+    'science_output': 'orion/topic/science/outbound',
+}
+MANIPULATOR_JOINTS = ('rotate_turret', 'flex_forearm', 'flex_arm', 'flex_gripper', 'rotate_gripper', 'end_effector')
+WHEELS = ('fl', 'fr', 'rl', 'rr')
+
+MAX_PWM = 255
+MAX_WHEEL_ANGV = 12.0 # rad/s at full PWM
+WHEEL_RADIUS = 0.15 # m
+TRACK_WIDTH = 0.8 # m
+WHEEL_TIME_CONSTANT = 0.25 # s, first order response of the drive train
+JOINT_SPEED = 0.8 # rad/s at full PWM
+GAS_SENSORS = 4 # MQ2, MQ4, MQ5, MQ8
+LIGHT_CHANNELS = 18 # AS7265X, 410 nm to 940 nm
+
+
+def chassis_pwm(stick: list, rotate: float) -> list:
+    """Wheel PWM for a controller command, the mapping of the rover-controller-service PwmModeStrategy."""
+    stick_x, stick_y = stick
+    use_rotate = (abs(stick_x) < 0.1 and abs(stick_y) < 0.1 and abs(rotate) > 0.25) or (stick_x == 0 and stick_y == 0)
+    if use_rotate:
+        left = right = int(-rotate * MAX_PWM)
+    elif abs(stick_x) < 0.05 and abs(stick_y) < 0.05:
+        left = right = 0
+    elif abs(stick_y) < 0.05:
+        left, right = (0, int(MAX_PWM * abs(stick_x))) if stick_x < 0 else (int(MAX_PWM * abs(stick_x)), 0)
+    else:
+        left_speed, right_speed = -stick_y + stick_x, -stick_y - stick_x
+        magnitude = max(abs(left_speed), abs(right_speed))
+        if magnitude > 1.0:
+            left_speed, right_speed = left_speed / magnitude, right_speed / magnitude
+        left = max(-MAX_PWM, min(MAX_PWM, int(-left_speed * MAX_PWM)))
+        right = max(-MAX_PWM, min(MAX_PWM, int(right_speed * MAX_PWM)))
+    return [left, right, left, right]
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+class RoverSimulator:
+    def __init__(self, input_mode: str, echo_seq: bool = True, sample_seconds: float = 5.0, seed: int = 0):
+        self.input_mode = input_mode
+        self.echo_seq = echo_seq
+        self.sample_seconds = sample_seconds
+        self.rng = random.Random(seed)
+        if input_mode == 'controller':
+            self.inputs = {MQTT_TOPICS['chassis_input']: self._on_chassis_controller,
+                           MQTT_TOPICS['manipulator_input']: self._on_manipulator_controller}
+        else:
+            self.inputs = {FIRMWARE_TOPICS['chassis_input']: self._on_chassis_pwm,
+                           FIRMWARE_TOPICS['manipulator_input']: self._on_manipulator_pwm}
+        self.inputs[FIRMWARE_TOPICS['science_input']] = self._on_science
+
+        self.wheel_pwm = [0] * 4
+        self.wheel_angv = [0.0] * 4
+        self.heading = 0.0
+        self.linear_v = 0.0
+        self.angular_v = 0.0
+        self.joint_pwm = [0] * 6
+        self.joint_angle = [0.0] * 6
+        self.drill = self.elevator = self.conveyor = 0
+        self.sequence_started = None
+        self.sample_number = 0
+
+        self.last_seq = {} # output topic to the seq of the last command applied
+        self.unanswered = {} # output topic to receipt time of the oldest command not yet reflected in telemetry
+        self.received_count = 0
+        self.published_count = 0
+        self.invalid_count = 0
+        self.handle_times = []
+        self.tick_times = []
+        self.response_times = []
+        self.overruns = 0
+
+    def handle(self, topic: str, payload: bytes, content_type: str = None):
+        started = time.perf_counter()
+        handler = self.inputs.get(topic)
+        if handler is None:
+            return
+        self.received_count += 1
+        try:
+            message = payload_codec.decode(payload, content_type)
+            output = handler(message['payload'])
+        except (ValueError, KeyError, TypeError):
+            self.invalid_count += 1
+            return
+        if 'seq' in message:
+            self.last_seq[output] = message['seq']
+        self.unanswered.setdefault(output, started)
+        self.handle_times.append(time.perf_counter() - started)
+
+    def _on_chassis_controller(self, payload: dict) -> str:
+        self.wheel_pwm = chassis_pwm(payload['stick'], payload['rotate'][0])
+        return FIRMWARE_TOPICS['chassis_output']
+
+    def _on_chassis_pwm(self, payload: dict) -> str:
+        self.wheel_pwm = [max(-MAX_PWM, min(MAX_PWM, int(payload[wheel]))) for wheel in WHEELS]
+        return FIRMWARE_TOPICS['chassis_output']
+
+    def _on_manipulator_controller(self, payload: dict) -> str:
+        # Same scaling as ManipulatorPwmModeStrategy: [-1, 1] to a signed byte percentage
+        values = [payload[field] for field in MANIPULATOR_JOINTS[:-1]] + [payload['grip']]
+        self.joint_pwm = [int(value * 100) for value in values]
+        return FIRMWARE_TOPICS['manipulator_output']
+
+    def _on_manipulator_pwm(self, payload: dict) -> str:
+        self.joint_pwm = [int(payload[joint]) for joint in MANIPULATOR_JOINTS]
+        return FIRMWARE_TOPICS['manipulator_output']
+
+    def _on_science(self, payload: dict) -> str:
+        if payload.get('res_seq') == 1:
+            self.drill = self.elevator = self.conveyor = 0 # the firmware stops the motors for the sequence
+            self.sequence_started = time.monotonic()
+        elif self.sequence_started is None:
+            self.drill, self.elevator, self.conveyor = int(payload['drill']), int(payload['elev']), int(payload['conv'])
+        return FIRMWARE_TOPICS['science_output']
+
+    def _noise(self, scale: float) -> float:
+        return self.rng.gauss(0, scale)
+
+    def _chassis_telemetry(self, dt: float) -> dict:
+        response = 1 - math.exp(-dt / WHEEL_TIME_CONSTANT)
+        for index, pwm in enumerate(self.wheel_pwm):
+            target = pwm / MAX_PWM * MAX_WHEEL_ANGV
+            self.wheel_angv[index] += (target - self.wheel_angv[index]) * response
+        # Left wheels spin backwards for forward motion, see the PWM mapping
+        left = -(self.wheel_angv[0] + self.wheel_angv[2]) / 2
+        right = (self.wheel_angv[1] + self.wheel_angv[3]) / 2
+        self.linear_v = WHEEL_RADIUS * (left + right) / 2
+        self.angular_v = WHEEL_RADIUS * (right - left) / TRACK_WIDTH
+        self.heading = (self.heading + math.degrees(self.angular_v * dt)) % 360
+        payload = {f"{wheel}_angV": round(angv + self._noise(0.02), 3) for wheel, angv in zip(WHEELS, self.wheel_angv)}
+        payload.update({f"{wheel}_pwm": pwm for wheel, pwm in zip(WHEELS, self.wheel_pwm)})
+        payload.update({
+            "heading": round(self.heading + self._noise(0.1), 2),
+            "linearV": round(self.linear_v + self._noise(0.005), 3),
+            "angularV": round(self.angular_v + self._noise(0.005), 3)
+        })
+        return {"eventType": "chassis", "mode": "pwm", "payload": payload}
+
+    def _manipulator_telemetry(self, dt: float) -> dict:
+        payload = {}
+        for index, joint in enumerate(MANIPULATOR_JOINTS):
+            self.joint_angle[index] += self.joint_pwm[index] / 100 * JOINT_SPEED * dt
+            payload[f"amps_{joint}"] = min(127, int(abs(self.joint_pwm[index]) * 0.3 + abs(self._noise(1))))
+        for index, joint in enumerate(MANIPULATOR_JOINTS):
+            payload[f"ang_{joint}"] = round(self.joint_angle[index], 4)
+        return {"eventType": "manipulator", "mode": "PWM", "payload": payload}
+
+    def _science_feedback(self) -> dict:
+        current = lambda pwm, direction: round(max(0.0, direction * pwm) / MAX_PWM * 8 + abs(self._noise(0.02)), 3)
+        return {"eventType": "science", "payload": {
+            "FbDrillA": current(self.drill, 1), "FbDrillB": current(self.drill, -1),
+            "FbElevatorA": current(self.elevator, 1), "FbElevatorB": current(self.elevator, -1)
+        }}
+
+    def _science_sample(self) -> dict:
+        self.sample_number = self.sample_number % 6 + 1
+        return {"eventType": "science", "payload": {
+            "number": self.sample_number,
+            "mass": round(self.rng.uniform(2, 40), 2),
+            "temp": round(self.rng.uniform(-60, 5), 2),
+            "gasses": [round(self.rng.uniform(0.1, 4.5), 3) for _ in range(GAS_SENSORS)],
+            "lights": [round(self.rng.uniform(50, 4000), 1) for _ in range(LIGHT_CHANNELS)]
+        }}
+
+    def tick(self, dt: float) -> list:
+        """Advances the model by dt seconds and returns the (topic, message) pairs to publish."""
+        messages = [
+            (FIRMWARE_TOPICS['chassis_output'], self._chassis_telemetry(dt)),
+            (FIRMWARE_TOPICS['manipulator_output'], self._manipulator_telemetry(dt)),
+            (FIRMWARE_TOPICS['science_output'], self._science_feedback()),
+        ]
+        if self.sequence_started is not None and time.monotonic() - self.sequence_started >= self.sample_seconds:
+            self.sequence_started = None
+            messages.append((FIRMWARE_TOPICS['science_output'], self._science_sample()))
+        if self.echo_seq:
+            for topic, message in messages:
+                if topic in self.last_seq:
+                    message['seq'] = self.last_seq[topic]
+        return messages
+
+    def report(self, interval: float) -> dict:
+        report = {
+            "received_per_s": round(self.received_count / interval, 1),
+            "published_per_s": round(self.published_count / interval, 1),
+            "invalid": self.invalid_count,
+            "handle_us": {"p50": round(percentile(self.handle_times, 0.5) * 1e6, 1),
+                          "p99": round(percentile(self.handle_times, 0.99) * 1e6, 1)},
+            "tick_ms": {"p50": round(percentile(self.tick_times, 0.5) * 1000, 3),
+                        "p99": round(percentile(self.tick_times, 0.99) * 1000, 3)},
+            "command_to_telemetry_ms": {"p50": round(percentile(self.response_times, 0.5) * 1000, 2),
+                                        "p99": round(percentile(self.response_times, 0.99) * 1000, 2)},
+            "tick_overruns": self.overruns
+        }
+        self.received_count = self.published_count = self.invalid_count = self.overruns = 0
+        self.handle_times, self.tick_times, self.response_times = [], [], []
+        return report
+
+
+async def main(args, reports: list):
+    simulator = RoverSimulator(args.input, echo_seq=args.echo_seq, sample_seconds=args.sample_seconds)
+    client = await connect(args, f"rover-simulator-{int(time.time())}")
+    client.on_message = lambda client, userdata, msg: simulator.handle(msg.topic, msg.payload, payload_codec.content_type_of(msg))
+    for topic in simulator.inputs:
+        client.subscribe(topic, qos=args.qos)
+    print(f"Simulating the rover at {args.tick_hz} Hz, consuming {', '.join(simulator.inputs)}")
+
+    properties = payload_codec.publish_properties(args.payload_format)
+    period = 1 / args.tick_hz
+    started = last_tick = last_report = time.perf_counter()
+    due = started + period
+    while args.duration is None or time.perf_counter() - started < args.duration:
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        now = time.perf_counter()
+        for topic, message in simulator.tick(now - last_tick):
+            client.publish(topic, payload_codec.encode(message, args.payload_format, args.single_float), qos=args.qos, properties=properties)
+            simulator.published_count += 1
+            if topic in simulator.unanswered:
+                simulator.response_times.append(now - simulator.unanswered.pop(topic))
+        simulator.tick_times.append(time.perf_counter() - now)
+        last_tick = now
+        due += period
+        if time.perf_counter() > due: # the tick took longer than its period, skip ahead instead of bursting
+            simulator.overruns += 1
+            due = time.perf_counter() + period
+
+        if now - last_report >= args.report_interval:
+            report = simulator.report(now - last_report)
+            reports.append(report)
+            print(json.dumps(report))
+            last_report = now
+
+    client.disconnect()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_connection_arguments(parser)
+    parser.add_argument('--qos', type=int, choices=(0, 1, 2), default=0)
+    parser.add_argument('--input', choices=('controller', 'firmware'), default='controller',
+                        help="consume the controller inbound topics, or the PWM commands of the rover-controller-service")
+    parser.add_argument('--tick-hz', type=float, default=20, help="telemetry update rate")
+    parser.add_argument('--sample-seconds', type=float, default=5.0, help="duration of a research sequence")
+    parser.add_argument('--echo-seq', action=argparse.BooleanOptionalAction, default=True,
+                        help="echo the seq of the last applied command in telemetry")
+    parser.add_argument('--payload-format', choices=list(payload_codec.FORMATS), default='json',
+                        help="telemetry encoding, the binary ones need MQTT v5 and msgpack or cbor2")
+    parser.add_argument('--single-float', action='store_true', help="4 byte floats with --payload-format msgpack")
+    parser.add_argument('--report-interval', type=float, default=5.0)
+    parser.add_argument('--duration', type=float, help="stop after this many seconds, runs until interrupted by default")
+    parser.add_argument('--output', help="write the periodic reports to this JSON file on exit")
+    args = parser.parse_args()
+    if args.payload_format != 'json' and args.protocol == '3.1.1':
+        parser.error("binary payloads are marked with an MQTT v5 content type, use --protocol 5")
+    if not payload_codec.available(args.payload_format):
+        parser.error(f"{args.payload_format} needs the msgpack or cbor2 package")
+
+    reports = []
+    try:
+        asyncio.run(main(args, reports))
+    except KeyboardInterrupt:
+        pass
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(reports, f, indent=2)
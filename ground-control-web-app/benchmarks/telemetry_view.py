@@ -0,0 +1,99 @@
+"""Websocket bytes and server CPU of the telemetry pane per 1000 telemetry messages.
+
+Compares the former ``@ui.refreshable`` telemetry (every message destroys and
+recreates all labels) against the keyed ``TelemetryPane`` (labels are created
+once, only changed values are sent). Each message is followed by one outbox
+flush, serialized exactly as NiceGUI sends it to the browser, so the byte
+count is what every connected browser would receive.
+
+Run from the ground-control-web-app directory:
+
+    uv run python -m benchmarks.telemetry_view
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+
+from nicegui import Client, core, ui
+from nicegui.outbox import Deleted
+from nicegui.page import page
+
+from app.ui.telemetry_pane import TelemetryPane
+
+
+@ui.refreshable
+def legacy_telemetry_content(mode: str, payload: dict = None):
+    # Verbatim copy of the telemetry_content refreshable that TelemetryPane replaced
+    ui.label(f"Mode: {mode}").classes('text-lg font-semibold')
+    if payload:
+        for key, value in payload.items():
+            ui.label(f"{key}: {value}")
+    else:
+        ui.label(f"{mode} functionality is not implemented yet").classes('text-md')
+
+
+def chassis_telemetry(index: int) -> dict:
+    pwm = int(255 * math.sin(index / 50))
+    return {
+        "eventType": "chassis",
+        "mode": "pwm",
+        "payload": {"fl": pwm, "fr": -pwm, "rl": pwm, "rr": -pwm}
+    }
+
+
+def flush_outbox(client: Client) -> int:
+    """Serializes pending element updates like the NiceGUI outbox and returns their size."""
+    updates = client.outbox.updates
+    if not updates:
+        return 0
+    data = {
+        element_id: None if isinstance(element, Deleted) else element._to_dict()
+        for element_id, element in updates.items()
+    }
+    updates.clear()
+    return len(json.dumps(data, separators=(',', ':')).encode())
+
+
+async def run(name: str, build, show, messages: int):
+    client = Client(page(f'/bench/{name}'))
+    with client:
+        build()
+    await asyncio.sleep(0)
+    flush_outbox(client)
+
+    total_bytes = 0
+    started_cpu = time.process_time()
+    for index in range(messages):
+        show(chassis_telemetry(index))
+        await asyncio.sleep(0) # let refreshable tasks run, like between two dispatcher frames
+        total_bytes += flush_outbox(client)
+    cpu_seconds = time.process_time() - started_cpu
+
+    client.delete()
+    per_1000 = 1000 / messages
+    print(f"{name:<12} websocket={total_bytes * per_1000 / 1024:9.1f} KiB/1000 msgs  "
+          f"cpu={cpu_seconds * per_1000 * 1000:8.1f} ms/1000 msgs")
+
+
+async def main(messages: int):
+    core.loop = asyncio.get_running_loop() # NiceGUI background tasks need the loop outside of ui.run()
+
+    await run('refreshable',
+              lambda: legacy_telemetry_content('Chassis'),
+              lambda payload: legacy_telemetry_content.refresh('Chassis', payload),
+              messages)
+
+    panes = []
+    await run('keyed',
+              lambda: panes.append(TelemetryPane('Chassis')),
+              lambda payload: panes[0].show('Chassis', payload),
+              messages)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.messages))
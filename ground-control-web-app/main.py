@@ -1,74 +1,77 @@
+from fastapi import Response
 from nicegui import ui, app
-from app.ui.chassis_pane import chassis_pane
-from app.ui.manipulator_pane import manipulator_pane
-from app.ui.science_pane import science_pane
 from app.ui.menu import menu
-from app.state import ChassisState, ManipulatorState
-from app.logic.gamepad import process_gamepad_data
+from app.ui.telemetry_pane import TelemetryPane
+from app.session import Session
+from app.logic.gamepad import process_gamepad_frames
 from app.logic.mqtt_client import MqttClient
-from app.config import setup_logging, MQTT_TOPICS
+from app.logic.latency import LatencyTracker
+from app.logic.metrics import REGISTRY, CONTENT_TYPE
+from app.logic.flight_recorder import FlightRecorder
+from app.logic.subscriber import Subscriber
+from app.config import (
+    setup_logging,
+    GAMEPAD_POLL_HZ,
+    GAMEPAD_HEARTBEAT_INTERVAL,
+    LATENCY_TRACKING,
+    LATENCY_WINDOW,
+    FLIGHT_RECORDER_DIR,
+    FLIGHT_RECORDER_TOPIC,
+    FLIGHT_RECORDER_SEGMENT_MB,
+    MQTT_TOPICS
+)
 
 setup_logging()
 
 app.add_static_files('/static', 'static') # Explicitly add static files directory
 
-ui.add_head_html('<link rel="stylesheet" href="/static/theme.css">')
-
-# Shared states
-chassis_state = ChassisState()
-manipulator_state = ManipulatorState()
+# One MQTT connection shared by all browser sessions
 mqtt_client = MqttClient()
-
-# Global content area reference
-content_area = None
-
-@ui.refreshable
-def menu_content(active_pane: str):
-    menu(switch_pane, active_pane)
-
-@ui.refreshable
-def telemetry_content(mode: str, payload: dict = None):
-    ui.label(f"Mode: {mode}").classes('text-lg font-semibold')
-    if payload:
-        for key, value in payload.items():
-            ui.label(f"{key}: {value}")
-    else:
-        ui.label(f"{mode} functionality is not implemented yet").classes('text-md')
-
-def switch_pane(pane_name: str):
-    """Clears the content area and loads the selected pane."""
-    global content_area
-    with content_area:
-        content_area.clear()
-        # Disconnect from previous topic if any
-        if chassis_state.active_topic:
-            mqtt_client.unsubscribe(chassis_state.active_topic, chassis_state.telemetry_callback)
-            chassis_state.active_topic = None
-            chassis_state.telemetry_callback = None
-        if manipulator_state.active_topic:
-            mqtt_client.unsubscribe(manipulator_state.active_topic, manipulator_state.telemetry_callback)
-            manipulator_state.active_topic = None
-            manipulator_state.telemetry_callback = None
-
-        if pane_name == 'chassis':
-            chassis_pane(chassis_state, mqtt_client)
-            chassis_state.active_topic = MQTT_TOPICS['chassis_output']
-            chassis_state.telemetry_callback = lambda topic, payload: telemetry_content.refresh('Chassis', payload)
-            mqtt_client.subscribe(chassis_state.active_topic, chassis_state.telemetry_callback)
-        elif pane_name == 'manipulator':
-            manipulator_pane(manipulator_state, mqtt_client)
-            manipulator_state.active_topic = MQTT_TOPICS['manipulator_output']
-            manipulator_state.telemetry_callback = lambda topic, payload: telemetry_content.refresh('Manipulator', payload)
-            mqtt_client.subscribe(manipulator_state.active_topic, manipulator_state.telemetry_callback)
-        elif pane_name == 'science':
-            science_pane()
-            telemetry_content.refresh('Science')
-    menu_content.refresh(pane_name) # Refresh the menu to highlight the active pane
+latency_tracker = None
+if LATENCY_TRACKING:
+    # Command topic to the telemetry topic that echoes its seq
+    latency_tracker = LatencyTracker({MQTT_TOPICS['chassis_input']: MQTT_TOPICS['chassis_output'],
+                                      MQTT_TOPICS['manipulator_input']: MQTT_TOPICS['manipulator_output']},
+                                     window=LATENCY_WINDOW)
+    mqtt_client.latency_tracker = latency_tracker
+
+@app.get('/api/latency')
+def latency_report():
+    """Rolling command-to-telemetry latency percentiles and histogram as JSON."""
+    return latency_tracker.export() if latency_tracker else {"enabled": False}
+
+flight_recorder = FlightRecorder(FLIGHT_RECORDER_DIR, segment_bytes=FLIGHT_RECORDER_SEGMENT_MB * 1024 * 1024) if FLIGHT_RECORDER_DIR else None
+
+mqtt_client.register_metrics(REGISTRY)
+if flight_recorder:
+    REGISTRY.gauge('ground_control_flight_recorder_recorded_total', 'Messages written to the flight log.',
+                   lambda: flight_recorder.recorded_count, metric_type='counter')
+    REGISTRY.gauge('ground_control_flight_recorder_dropped_total', 'Messages dropped because the flight log writer fell behind.',
+                   lambda: flight_recorder.dropped_count, metric_type='counter')
+if latency_tracker:
+    REGISTRY.gauge('ground_control_command_latency_seconds', 'Rolling command-to-telemetry latency percentiles.',
+                   lambda: [((name,), value / 1000) for name, value in latency_tracker.percentiles().items()],
+                   labelnames=('quantile',))
+
+@app.get('/metrics')
+def metrics():
+    """Publish/subscribe hot path metrics in Prometheus text format, computed only when scraped."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
 
 # Main UI Layout
 @ui.page('/')
 def main_page():
-    global content_area
+    session = Session(mqtt_client, latency_tracker) # Per-tab panes and control states
+
+    ui.add_head_html('<link rel="stylesheet" href="/static/theme.css">')
+
+    @ui.refreshable
+    def menu_content(active_pane: str):
+        menu(switch_pane, active_pane)
+
+    def switch_pane(pane_name: str):
+        session.switch_pane(pane_name)
+        menu_content.refresh(pane_name) # Refresh the menu to highlight the active pane
 
     # Left side: Collapsible Menu (direct child of page)
     with ui.left_drawer().classes('p-4') as left_drawer:
@@ -82,30 +85,47 @@ def main_page():
         # Top section: Playground (fills remaining space in this row)
         with ui.row().classes('w-full flex-grow no-wrap'): # flex-grow to take available height
             # Playground pane (fills remaining space in this row)
-            content_area = ui.column().classes('flex-grow h-full') # flex-grow to take remaining width, full height of this row
+            session.content_area = ui.column().classes('flex-grow h-full') # flex-grow to take remaining width, full height of this row
 
         # Bottom section: Telemetry Pane (full width at the very bottom)
-        with ui.column().classes('w-full h-1/5 p-2'): # This is the container for telemetry_content
-            telemetry_content('Chassis') # Initial display for telemetry
+        with ui.column().classes('w-full h-1/5 p-2'): # This is the container for the telemetry pane
+            session.telemetry_pane = TelemetryPane('Chassis') # Initial display for telemetry
 
         # Initial content
     switch_pane('chassis')
 
-    ui.on('gamepad_data_event', lambda e: process_gamepad_data(e, chassis_state, manipulator_state, mqtt_client))
+    if latency_tracker:
+        ui.timer(1.0, session.refresh_latency)
+
+    ui.on('gamepad_frame_event', lambda e: process_gamepad_frames(e, session.gamepad_decoder, session.chassis_state, session.manipulator_state, mqtt_client))
 
-    # Inject Gamepad JS
+    # Stop fanning telemetry out to tabs that went away
+    ui.context.client.on_disconnect(session.suspend)
+    ui.context.client.on_connect(session.resume)
+
+    # Inject Gamepad JS, full frames are re-sent twice per heartbeat so the publisher heartbeat keeps running
+    ui.add_body_html(f'<script>window.gamepadConfig = {{pollHz: {GAMEPAD_POLL_HZ}, keepaliveMs: {int(GAMEPAD_HEARTBEAT_INTERVAL * 500)}}};</script>')
     ui.add_body_html('<script src="/static/gamepad_logic.js"></script>')
-    
+
 
 import asyncio
 
 @app.on_startup
 async def connect_mqtt():
     mqtt_client.set_event_loop(asyncio.get_running_loop())
+    if latency_tracker:
+        # Every echo counts, so telemetry is neither merged nor rate limited for the tracker
+        for topic in (MQTT_TOPICS['chassis_output'], MQTT_TOPICS['manipulator_output']):
+            mqtt_client.subscribe(topic, latency_tracker.observe, policy=Subscriber.DROP_OLDEST, min_interval=0)
+    if flight_recorder:
+        flight_recorder.start()
+        mqtt_client.add_message_tap(FLIGHT_RECORDER_TOPIC, flight_recorder.record)
     mqtt_client.connect()
 
 @app.on_shutdown
 async def disconnect_mqtt():
     mqtt_client.disconnect()
+    if flight_recorder:
+        flight_recorder.stop()
 
 ui.run()
@@ -1,5 +1,21 @@
+// Gamepad polling with binary delta frames.
+//
+// Every poll encodes each connected gamepad into a compact frame (see app/logic/gamepad_codec.py):
+// packed float32 axes and button values, a bitmask for pressed buttons, and only the fields that
+// changed since the last frame. Nothing is sent when nothing changed, except for a periodic
+// full frame which keeps the server heartbeat alive and resynchronizes its state.
+const FRAME_VERSION = 1;
+const FLAG_FULL = 0x01;
+const FLAG_REMOVED = 0x02;
+const CHANGE_EPSILON = 1e-4;
+
+const config = Object.assign({ pollHz: 20, keepaliveMs: 500 }, window.gamepadConfig || {});
+
 let gamepads = {}; // Stores connected gamepad objects by index
-let intervalId = null; // Stores the interval ID for polling
+let lastSent = {}; // Last state sent to the server, by gamepad index
+let removedIndexes = []; // Disconnected gamepads the server has not been told about yet
+let lastPollTime = 0;
+let lastFullFrameTime = 0;
 let connectedGamepadsCount = 0; // Tracks the number of currently connected gamepads
 
 function gamepadHandler(event, connecting) {
@@ -9,53 +25,125 @@ function gamepadHandler(event, connecting) {
     if (connecting) {
         gamepads[gamepad.index] = gamepad;
         connectedGamepadsCount++;
-        console.log("Gamepads connected count:", connectedGamepadsCount);
     } else {
         delete gamepads[gamepad.index];
+        delete lastSent[gamepad.index];
+        removedIndexes.push(gamepad.index);
         connectedGamepadsCount--;
-        console.log("Gamepads connected count:", connectedGamepadsCount);
     }
+    console.log("Gamepads connected count:", connectedGamepadsCount);
 }
 
-function pollGamepads() {
-    if (connectedGamepadsCount > 0) { // Only proceed if there are connected gamepads
-        try {
-            const active_gamepads = navigator.getGamepads();
-
-            let gamepad_data = [];
-            for (const gamepad of active_gamepads) {
-                if (gamepad && gamepads[gamepad.index]) { // Ensure it's a connected gamepad we're tracking
-                    let data = {
-                        id: gamepad.id,
-                        index: gamepad.index,
-                        axes: gamepad.axes.map(a => a.toFixed(4)),
-                        buttons: gamepad.buttons.map(b => b.pressed),
-                        values: gamepad.buttons.map(b => b.value.toFixed(4))
-                    };
-                    gamepad_data.push(data);
-                }
-            }
+function changedIndexes(current, previous) {
+    let changed = [];
+    for (let i = 0; i < current.length && i < 32; i++) {
+        if (!previous || Math.abs(current[i] - previous[i]) > CHANGE_EPSILON) {
+            changed.push(i);
+        }
+    }
+    return changed;
+}
+
+function encodeFrame(gamepad, previous) {
+    const axes = gamepad.axes;
+    const pressed = gamepad.buttons.map(b => b.pressed);
+    const values = gamepad.buttons.map(b => b.value);
+    const changedAxes = changedIndexes(axes, previous && previous.axes);
+    const changedValues = changedIndexes(values, previous && previous.values);
+    let pressedMask = 0;
+    pressed.forEach((isPressed, i) => { if (isPressed && i < 32) pressedMask |= (1 << i); });
 
-            if (gamepad_data.length > 0) {
-                try {
-                    emitEvent('gamepad_data_event', gamepad_data);
-                } catch (e) {
-                    console.error("Error emitting gamepad_data_event:", e);
+    if (previous && !changedAxes.length && !changedValues.length && pressedMask === previous.pressedMask) {
+        return null; // Nothing moved, nothing to send
+    }
+
+    const id = previous ? new Uint8Array(0) : new TextEncoder().encode(gamepad.id).slice(0, 255);
+    const size = 5 + (previous ? 0 : 1 + id.length) + 12 + 4 * (changedAxes.length + changedValues.length);
+    const view = new DataView(new ArrayBuffer(size));
+    let offset = 0;
+    view.setUint8(offset++, FRAME_VERSION);
+    view.setUint8(offset++, previous ? 0 : FLAG_FULL);
+    view.setUint8(offset++, gamepad.index);
+    view.setUint8(offset++, axes.length);
+    view.setUint8(offset++, values.length);
+    if (!previous) {
+        view.setUint8(offset++, id.length);
+        new Uint8Array(view.buffer, offset, id.length).set(id);
+        offset += id.length;
+    }
+    view.setUint32(offset, pressedMask >>> 0, true);
+    offset += 4;
+    for (const [current, changed] of [[axes, changedAxes], [values, changedValues]]) {
+        view.setUint32(offset, changed.reduce((mask, i) => mask | (1 << i), 0) >>> 0, true);
+        offset += 4;
+        for (const i of changed) {
+            view.setFloat32(offset, current[i], true);
+            offset += 4;
+        }
+    }
+
+    lastSent[gamepad.index] = { axes: Array.from(axes), values: values, pressedMask: pressedMask };
+    return new Uint8Array(view.buffer);
+}
+
+function encodeRemoved(index) {
+    return new Uint8Array([FRAME_VERSION, FLAG_REMOVED, index, 0, 0]);
+}
+
+function toBase64(frames) {
+    let binary = '';
+    for (const frame of frames) {
+        for (let i = 0; i < frame.length; i++) {
+            binary += String.fromCharCode(frame[i]);
+        }
+    }
+    return btoa(binary);
+}
+
+function pollGamepads(now) {
+    let frames = removedIndexes.map(encodeRemoved);
+    removedIndexes = [];
+
+    if (connectedGamepadsCount > 0) { // Only read gamepads if there are connected ones
+        const sendFull = now - lastFullFrameTime >= config.keepaliveMs;
+        if (sendFull) {
+            lastFullFrameTime = now;
+        }
+        for (const gamepad of navigator.getGamepads()) {
+            if (gamepad && gamepads[gamepad.index]) { // Ensure it's a connected gamepad we're tracking
+                const frame = encodeFrame(gamepad, sendFull ? null : lastSent[gamepad.index]);
+                if (frame) {
+                    frames.push(frame);
                 }
             }
+        }
+    }
+
+    if (frames.length > 0) {
+        try {
+            emitEvent('gamepad_frame_event', toBase64(frames));
+        } catch (e) {
+            console.error("Error emitting gamepad_frame_event:", e);
+        }
+    }
+}
+
+function gamepadLoop(now) {
+    if (now - lastPollTime >= 1000 / config.pollHz) {
+        lastPollTime = now;
+        try {
+            pollGamepads(now);
         } catch (e) {
             console.error("Error polling gamepads:", e);
         }
     }
+    window.requestAnimationFrame(gamepadLoop);
 }
 
 // Event listeners for gamepad connection/disconnection
 window.addEventListener("gamepadconnected", (e) => { gamepadHandler(e, true); }, false);
 window.addEventListener("gamepaddisconnected", (e) => { gamepadHandler(e, false); }, false);
 
-// Start continuous gamepad polling
-console.log("NiceGUI is ready. Starting continuous gamepad polling.");
-if (intervalId === null) { // Ensure interval is only set once
-    intervalId = setInterval(pollGamepads, 50); // Poll every 50ms
-    console.log("Started continuous gamepad polling. Interval ID:", intervalId);
-}
\ No newline at end of file
+// Start gamepad polling, driven by the browser's animation frames
+console.log(`NiceGUI is ready. Starting gamepad polling at ${config.pollHz} Hz.`);
+window.requestAnimationFrame(gamepadLoop);
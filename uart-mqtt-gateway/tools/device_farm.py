@@ -0,0 +1,323 @@
+"""Virtual UART device farm for load testing the uart-mqtt-gateway.
+
+Creates N pseudo-terminals that behave like rover microcontrollers: each one
+announces its eventType (chassis, manipulator or science) and streams
+delimited JSON telemetry at a configurable rate. Every line carries a device
+id, sequence number and send timestamp next to the eventType, which the
+gateway forwards untouched, so the farm can match what comes back on the
+outbound MQTT topics. With --downlink-rate it also publishes commands on the
+inbound topics and checks that they reach the right pseudo-terminals.
+
+The gateway only scans ports starting with its allowed-port-name-prefixes, so
+each pseudo-terminal gets a symlink named --link-prefix + index, by default
+/dev/ttyACM-farm0, /dev/ttyACM-farm1... (creating them in /dev needs root). A
+different prefix works as long as it is added to allowed-port-name-prefixes.
+
+    python tools/device_farm.py --devices 12 --rate 100 --duration 60 --output farm.json
+
+Needs paho-mqtt (pip install paho-mqtt) and a POSIX system.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import tty
+
+import paho.mqtt.client as mqtt
+
+EVENT_TYPES = ('chassis', 'manipulator', 'science')
+
+
+def telemetry(event_type: str, rng: random.Random) -> dict:
+    """A payload shaped like the firmware's outbound telemetry."""
+    if event_type == 'chassis':
+        wheels = ('fl', 'fr', 'rl', 'rr')
+        payload = {f"{wheel}_angV": round(rng.uniform(-12, 12), 3) for wheel in wheels}
+        payload.update({f"{wheel}_pwm": rng.randint(-255, 255) for wheel in wheels})
+        payload.update({"heading": round(rng.uniform(0, 360), 2), "linearV": round(rng.uniform(-1, 1), 3),
+                        "angularV": round(rng.uniform(-1, 1), 3)})
+        return {"eventType": "chassis", "mode": "pwm", "payload": payload}
+    if event_type == 'manipulator':
+        joints = ('rotate_turret', 'flex_forearm', 'flex_arm', 'flex_gripper', 'rotate_gripper', 'end_effector')
+        payload = {f"amps_{joint}": rng.randint(0, 100) for joint in joints}
+        payload.update({f"ang_{joint}": round(rng.uniform(-3.14, 3.14), 4) for joint in joints})
+        return {"eventType": "manipulator", "mode": "PWM", "payload": payload}
+    return {"eventType": "science", "payload": {
+        "FbDrillA": round(rng.uniform(0, 8), 3), "FbDrillB": round(rng.uniform(0, 8), 3),
+        "FbElevatorA": round(rng.uniform(0, 8), 3), "FbElevatorB": round(rng.uniform(0, 8), 3)}}
+
+
+class DeviceStats:
+    def __init__(self):
+        self.sent = 0
+        self.serial_full = 0 # lines dropped because the gateway did not drain the pseudo-terminal
+        self.received = set()
+        self.duplicates = 0
+        self.out_of_order = 0
+        self.last_seq = 0
+        self.latencies = []
+        self.first_seen = None
+        self.downlink_sent = 0
+        self.downlink_received = 0
+        self.downlink_latencies = []
+
+
+class VirtualDevice:
+    def __init__(self, index: int, event_type: str, link: str, delimiter: bytes):
+        self.index = index
+        self.event_type = event_type
+        self.delimiter = delimiter
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave) # no echo and no newline translation, like a real UART
+        os.set_blocking(self.master, False)
+        self.path = os.ttyname(self.slave)
+        self.link = None
+        if link:
+            try:
+                if os.path.islink(link):
+                    os.unlink(link)
+                os.symlink(self.path, link)
+                self.link = link
+            except OSError as e:
+                print(f"Could not link {link} to {self.path}: {e}")
+        self.rng = random.Random(index)
+        self.stats = DeviceStats()
+        self.seq = 0
+        self._buffer = b''
+
+    def write_line(self, measured: bool) -> bool:
+        """Writes the next telemetry line. Warm-up lines (measured=False) only announce the device."""
+        message = telemetry(self.event_type, self.rng)
+        message['device'] = self.index
+        if measured:
+            self.seq += 1
+            message['seq'] = self.seq
+            message['sent_ns'] = time.monotonic_ns()
+        data = json.dumps(message, separators=(',', ':')).encode() + self.delimiter
+        try:
+            written = os.write(self.master, data)
+        except BlockingIOError:
+            written = 0
+        if written < len(data):
+            if measured: # a partial line would corrupt the next one, a real UART would lose it the same way
+                self.stats.serial_full += 1
+            return False
+        if measured:
+            self.stats.sent += 1
+        return True
+
+    def read_downlink(self, pending: dict):
+        """Collects commands the gateway wrote to the device."""
+        try:
+            self._buffer += os.read(self.master, 65536)
+        except (BlockingIOError, OSError):
+            return
+        received_ns = time.monotonic_ns()
+        *messages, self._buffer = self._buffer.split(self.delimiter)
+        for message in messages:
+            try:
+                command_id = json.loads(message).get('farm_command')
+            except ValueError:
+                continue
+            sent_ns = pending.get(command_id) # every device of the eventType gets the same command
+            if sent_ns is not None:
+                self.stats.downlink_received += 1
+                self.stats.downlink_latencies.append((received_ns - sent_ns) / 1e6)
+
+    def close(self):
+        if self.link:
+            os.unlink(self.link)
+        os.close(self.master)
+        os.close(self.slave)
+
+
+def percentiles(samples: list) -> dict:
+    ordered = sorted(samples)
+    pick = lambda fraction: round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 3) if ordered else None
+    return {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99), "max": round(ordered[-1], 3) if ordered else None}
+
+
+class Farm:
+    def __init__(self, args):
+        self.args = args
+        delimiter = args.delimiter.encode().decode('unicode_escape').encode()
+        self.devices = [VirtualDevice(index, EVENT_TYPES[index % len(EVENT_TYPES)] if not args.event_types
+                                      else args.event_types[index % len(args.event_types)],
+                                      f"{args.link_prefix}{index}" if args.link_prefix else None, delimiter)
+                        for index in range(args.devices)]
+        self.lock = threading.Lock()
+        self.pending_commands = {} # command id to send time, matched by read_downlink
+        self.next_command = 0
+        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=f"uart-device-farm-{int(time.time())}",
+                                  protocol=mqtt.MQTTv311 if args.protocol == '3.1.1' else mqtt.MQTTv5)
+        self.client.username_pw_set(args.username, args.password)
+        self.client.on_message = self._on_message
+
+    def _on_message(self, client, userdata, msg):
+        received_ns = time.monotonic_ns()
+        try:
+            message = json.loads(msg.payload)
+            device = self.devices[message['device']]
+        except (ValueError, KeyError, IndexError, TypeError):
+            return
+        stats = device.stats
+        with self.lock:
+            if stats.first_seen is None:
+                stats.first_seen = time.monotonic()
+            seq = message.get('seq')
+            if seq is None:
+                return
+            if seq in stats.received:
+                stats.duplicates += 1 # QoS 1 redelivery
+                return
+            if seq < stats.last_seq:
+                stats.out_of_order += 1
+            stats.last_seq = max(stats.last_seq, seq)
+            stats.received.add(seq)
+            stats.latencies.append((received_ns - message['sent_ns']) / 1e6)
+
+    async def _warm_up(self):
+        """Announces every device until the gateway identified it and its telemetry shows up on MQTT."""
+        deadline = time.monotonic() + self.args.warmup
+        while time.monotonic() < deadline and any(device.stats.first_seen is None for device in self.devices):
+            for device in self.devices:
+                if device.stats.first_seen is None:
+                    device.write_line(measured=False)
+            await asyncio.sleep(0.5)
+        missing = [device.link or device.path for device in self.devices if device.stats.first_seen is None]
+        if missing:
+            print(f"No MQTT traffic from {len(missing)} device(s) after {self.args.warmup} s: {', '.join(missing)}")
+
+    async def _stream(self, device: VirtualDevice, started: float):
+        period = 1 / self.args.rate
+        due = started + device.rng.uniform(0, period)
+        while due < started + self.args.duration:
+            await asyncio.sleep(max(0.0, due - time.monotonic()))
+            device.write_line(measured=True)
+            due += period
+
+    async def _downlink(self, started: float):
+        period = 1 / self.args.downlink_rate
+        due = started
+        while due < started + self.args.duration:
+            await asyncio.sleep(max(0.0, due - time.monotonic()))
+            for event_type in {device.event_type for device in self.devices}:
+                self.next_command += 1
+                self.pending_commands[self.next_command] = time.monotonic_ns()
+                command = {"eventType": event_type, "payload": {}, "farm_command": self.next_command}
+                self.client.publish(f"orion/topic/{event_type}/inbound", json.dumps(command), qos=self.args.qos)
+                for device in self.devices:
+                    if device.event_type == event_type:
+                        device.stats.downlink_sent += 1
+            due += period
+
+    async def run(self) -> dict:
+        loop = asyncio.get_running_loop()
+        for device in self.devices:
+            loop.add_reader(device.master, device.read_downlink, self.pending_commands)
+            print(f"device {device.index:3d} {device.event_type:<11} {device.path}" + (f" -> {device.link}" if device.link else ""))
+
+        self.client.connect(self.args.host, self.args.port)
+        self.client.loop_start()
+        for event_type in {device.event_type for device in self.devices}:
+            self.client.subscribe(f"orion/topic/{event_type}/outbound", qos=self.args.qos)
+
+        await self._warm_up()
+        print(f"Streaming {self.args.rate} lines/s from each of {len(self.devices)} devices for {self.args.duration} s")
+        started = time.monotonic()
+        tasks = [self._stream(device, started) for device in self.devices]
+        if self.args.downlink_rate:
+            tasks.append(self._downlink(started))
+        await asyncio.gather(*tasks)
+        await asyncio.sleep(self.args.drain)
+
+        for device in self.devices:
+            loop.remove_reader(device.master)
+        self.client.loop_stop()
+        self.client.disconnect()
+        return self.report()
+
+    def report(self) -> dict:
+        duration = self.args.duration
+        devices = []
+        for device in self.devices:
+            stats = device.stats
+            devices.append({
+                "device": device.index,
+                "event_type": device.event_type,
+                "path": device.link or device.path,
+                "sent": stats.sent,
+                "received": len(stats.received),
+                "lost": stats.sent - len(stats.received),
+                "serial_full": stats.serial_full,
+                "duplicates": stats.duplicates,
+                "out_of_order": stats.out_of_order,
+                "rate_hz": round(len(stats.received) / duration, 1),
+                "latency_ms": percentiles(stats.latencies),
+                "downlink": {"sent": stats.downlink_sent, "received": stats.downlink_received,
+                             "latency_ms": percentiles(stats.downlink_latencies)}
+            })
+        sent = sum(device['sent'] for device in devices)
+        received = sum(device['received'] for device in devices)
+        return {
+            "tool": "device_farm",
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            "settings": {key: value for key, value in vars(self.args).items() if key not in ('password', 'output')},
+            "total": {
+                "sent": sent,
+                "received": received,
+                "lost": sent - received,
+                "throughput_msg_s": round(received / duration, 1),
+                "latency_ms": percentiles([latency for device in self.devices for latency in device.stats.latencies])
+            },
+            "devices": devices
+        }
+
+    def close(self):
+        for device in self.devices:
+            device.close()
+
+
+def print_report(report: dict):
+    for device in report['devices']:
+        latency = device['latency_ms']
+        print(f"device {device['device']:3d} {device['event_type']:<11} sent={device['sent']:7d} recv={device['received']:7d} "
+              f"lost={device['lost']:6d} full={device['serial_full']:5d} dup={device['duplicates']:4d} "
+              f"p50={latency['p50']} ms p99={latency['p99']} ms  downlink {device['downlink']['received']}/{device['downlink']['sent']}")
+    total = report['total']
+    print(f"total sent={total['sent']} received={total['received']} lost={total['lost']} "
+          f"throughput={total['throughput_msg_s']} msg/s p50={total['latency_ms']['p50']} ms p99={total['latency_ms']['p99']} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=1883)
+    parser.add_argument('--protocol', choices=('5', '3.1.1'), default='5')
+    parser.add_argument('--username', default=os.environ.get('MQTT_USERNAME', 'user'))
+    parser.add_argument('--password', default=os.environ.get('MQTT_PASSWORD', 'user'))
+    parser.add_argument('--qos', type=int, choices=(0, 1, 2), default=1)
+    parser.add_argument('--devices', type=int, default=3)
+    parser.add_argument('--event-types', nargs='+', choices=EVENT_TYPES, help="assigned round robin, all three by default")
+    parser.add_argument('--rate', type=float, default=50, help="telemetry lines per second per device")
+    parser.add_argument('--downlink-rate', type=float, default=0, help="commands per second per eventType on the inbound topics")
+    parser.add_argument('--delimiter', default='\\n\\n', help="message delimiter, as in the gateway's serial.delimiter")
+    parser.add_argument('--link-prefix', default='/dev/ttyACM-farm', help="symlink prefix matching allowed-port-name-prefixes, empty for none")
+    parser.add_argument('--warmup', type=float, default=30, help="seconds to wait for the gateway to identify the devices")
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--drain', type=float, default=2.0, help="seconds to wait for in-flight messages at the end")
+    parser.add_argument('--output', help="write the report to this JSON file")
+    args = parser.parse_args()
+
+    farm = Farm(args)
+    try:
+        report = asyncio.run(farm.run())
+    finally:
+        farm.close()
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)